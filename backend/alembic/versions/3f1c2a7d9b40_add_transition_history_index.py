@@ -0,0 +1,32 @@
+"""add_transition_history_index
+
+Revision ID: 3f1c2a7d9b40
+Revises: 9cbc1ee4eec5
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b40'
+down_revision: Union[str, None] = '9cbc1ee4eec5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Composite index for keyset pagination of a user's transition history
+    op.create_index(
+        'ix_mood_transitions_user_id_timestamp_id',
+        'mood_transitions',
+        ['user_id', 'timestamp', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mood_transitions_user_id_timestamp_id', table_name='mood_transitions')
@@ -0,0 +1,59 @@
+"""add_mood_transition_stats_table
+
+Revision ID: 7a2e4c9d1f63
+Revises: 3f1c2a7d9b40
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2e4c9d1f63'
+down_revision: Union[str, None] = '3f1c2a7d9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create the per-user transition aggregates table
+    op.create_table(
+        'mood_transition_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('initial_mood_id', sa.Integer(), nullable=False),
+        sa.Column('target_mood_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('last_seen', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['initial_mood_id'], ['moods.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['target_mood_id'], ['moods.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'initial_mood_id', 'target_mood_id')
+    )
+    op.create_index(
+        'ix_mood_transition_stats_user_id_count',
+        'mood_transition_stats',
+        ['user_id', 'count'],
+        unique=False
+    )
+
+    # Backfill from the existing transition history
+    op.execute(
+        """
+        INSERT INTO mood_transition_stats
+            (user_id, initial_mood_id, target_mood_id, count, last_seen)
+        SELECT user_id, initial_mood_id, target_mood_id, COUNT(*), MAX(timestamp)
+        FROM mood_transitions
+        WHERE user_id IS NOT NULL
+          AND initial_mood_id IS NOT NULL
+          AND target_mood_id IS NOT NULL
+        GROUP BY user_id, initial_mood_id, target_mood_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mood_transition_stats_user_id_count', table_name='mood_transition_stats')
+    op.drop_table('mood_transition_stats')
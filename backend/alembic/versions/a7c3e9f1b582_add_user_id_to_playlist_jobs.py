@@ -0,0 +1,34 @@
+"""add_user_id_to_playlist_jobs
+
+Revision ID: a7c3e9f1b582
+Revises: e4a1c7b92d36
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e9f1b582'
+down_revision: Union[str, None] = 'e4a1c7b92d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Jobs are only visible to the user who submitted them; existing jobs
+    # have no owner and are no longer readable
+    with op.batch_alter_table('playlist_jobs') as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_playlist_jobs_user_id_users', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('playlist_jobs') as batch_op:
+        batch_op.drop_constraint('fk_playlist_jobs_user_id_users', type_='foreignkey')
+        batch_op.drop_column('user_id')
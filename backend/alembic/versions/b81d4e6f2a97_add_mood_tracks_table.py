@@ -0,0 +1,47 @@
+"""add_mood_tracks_table
+
+Revision ID: b81d4e6f2a97
+Revises: 7a2e4c9d1f63
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81d4e6f2a97'
+down_revision: Union[str, None] = '7a2e4c9d1f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create the precomputed per-mood candidate track pools
+    op.create_table(
+        'mood_tracks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('mood_name', sa.String(), nullable=False),
+        sa.Column('spotify_uri', sa.String(), nullable=False),
+        sa.Column('energy', sa.Float(), nullable=False),
+        sa.Column('valence', sa.Float(), nullable=False),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('mood_name', 'spotify_uri', name='uq_mood_tracks_mood_name_spotify_uri')
+    )
+    op.create_index(op.f('ix_mood_tracks_id'), 'mood_tracks', ['id'], unique=False)
+    op.create_index(
+        'ix_mood_tracks_mood_name_fetched_at',
+        'mood_tracks',
+        ['mood_name', 'fetched_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mood_tracks_mood_name_fetched_at', table_name='mood_tracks')
+    op.drop_index(op.f('ix_mood_tracks_id'), table_name='mood_tracks')
+    op.drop_table('mood_tracks')
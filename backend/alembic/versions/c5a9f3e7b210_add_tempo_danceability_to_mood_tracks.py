@@ -0,0 +1,30 @@
+"""add_tempo_danceability_to_mood_tracks
+
+Revision ID: c5a9f3e7b210
+Revises: b81d4e6f2a97
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9f3e7b210'
+down_revision: Union[str, None] = 'b81d4e6f2a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Extra audio features used by the track feature index
+    op.add_column('mood_tracks', sa.Column('tempo', sa.Float(), nullable=True))
+    op.add_column('mood_tracks', sa.Column('danceability', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('mood_tracks') as batch_op:
+        batch_op.drop_column('danceability')
+        batch_op.drop_column('tempo')
@@ -0,0 +1,44 @@
+"""add_playlist_jobs_table
+
+Revision ID: d2f7b8c41e05
+Revises: c5a9f3e7b210
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7b8c41e05'
+down_revision: Union[str, None] = 'c5a9f3e7b210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create the background playlist creation jobs table
+    op.create_table(
+        'playlist_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('transition_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('stage', sa.String(), nullable=False),
+        sa.Column('stages', sa.JSON(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('playlist_id', sa.Integer(), nullable=True),
+        sa.Column('playlist_url', sa.String(), nullable=True),
+        sa.Column('track_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['transition_id'], ['mood_transitions.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['playlist_id'], ['spotify_playlists.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('playlist_jobs')
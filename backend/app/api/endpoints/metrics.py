@@ -0,0 +1,68 @@
+from fastapi import APIRouter
+from typing import Any, Dict
+
+from app.db.session import async_engine, engine
+from app.services.password_hasher import password_hasher
+from app.services.playlist_jobs import playlist_jobs
+from app.services.principal_cache import principal_cache
+from app.services.response_cache import response_cache
+from app.services.spotify_scheduler import spotify_scheduler
+from app.services.spotify_tokens import spotify_tokens
+from app.services.track_cache import track_cache
+
+router = APIRouter()
+
+@router.get("/pool", response_model=Dict[str, Any])
+async def get_pool_metrics():
+    """Get live connection pool statistics for each database engine"""
+    pools = {"sync": engine.pool}
+    if async_engine is not None:
+        pools["async"] = async_engine.pool
+
+    result = {}
+    for name, pool in pools.items():
+        stats = getattr(pool, "stats", None)
+        result[name] = stats.snapshot(pool) if stats else {"pool_class": type(pool).__name__}
+    return result
+
+
+@router.get("/track-cache", response_model=Dict[str, Any])
+async def get_track_cache_metrics():
+    """Get hit/miss counters for the Spotify track-candidate cache"""
+    return track_cache.snapshot()
+
+
+@router.get("/playlist-jobs", response_model=Dict[str, Any])
+async def get_playlist_job_metrics():
+    """Get queue depth, throughput and timing for background playlist jobs"""
+    return playlist_jobs.snapshot()
+
+
+@router.get("/spotify-tokens", response_model=Dict[str, Any])
+async def get_spotify_token_metrics():
+    """Get cache and refresh counters for the per-user Spotify token store"""
+    return spotify_tokens.snapshot()
+
+
+@router.get("/spotify-scheduler", response_model=Dict[str, Any])
+async def get_spotify_scheduler_metrics():
+    """Get pacing, queueing and 429 counters for outbound Spotify calls"""
+    return spotify_scheduler.snapshot()
+
+
+@router.get("/response-cache", response_model=Dict[str, Any])
+async def get_response_cache_metrics():
+    """Get 304 and stored-body counters for the conditional GET endpoints"""
+    return response_cache.snapshot()
+
+
+@router.get("/principal-cache", response_model=Dict[str, Any])
+async def get_principal_cache_metrics():
+    """Get hit/miss and invalidation counters for cached authenticated users"""
+    return principal_cache.snapshot()
+
+
+@router.get("/password-hashing", response_model=Dict[str, Any])
+async def get_password_hashing_metrics():
+    """Get queue depth, rehash counts and timing for the bcrypt thread pool"""
+    return password_hasher.snapshot()
@@ -1,34 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.api.dependencies import get_db
+from app.api.dependencies import get_async_db
+from app.core.config import settings
 from app.models.mood import Mood
 from app.schemas.mood import MoodResponse, MoodCreate, MoodUpdate
+from app.services.mood_cache import mood_cache
+from app.services.response_cache import make_etag, response_cache
 
 router = APIRouter()
 
+def _catalog_cache_control() -> str:
+    return f"public, max-age={settings.MOOD_CATALOG_MAX_AGE_SECONDS}"
+
 @router.get("/", response_model=List[MoodResponse])
-async def get_moods(db: Session = Depends(get_db)):
+async def get_moods(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all predefined moods"""
-    moods = db.query(Mood).all()
-    return moods
+    async def build():
+        return [MoodResponse.model_validate(mood, from_attributes=True) for mood in await mood_cache.all(db)]
+
+    etag = make_etag("moods", await mood_cache.version(db))
+    return await response_cache.respond(request, etag, build, _catalog_cache_control())
 
 @router.get("/{mood_id}", response_model=MoodResponse)
-async def get_mood(mood_id: int, db: Session = Depends(get_db)):
+async def get_mood(mood_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get a specific mood by ID"""
-    mood = db.query(Mood).filter(Mood.id == mood_id).first()
+    mood = await mood_cache.get(db, mood_id)
     if not mood:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Mood with ID {mood_id} not found"
         )
-    return mood
+
+    async def build():
+        return MoodResponse.model_validate(mood, from_attributes=True)
+
+    etag = make_etag("mood", mood_id, await mood_cache.version(db))
+    return await response_cache.respond(request, etag, build, _catalog_cache_control())
 
 @router.post("/", response_model=MoodResponse, status_code=status.HTTP_201_CREATED)
-async def create_mood(mood: MoodCreate, db: Session = Depends(get_db)):
+async def create_mood(mood: MoodCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new mood (admin only)"""
-    existing_mood = db.query(Mood).filter(Mood.name == mood.name).first()
+    existing_mood = await db.scalar(select(Mood).where(Mood.name == mood.name))
     if existing_mood:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -37,18 +52,19 @@ async def create_mood(mood: MoodCreate, db: Session = Depends(get_db)):
     
     db_mood = Mood(**mood.dict())
     db.add(db_mood)
-    db.commit()
-    db.refresh(db_mood)
+    await db.commit()
+    await db.refresh(db_mood)
+    await mood_cache.invalidate()
     return db_mood
 
 @router.put("/{mood_id}", response_model=MoodResponse)
 async def update_mood(
     mood_id: int,
     mood_data: MoodUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a mood (admin only)"""
-    mood = db.query(Mood).filter(Mood.id == mood_id).first()
+    mood = await db.get(Mood, mood_id)
     if not mood:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -57,19 +73,21 @@ async def update_mood(
     for key, value in mood_data.dict(exclude_unset=True).items():
         setattr(mood, key, value)
 
-    db.commit()
-    db.refresh(mood)
+    await db.commit()
+    await db.refresh(mood)
+    await mood_cache.invalidate()
     return mood
 
 @router.delete("/{mood_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_mood(mood_id: int, db: Session = Depends(get_db)):
+async def delete_mood(mood_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a mood (admin only)"""
-    mood = db.query(Mood).filter(Mood.id == mood_id).first()
+    mood = await db.get(Mood, mood_id)
     if not mood:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Mood with ID {mood_id} not found"
         )
-    db.delete(mood)
-    db.commit
-    return None
\ No newline at end of file
+    await db.delete(mood)
+    await db.commit()
+    await mood_cache.invalidate()
+    return None
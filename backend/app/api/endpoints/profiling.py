@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.profiling import Profile, profiler, token_matches
+
+router = APIRouter()
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """
+    Only callers with the configured profiling token may profile.
+    Answers 404 while profiling is disabled and 403 for a wrong token.
+    """
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not token_matches(x_profile_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid profiling token"
+        )
+
+def _collapsed_response(profile: Profile) -> PlainTextResponse:
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"',
+            "X-Profile-Id": profile.id,
+            "X-Profile-Samples": str(profile.samples),
+        },
+    )
+
+@router.post("/sample", dependencies=[Depends(require_profiling_token)])
+async def sample_worker(
+    seconds: float = Query(10, gt=0, le=settings.PROFILING_MAX_SECONDS, description="How long to sample for"),
+):
+    """Sample this worker for a number of seconds and return collapsed stacks"""
+    return _collapsed_response(await profiler.capture(seconds))
+
+@router.get(
+    "/profiles",
+    response_model=List[Dict[str, Any]],
+    dependencies=[Depends(require_profiling_token)],
+)
+async def list_profiles():
+    """List the profiles this worker has kept, newest first"""
+    return profiler.summaries()
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiling_token)])
+async def get_profile(profile_id: str):
+    """Get a kept profile as collapsed stacks"""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found"
+        )
+    return _collapsed_response(profile)
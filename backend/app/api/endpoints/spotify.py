@@ -1,185 +1,365 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 from app.core.config import settings
-from app.api.dependencies import get_db, get_spotify_client
-from app.models.mood import MoodTransition, Mood
+from app.core.errors import SpotifyError
+from app.core.security import create_oauth_state, decode_oauth_state, get_async_current_user
+from app.api.dependencies import get_async_db, get_spotify_client
+from app.db.queries import playlists_version
+from app.db.session import async_session_scope
+from app.models.mood import MoodTransition
 from app.models.spotify import SpotifyPlaylist
-from app.schemas.spotify import PlaylistRequest, PlaylistResponse
-
+from app.schemas.spotify import PlaylistJobResponse, PlaylistRequest, PlaylistResponse
+from app.services.mood_cache import CachedMood, mood_cache
+from app.services.mood_features import FALLBACK_GENRES, mood_params
+from app.services.playlist_jobs import JobQueueFull, ProgressCallback, playlist_jobs
+from app.services.principal_cache import CachedUser
+from app.services.response_cache import make_etag, response_cache
+from app.services.spotify_client import (
+    RECOMMENDATIONS_MAX,
+    AsyncSpotify,
+    SpotifyAPIError,
+    authorize_url,
+    request_user_token,
+)
+from app.services.spotify_tokens import spotify_tokens
+from app.services.feature_index import FeatureIndex, feature_index, mood_point
+from app.services.track_cache import track_cache
+from app.services.track_pools import load_pool
+from app.services.transition_planner import DEFAULT_TRACK_MS, Waypoint, plan_waypoints
+
+import asyncio
+import logging
+import math
 import random
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+def _spotify_error(message: str, e: SpotifyAPIError) -> SpotifyError:
+    """Translate a Spotify API failure, passing on any Retry-After."""
+    headers = None
+    if e.retry_after is not None:
+        headers = {"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+    return SpotifyError(detail=f"{message}: {e}", headers=headers)
+
+@router.get("/authorize-url", response_model=Dict[str, str])
+async def spotify_authorize_url(current_user: CachedUser = Depends(get_async_current_user)):
+    """Get the Spotify consent URL that connects the current user's account"""
+    return {"url": authorize_url(create_oauth_state(current_user.id))}
+
 @router.get("/login")
-async def spotify_login():
-    """Initiate Spotify OAuth login flow"""
-    sp_oauth = SpotifyOAuth(
-        client_id=settings.SPOTIFY_CLIENT_ID,
-        client_secret=settings.SPOTIFY_CLIENT_SECRET,
-        redirect_uri=settings.SPOTIFY_REDIRECT_URI,
-        scope=settings.SPOTIFY_SCOPE,
-        cache_handler=settings.SPOTIFY_CACHE_HANDLER
-    )
-    auth_url = sp_oauth.get_authorize_url()
-    return RedirectResponse(url=auth_url)
+async def spotify_login(current_user: CachedUser = Depends(get_async_current_user)):
+    """Initiate Spotify OAuth login flow for the current user"""
+    return RedirectResponse(url=authorize_url(create_oauth_state(current_user.id)))
 
 @router.get("/callback")
-async def spotify_callback(code: str):
+async def spotify_callback(
+    state: str,
+    code: Optional[str] = None,
+    error: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """Handle Spotify OAuth callback"""
-    try:
-        sp_oauth = SpotifyOAuth(
-            client_id=settings.SPOTIFY_CLIENT_ID,
-            client_secret=settings.SPOTIFY_CLIENT_SECRET,
-            redirect_uri=settings.SPOTIFY_REDIRECT_URI,
-            scope=settings.SPOTIFY_SCOPE,
-            cache_handler=settings.SPOTIFY_CACHE_HANDLER
+    user_id = decode_oauth_state(state)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired OAuth state"
         )
+    if error or not code:
+        return RedirectResponse(url=f"{settings.FRONTEND_URL}?auth_status=denied")
 
-        token_info = sp_oauth.get_access_token(code)
+    try:
+        token_info = await request_user_token(code)
+        await spotify_tokens.save(db, user_id, token_info)
+    except SpotifyAPIError as e:
+        raise SpotifyError(detail=f"Error handling Spotify callback: {e}")
 
-        return RedirectResponse(url=settings.FRONTEND_URL)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error handling Spotify callback: {e}"
-        )
+    return RedirectResponse(url=f"{settings.FRONTEND_URL}?auth_status=success")
 
 @router.get("/me", response_model=Dict[str, Any])
 async def get_user_profile(
-    spotify: spotipy.Spotify = Depends(get_spotify_client)
+    spotify: AsyncSpotify = Depends(get_spotify_client)
 ):
     """Get the current user's Spotify profile"""
     try:
-        user_info = spotify.current_user()
+        user_info = await spotify.current_user()
         return {
             "success": True,
             "display_name": user_info["display_name"],
             "id": user_info["id"],
             "profile_url": user_info["external_urls"].get("spotify")
         }
+    except SpotifyAPIError as e:
+        raise _spotify_error("Error fetching Spotify profile", e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching Spotify profile: {e}"
         )
 
-@router.post("/create-playlist", response_model=PlaylistResponse)
-async def create_mood_transition_playlist(
-    request: PlaylistRequest,
-    spotify: spotipy.Spotify = Depends(get_spotify_client),
-    db: Session = Depends(get_db)
-):
-    """Create a Spotify playlist based on a mood transition"""
-    try:
-        transition = db.query(MoodTransition).filter(
-            MoodTransition.id == request.transition_id
-        ).first()
-
-        if not transition:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Mood transition not found"
-            )
+async def _load_playlist_moods(
+    db: AsyncSession,
+    request: PlaylistRequest
+) -> Tuple[CachedMood, CachedMood]:
+    """Check that the request's transition and moods exist."""
+    transition = await db.get(MoodTransition, request.transition_id)
 
-        initial_mood = db.query(Mood).filter(
-            Mood.id == request.initial_mood_id
-        ).first()
+    if not transition:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Mood transition not found"
+        )
 
-        target_mood = db.query(Mood).filter(
-            Mood.id == request.target_mood_id
-        ).first()
+    initial_mood = await mood_cache.get(db, request.initial_mood_id)
+    target_mood = await mood_cache.get(db, request.target_mood_id)
 
-        if not initial_mood or not target_mood:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Initial or target mood not found"
-            )
+    if not initial_mood or not target_mood:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Initial or target mood not found"
+        )
+
+    return initial_mood, target_mood
 
-        user_info = spotify.current_user()
-        user_id = user_info["id"]
 
-        playlist_name = f"Transition: {initial_mood.name} to {target_mood.name}"
-        playlist_description = f"A playlist to help transition from {initial_mood.name} to {target_mood.name}"
+async def _build_playlist(
+    spotify: AsyncSpotify,
+    db: AsyncSession,
+    request: PlaylistRequest,
+    initial_mood: CachedMood,
+    target_mood: CachedMood,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """Select the tracks, create and fill the Spotify playlist and save it.
 
-        playlist = spotify.user_playlist_create(
-            user=user_id,
-            name=playlist_name,
-            public=False,
-            description=playlist_description
+    ``progress`` is awaited with the name of each stage as it starts.
+    """
+    async def stage(name: str) -> None:
+        if progress is not None:
+            await progress(name)
+
+    await stage("selecting_tracks")
+    index = await feature_index.get() if settings.TRACK_INDEX_ENABLED else None
+
+    tracks = None
+    if request.uses_waypoints:
+        tracks = await get_mood_transition_tracks_planned(
+            spotify,
+            initial_mood,
+            target_mood,
+            curve=request.curve,
+            waypoints=request.waypoints,
+            duration_minutes=request.target_duration_minutes,
+            index=index
         )
+    elif settings.TRACK_POOL_ENABLED:
+        tracks = await get_mood_transition_tracks_from_pools(
+            db, initial_mood, target_mood, index
+        )
+        if tracks is None and not settings.TRACK_POOL_FALLBACK_TO_SEARCH:
+            raise SpotifyError(
+                detail=f"No fresh track pool for {initial_mood.name} or {target_mood.name}"
+            )
+
+    if tracks is None:
+        if settings.SPOTIFY_CONCURRENT_SEARCH:
+            tracks = await get_mood_transition_tracks_concurrent(
+                spotify, initial_mood, target_mood, index=index
+            )
+        else:
+            tracks = await get_mood_transition_tracks(
+                spotify, initial_mood, target_mood, index
+            )
 
-        tracks = get_mood_transition_tracks(spotify, initial_mood, target_mood)
+    await stage("creating_playlist")
+    user_info = await spotify.current_user()
+    user_id = user_info["id"]
 
-        track_count = 0
-        if tracks:
-            spotify.playlist_add_items(playlist["id"], tracks)
-            track_count = len(tracks)
+    playlist_name = f"Transition: {initial_mood.name} to {target_mood.name}"
+    playlist_description = f"A playlist to help transition from {initial_mood.name} to {target_mood.name}"
 
-        db_playlist = SpotifyPlaylist(
-            transition_id=request.transition_id,
-            spotify_id=playlist["id"],
-            playlist_url=playlist["external_urls"]["spotify"],
-            created_at=datetime.utcnow()
+    playlist = await spotify.user_playlist_create(
+        user=user_id,
+        name=playlist_name,
+        public=False,
+        description=playlist_description
+    )
+
+    await stage("adding_tracks")
+    # Transitions only work in order, so chunks are added one after another
+    chunks = await spotify.playlist_add_items_chunked(playlist["id"], tracks, ordered=True)
+    track_count = len(tracks)
+    if len(chunks) > 1:
+        logger.info(
+            f"Added {track_count} tracks to playlist {playlist['id']} in {len(chunks)} chunks: "
+            + ", ".join(f"{c['tracks']} in {c['seconds'] * 1000:.0f} ms" for c in chunks)
         )
 
-        db.add(db_playlist)
-        db.commit()
-        db.refresh(db_playlist)
+    await stage("saving")
+    db_playlist = SpotifyPlaylist(
+        transition_id=request.transition_id,
+        spotify_id=playlist["id"],
+        playlist_url=playlist["external_urls"]["spotify"],
+        created_at=datetime.utcnow()
+    )
 
-        return {
-            "id": db_playlist.id,
-            "transition_id": db_playlist.transition_id,
-            "spotify_id": db_playlist.spotify_id,
-            "playlist_url": db_playlist.playlist_url,
-            "created_at": db_playlist.created_at,
-            "track_count": track_count
-        }
+    db.add(db_playlist)
+    await db.commit()
+    await db.refresh(db_playlist)
+
+    return {
+        "id": db_playlist.id,
+        "transition_id": db_playlist.transition_id,
+        "spotify_id": db_playlist.spotify_id,
+        "playlist_url": db_playlist.playlist_url,
+        "created_at": db_playlist.created_at,
+        "track_count": track_count,
+        "add_items_chunks": chunks
+    }
+
+
+@router.post("/create-playlist", response_model=PlaylistResponse)
+async def create_mood_transition_playlist(
+    request: PlaylistRequest,
+    spotify: AsyncSpotify = Depends(get_spotify_client),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a Spotify playlist based on a mood transition"""
+    try:
+        initial_mood, target_mood = await _load_playlist_moods(db, request)
+        return await _build_playlist(spotify, db, request, initial_mood, target_mood)
 
     except HTTPException:
         raise
+    except SpotifyAPIError as e:
+        raise _spotify_error("Error creating playlist", e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating playlist: {e}"
         )
 
+@router.post(
+    "/playlist-jobs",
+    response_model=PlaylistJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def create_playlist_job(
+    request: PlaylistRequest,
+    response: Response,
+    current_user: CachedUser = Depends(get_async_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue a Spotify playlist creation job and return its id immediately"""
+    # Fail now with a 401 if the user has not connected Spotify
+    await spotify_tokens.get_access_token(db, current_user.id)
+    initial_mood, target_mood = await _load_playlist_moods(db, request)
+    user_id = current_user.id
+
+    async def run(progress: ProgressCallback) -> Dict[str, Any]:
+        async with async_session_scope() as job_db:
+            # Resolved when the job runs, and valid for as long as it may
+            # run, however long it waited in the queue
+            access_token = await spotify_tokens.get_access_token(
+                job_db, user_id, min_ttl=settings.PLAYLIST_JOB_TIMEOUT_SECONDS
+            )
+            spotify = AsyncSpotify(access_token)
+            playlist = await _build_playlist(
+                spotify, job_db, request, initial_mood, target_mood, progress
+            )
+        return {
+            "playlist_id": playlist["id"],
+            "playlist_url": playlist["playlist_url"],
+            "track_count": playlist["track_count"],
+        }
+
+    try:
+        job = await playlist_jobs.submit(user_id, request.transition_id, run)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many playlist jobs queued, try again shortly",
+            headers={"Retry-After": "5"}
+        )
+
+    response.headers["Location"] = f"{settings.API_V1_STR}/spotify/playlist-jobs/{job['job_id']}"
+    return job
+
+async def _get_own_job(job_id: str, current_user: CachedUser) -> Dict[str, Any]:
+    """Get a job, answering 404 for missing jobs and other users' jobs alike."""
+    job = await playlist_jobs.get(job_id)
+    if job is None or job["user_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Playlist job not found"
+        )
+    return job
+
+@router.get("/playlist-jobs/{job_id}", response_model=PlaylistJobResponse)
+async def get_playlist_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to long-poll for a change"),
+    after: int = Query(0, ge=0, description="Only return once the job version exceeds this"),
+    current_user: CachedUser = Depends(get_async_current_user)
+):
+    """Get the status of a playlist creation job, optionally waiting for a change"""
+    job = await _get_own_job(job_id, current_user)
+    if wait:
+        job = await playlist_jobs.wait(
+            job_id, after, min(wait, settings.PLAYLIST_JOB_MAX_WAIT_SECONDS)
+        ) or job
+    return job
+
+@router.get("/playlist-jobs/{job_id}/events")
+async def stream_playlist_job(
+    job_id: str,
+    current_user: CachedUser = Depends(get_async_current_user)
+):
+    """Stream playlist job progress as server-sent events"""
+    await _get_own_job(job_id, current_user)
+
+    async def event_stream():
+        async for job in playlist_jobs.events(job_id):
+            if job is None:
+                yield ": keep-alive\n\n"
+                continue
+            data = PlaylistJobResponse(**job).model_dump_json()
+            yield f"id: {job['version']}\nevent: {job['status']}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/playlists", response_model=List[PlaylistResponse])
-async def get_playlists(db: Session = Depends(get_db)):
+async def get_playlists(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all created Spotify playlists"""
-    playlists = db.query(SpotifyPlaylist).all()
-    return playlists
+    async def build():
+        playlists = (await db.scalars(select(SpotifyPlaylist))).all()
+        return [PlaylistResponse.model_validate(p, from_attributes=True) for p in playlists]
 
-def get_mood_transition_tracks(
-    spotify: spotipy.Spotify,
-    initial_mood: Mood,
-    target_mood: Mood
-) -> List[str]:
-    """Get tracks that match the mood transition with randomization.
-    Returns a list of Spotify track URIs.
-    """
-    mood_features = {
-        "Angry": {"target_energy": 0.8, "target_valence": 0.2, 
-                "genres": ["metal", "punk", "hard-rock", "rage", "intense", "heavy"]},
-        "Happy": {"target_energy": 0.7, "target_valence": 0.8, 
-                "genres": ["pop", "dance", "happy", "upbeat", "feel-good", "cheerful"]},
-        "Sad": {"target_energy": 0.4, "target_valence": 0.2, 
-            "genres": ["sad", "indie", "chill", "melancholy", "acoustic", "blues"]},
-        "Indifferent": {"target_energy": 0.5, "target_valence": 0.5, 
-                    "genres": ["ambient", "study", "focus", "background", "neutral", "calm"]}
-    }
+    fingerprint = (await db.execute(playlists_version())).one()
+    etag = make_etag("playlists", *fingerprint)
+    return await response_cache.respond(request, etag, build)
 
-    initial_params = mood_features.get(initial_mood.name, mood_features["Indifferent"])
-    target_params = mood_features.get(target_mood.name, mood_features["Indifferent"])
+def _plan_transition(initial_mood: CachedMood, target_mood: CachedMood) -> Dict[str, Any]:
+    """Draw all the random choices for a transition playlist up front.
+
+    Both the sequential and the concurrent track fetchers execute the
+    same plan, so they produce playlists with identical structure.
+    """
+    initial_params = mood_params(initial_mood.name)
+    target_params = mood_params(target_mood.name)
 
-    track_uris = []
-    
     # Randomly select a subset of genres for initial mood (2-3 genres)
     initial_genres = random.sample(initial_params["genres"], 
                                 min(random.randint(2, 3), len(initial_params["genres"])))
@@ -191,22 +371,16 @@ def get_mood_transition_tracks(
     initial_valence = initial_params["target_valence"] * random.uniform(0.85, 1.15)
     initial_valence = max(0.0, min(1.0, initial_valence))  # Keep within 0-1 range
 
-    # Get tracks for initial mood with randomized parameters
+    initial_searches = []
     for genre in initial_genres:
         # Add random year ranges occasionally
         year_filter = ""
         if random.random() > 0.5:
             decade_start = random.choice([1970, 1980, 1990, 2000, 2010])
             year_filter = f" year:{decade_start}-{decade_start+9}"
-            
-        results = spotify.search(
-            q=f"genre:{genre}{year_filter}",
-            type="track",
-            limit=random.randint(2, 4)  # Random number of tracks per genre
-        )
 
-        for item in results["tracks"]["items"]:
-            track_uris.append(item["uri"])
+        # Random number of tracks per genre
+        initial_searches.append((f"genre:{genre}{year_filter}", random.randint(2, 4)))
     
     # Calculate transition parameters with slight randomization
     mid_energy = (initial_energy + target_params["target_energy"]) / 2
@@ -217,59 +391,313 @@ def get_mood_transition_tracks(
     mid_valence = mid_valence * random.uniform(0.9, 1.1)
     mid_valence = max(0.0, min(1.0, mid_valence))
 
-    # Get recommendations for transition tracks
-    seed_tracks = random.sample(track_uris, min(2, len(track_uris))) if track_uris else None
-    if seed_tracks:
-        try:
-            recommendations = spotify.recommendations(
-                seed_tracks=seed_tracks,
-                target_energy=mid_energy,
-                target_valence=mid_valence,
-                limit=random.randint(4, 6)  # Random number of transition tracks
-            )
-            
-            for track in recommendations["tracks"]:
-                track_uris.append(track["uri"])
-        except Exception as e:
-            # Fallback if recommendations fail
-            fallback_genres = ["electronic", "indie", "alternative"]
-            genre = random.choice(fallback_genres)
-            results = spotify.search(
-                q=f"genre:{genre}",
-                type="track",
-                limit=5
-            )
-
-            for item in results["tracks"]["items"]:
-                track_uris.append(item["uri"])
-    
     # Randomly select genres for target mood (2-3 genres)
     target_genres = random.sample(target_params["genres"], 
                                 min(random.randint(2, 3), len(target_params["genres"])))
-    
-    # Get tracks for target mood
+
+    target_searches = []
     for genre in target_genres:
         # Add random popularity filter occasionally
         popularity_filter = ""
         if random.random() > 0.5:
-            min_pop = random.randint(50, 80)
+            # Steps of ten keep the set of distinct queries small enough to cache
+            min_pop = random.choice([50, 60, 70, 80])
             popularity_filter = f" popularity:{min_pop}-100"
-            
-        results = spotify.search(
-            q=f"genre:{genre}{popularity_filter}",
-            type="track",
-            limit=random.randint(2, 4)  # Random number of tracks per genre
+
+        target_searches.append((f"genre:{genre}{popularity_filter}", random.randint(2, 4)))
+
+    return {
+        "initial_searches": initial_searches,
+        "mid_energy": mid_energy,
+        "mid_valence": mid_valence,
+        "recommendation_limit": random.randint(4, 6),  # Random number of transition tracks
+        "target_searches": target_searches,
+        # End points of the transition in audio-feature space
+        "path_start": mood_point(initial_mood.name, initial_energy, initial_valence),
+        "path_end": mood_point(target_mood.name),
+    }
+
+
+async def _fetch_track_uris(spotify: AsyncSpotify, query: str, limit: int) -> List[str]:
+    """Run a single live track search and return the URIs it found."""
+    results = await spotify.search(q=query, type="track", limit=limit)
+    return [item["uri"] for item in results["tracks"]["items"]]
+
+
+async def _search_track_uris(spotify: AsyncSpotify, query: str, limit: int) -> List[str]:
+    """Get ``limit`` tracks for a search query.
+
+    With the track cache enabled this draws a random sample from the
+    cached candidate pool for the query, and only searches Spotify when
+    the pool is missing or expired.
+    """
+    if not settings.TRACK_CACHE_ENABLED:
+        return await _fetch_track_uris(spotify, query, limit)
+
+    async def fetch(query: str, pool_size: int) -> List[str]:
+        return await _fetch_track_uris(spotify, query, pool_size)
+
+    pool = await track_cache.get_pool(query, fetch)
+    return random.sample(pool, min(limit, len(pool)))
+
+
+async def _transition_track_uris(
+    spotify: AsyncSpotify,
+    seed_pool: List[str],
+    plan: Dict[str, Any],
+    index: Optional[FeatureIndex] = None
+) -> List[str]:
+    """Get the middle section of the playlist, seeded from the initial tracks.
+
+    With a feature index the tracks are picked locally along the path
+    between the two moods and Spotify is not called at all.
+    """
+    if index is not None:
+        return index.path(
+            plan["path_start"],
+            plan["path_end"],
+            plan["recommendation_limit"],
+            exclude=seed_pool
         )
 
-        for item in results["tracks"]["items"]:
-            track_uris.append(item["uri"])
-    
-    # Remove duplicates while preserving order
+    seed_tracks = random.sample(seed_pool, min(2, len(seed_pool))) if seed_pool else None
+    if not seed_tracks:
+        return []
+
+    try:
+        recommendations = await spotify.recommendations(
+            seed_tracks=seed_tracks,
+            target_energy=plan["mid_energy"],
+            target_valence=plan["mid_valence"],
+            limit=plan["recommendation_limit"]
+        )
+        return [track["uri"] for track in recommendations["tracks"]]
+    except Exception as e:
+        # Fallback if recommendations fail
+        genre = random.choice(FALLBACK_GENRES)
+        return await _search_track_uris(spotify, f"genre:{genre}", 5)
+
+
+def _dedupe_tracks(track_uris: List[str]) -> List[str]:
+    """Remove duplicates while preserving order."""
     unique_tracks = []
     seen = set()
     for uri in track_uris:
         if uri not in seen:
             unique_tracks.append(uri)
             seen.add(uri)
-    
-    return unique_tracks
\ No newline at end of file
+    return unique_tracks
+
+
+async def get_mood_transition_tracks(
+    spotify: AsyncSpotify,
+    initial_mood: CachedMood,
+    target_mood: CachedMood,
+    index: Optional[FeatureIndex] = None
+) -> List[str]:
+    """Get tracks that match the mood transition with randomization.
+    Returns a list of Spotify track URIs.
+    """
+    plan = _plan_transition(initial_mood, target_mood)
+
+    track_uris = []
+    for query, limit in plan["initial_searches"]:
+        track_uris.extend(await _search_track_uris(spotify, query, limit))
+
+    track_uris.extend(await _transition_track_uris(spotify, track_uris, plan, index))
+
+    for query, limit in plan["target_searches"]:
+        track_uris.extend(await _search_track_uris(spotify, query, limit))
+
+    return _dedupe_tracks(track_uris)
+
+
+async def get_mood_transition_tracks_concurrent(
+    spotify: AsyncSpotify,
+    initial_mood: CachedMood,
+    target_mood: CachedMood,
+    max_concurrency: Optional[int] = None,
+    index: Optional[FeatureIndex] = None
+) -> List[str]:
+    """Concurrent variant of get_mood_transition_tracks.
+
+    The initial and target genre searches run in parallel and the
+    recommendations call starts as soon as the initial searches have
+    produced its seed tracks, so the request waits for roughly the
+    slowest stage instead of the sum of every Spotify round trip. At most
+    ``max_concurrency`` calls (default ``SPOTIFY_MAX_CONCURRENCY``) are in
+    flight at once. Returns the same deduplicated, ordered URI list.
+    """
+    plan = _plan_transition(initial_mood, target_mood)
+    semaphore = asyncio.Semaphore(max_concurrency or settings.SPOTIFY_MAX_CONCURRENCY)
+
+    async def call(func, *args):
+        async with semaphore:
+            return await func(spotify, *args)
+
+    async def search_all(searches):
+        results = await asyncio.gather(
+            *(call(_search_track_uris, query, limit) for query, limit in searches)
+        )
+        return [uri for uris in results for uri in uris]
+
+    async def initial_and_transition():
+        initial_uris = await search_all(plan["initial_searches"])
+        transition_uris = await call(_transition_track_uris, initial_uris, plan, index)
+        return initial_uris + transition_uris
+
+    leading_uris, target_uris = await asyncio.gather(
+        initial_and_transition(),
+        search_all(plan["target_searches"])
+    )
+
+    return _dedupe_tracks(leading_uris + target_uris)
+
+
+async def get_mood_transition_tracks_from_pools(
+    db: AsyncSession,
+    initial_mood: CachedMood,
+    target_mood: CachedMood,
+    index: Optional[FeatureIndex] = None
+) -> Optional[List[str]]:
+    """Build a transition playlist from the precomputed track pools.
+
+    Uses the same plan as the live fetchers: random tracks from the
+    initial mood's pool, a middle section taken along the feature index
+    path (or, without an index, the pooled tracks closest to the planned
+    midpoint in energy/valence space), then random tracks from the target
+    mood's pool. Makes no Spotify calls. Returns None when either pool is
+    empty or stale so the caller can fall back to live searches.
+    """
+    initial_pool = await load_pool(db, initial_mood.name)
+    target_pool = await load_pool(db, target_mood.name)
+    if not initial_pool or not target_pool:
+        return None
+
+    plan = _plan_transition(initial_mood, target_mood)
+    initial_count = sum(limit for _, limit in plan["initial_searches"])
+    target_count = sum(limit for _, limit in plan["target_searches"])
+    middle_count = plan["recommendation_limit"]
+
+    initial_tracks = random.sample(initial_pool, min(initial_count, len(initial_pool)))
+    target_tracks = random.sample(target_pool, min(target_count, len(target_pool)))
+
+    initial_uris = [t.uri for t in initial_tracks]
+    if index is not None:
+        middle_uris = index.path(
+            plan["path_start"], plan["path_end"], middle_count, exclude=initial_uris
+        )
+    else:
+        # Pick randomly among the closest few candidates so repeated
+        # transitions do not always get the same middle section
+        candidates = sorted(
+            initial_pool + target_pool,
+            key=lambda t: (t.energy - plan["mid_energy"]) ** 2 + (t.valence - plan["mid_valence"]) ** 2
+        )[:middle_count * 3]
+        middle_uris = [t.uri for t in random.sample(candidates, min(middle_count, len(candidates)))]
+
+    return _dedupe_tracks(initial_uris + middle_uris + [t.uri for t in target_tracks])
+
+
+def _fill_waypoints(
+    waypoints: List[Waypoint],
+    candidates: List[List[Tuple[str, Optional[int]]]]
+) -> List[str]:
+    """Take each waypoint's (uri, duration_ms) candidates in order until the
+    playlist reaches the end of that waypoint's share of the duration.
+
+    The budget carries over between waypoints, and a track is only taken
+    if at least half of it falls inside the budget, so the total stays
+    close to the target instead of every waypoint rounding up.
+    """
+    picked, total, budget_end = [], 0, 0
+    for waypoint, tracks in zip(waypoints, candidates):
+        budget_end += waypoint.budget_ms
+        for uri, duration_ms in tracks:
+            duration_ms = duration_ms or DEFAULT_TRACK_MS
+            if total + duration_ms / 2 > budget_end:
+                break
+            picked.append(uri)
+            total += duration_ms
+    return picked
+
+
+def _index_waypoint_tracks(index: FeatureIndex, waypoints: List[Waypoint]) -> List[str]:
+    """Select every waypoint's tracks from the feature index in one query."""
+    per_point = max(math.ceil(w.budget_ms / index.mean_duration_ms) for w in waypoints) + 1
+    picks = index.pick([w.point for w in waypoints], per_point)
+
+    return _fill_waypoints(waypoints, [
+        [(index.uris[i], int(index.durations[i])) for i in chosen] for chosen in picks
+    ])
+
+
+async def _waypoint_tracks(
+    spotify: AsyncSpotify,
+    waypoint: Waypoint,
+    initial_mood: CachedMood,
+    target_mood: CachedMood
+) -> List[Tuple[str, Optional[int]]]:
+    """Get recommended (uri, duration_ms) tracks close to one waypoint."""
+    # Seed from whichever mood the waypoint is closer to
+    nearer_mood = initial_mood if waypoint.progress < 0.5 else target_mood
+    genres = mood_params(nearer_mood.name)["genres"]
+    seed_genres = random.sample(genres, min(2, len(genres)))
+    energy, valence, tempo, danceability = waypoint.point
+    limit = min(waypoint.estimated_tracks + 1, RECOMMENDATIONS_MAX)
+
+    try:
+        recommendations = await spotify.recommendations(
+            seed_genres=seed_genres,
+            target_energy=energy,
+            target_valence=valence,
+            target_tempo=tempo,
+            target_danceability=danceability,
+            limit=limit
+        )
+        return [(track["uri"], track.get("duration_ms")) for track in recommendations["tracks"]]
+    except SpotifyAPIError:
+        # Fallback if recommendations fail
+        uris = await _search_track_uris(spotify, f"genre:{seed_genres[0]}", limit)
+        return [(uri, None) for uri in uris]
+
+
+async def get_mood_transition_tracks_planned(
+    spotify: AsyncSpotify,
+    initial_mood: CachedMood,
+    target_mood: CachedMood,
+    curve: Optional[str] = None,
+    waypoints: Optional[int] = None,
+    duration_minutes: Optional[int] = None,
+    index: Optional[FeatureIndex] = None,
+    max_concurrency: Optional[int] = None
+) -> List[str]:
+    """Get tracks for a multi-step transition along a curve.
+
+    The path from the initial to the target mood is split into
+    ``waypoints`` steps shaped by ``curve``, and each step gets an equal
+    share of ``duration_minutes``. Unset options fall back to the
+    TRANSITION_DEFAULT_* settings. With a feature index every waypoint
+    is answered by one local query. Otherwise each waypoint needs one
+    Spotify recommendations call, and those calls run concurrently, so
+    adding waypoints does not add round trips to the request.
+    """
+    plan = plan_waypoints(
+        initial_mood.name,
+        target_mood.name,
+        waypoints or settings.TRANSITION_DEFAULT_WAYPOINTS,
+        curve or settings.TRANSITION_DEFAULT_CURVE,
+        duration_minutes or settings.TRANSITION_DEFAULT_DURATION_MINUTES
+    )
+
+    if index is not None:
+        return _dedupe_tracks(_index_waypoint_tracks(index, plan))
+
+    semaphore = asyncio.Semaphore(max_concurrency or settings.SPOTIFY_MAX_CONCURRENCY)
+
+    async def fetch(waypoint: Waypoint):
+        async with semaphore:
+            return await _waypoint_tracks(spotify, waypoint, initial_mood, target_mood)
+
+    results = await asyncio.gather(*(fetch(waypoint) for waypoint in plan))
+    return _dedupe_tracks(_fill_waypoints(plan, results))
@@ -1,56 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import List
-
-from app.api.dependencies import get_db
-from app.core.security import get_current_user
-from app.models.mood import MoodTransition, Mood
-from app.models.user import User
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.api.dependencies import get_async_db
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.security import get_async_current_user
+from app.db.queries import (
+    common_transitions,
+    transitions_with_moods,
+    user_transitions,
+)
+from app.models.mood import MoodTransition
 from app.schemas.transition import (
     TransitionResponse,
     TransitionCreate,
     TransitionUpdate,
-    TransitionWithMoods
+    TransitionWithMoods,
+    TransitionBatchCreate,
+    TransitionBatchResponse
 )
+from app.services.mood_cache import mood_cache
+from app.services.principal_cache import CachedUser
+from app.services.response_cache import make_etag, response_cache
+from app.services.transition_stats import record_transitions, remove_transition
 
 
 router = APIRouter()
 
 @router.get("/", response_model=List[TransitionWithMoods])
 async def get_transitions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_async_current_user)
 ):
-    """Get all recorded mood transitions with pagination for the current user"""
-    transitions = db.query(MoodTransition).filter(
-        MoodTransition.user_id == current_user.id
-    ).order_by(MoodTransition.timestamp.desc()).offset(skip).limit(limit).all()
+    """Get all recorded mood transitions with pagination for the current user
+
+    Pass the X-Next-Cursor header of a full page back as ``cursor`` to get
+    the next page in constant time; ``skip`` is ignored when a cursor is
+    given and is kept for offset-based clients.
+    """
+    if cursor:
+        query = user_transitions(current_user.id, before=decode_cursor(cursor))
+    else:
+        query = user_transitions(current_user.id).offset(skip)
+
+    transitions = (await db.scalars(query.limit(limit))).all()
+
+    if transitions and len(transitions) == limit:
+        last = transitions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.timestamp, last.id)
     return transitions
 
 @router.get("/all", response_model=List[TransitionWithMoods])
 async def get_all_transitions(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all recorded mood transitions with pagination (no auth required)"""
-    transitions = db.query(MoodTransition).offset(skip).limit(limit).all()
+    transitions = (await db.scalars(
+        transitions_with_moods().offset(skip).limit(limit)
+    )).all()
     return transitions
 
 @router.get("/{transition_id}", response_model=TransitionWithMoods)
 async def get_transition(
     transition_id: int, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_async_current_user)
 ):
     """Get a specific mood transition by ID"""
-    transition = db.query(MoodTransition).filter(
-        MoodTransition.id == transition_id,
-        MoodTransition.user_id == current_user.id
-    ).first()
+    transition = await db.scalar(
+        transitions_with_moods().where(
+            MoodTransition.id == transition_id,
+            MoodTransition.user_id == current_user.id
+        )
+    )
     
     if not transition:
         raise HTTPException(
@@ -62,12 +93,12 @@ async def get_transition(
 @router.post("/", response_model=TransitionWithMoods, status_code=status.HTTP_201_CREATED)
 async def create_transition(
     transition: TransitionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_async_current_user)
 ):
     """Record a new mood transition"""
-    initial_mood = db.query(Mood).filter(Mood.id == transition.initial_mood_id).first()
-    target_mood = db.query(Mood).filter(Mood.id == transition.target_mood_id).first()
+    initial_mood = await mood_cache.get(db, transition.initial_mood_id)
+    target_mood = await mood_cache.get(db, transition.target_mood_id)
 
     if not initial_mood:
         raise HTTPException(
@@ -89,21 +120,99 @@ async def create_transition(
     )
 
     db.add(db_transition)
-    db.commit()
-    db.refresh(db_transition)
-    return db_transition
+    await record_transitions(db, current_user.id, [
+        (db_transition.initial_mood_id, db_transition.target_mood_id, db_transition.timestamp)
+    ])
+    await db.commit()
+    return {
+        "id": db_transition.id,
+        "initial_mood_id": db_transition.initial_mood_id,
+        "target_mood_id": db_transition.target_mood_id,
+        "timestamp": db_transition.timestamp,
+        "user_id": db_transition.user_id,
+        "initial_mood": initial_mood,
+        "target_mood": target_mood,
+    }
+
+@router.post("/batch", response_model=TransitionBatchResponse)
+async def create_transitions_batch(
+    batch: TransitionBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_async_current_user)
+):
+    """Record many mood transitions in one transaction
+
+    Meant for replaying offline logs: every item may carry its original
+    timestamp. Valid items are inserted with a single multi-row INSERT and
+    invalid ones are reported per item without failing the batch.
+    """
+    if len(batch.items) > settings.TRANSITION_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds {settings.TRANSITION_BATCH_MAX_ITEMS} items"
+        )
+
+    now = datetime.utcnow()
+    latest_allowed = now + timedelta(seconds=settings.TRANSITION_MAX_CLOCK_SKEW_SECONDS)
+
+    results = []
+    rows = []
+    for index, item in enumerate(batch.items):
+        timestamp = item.timestamp or now
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+        detail = None
+        if not await mood_cache.get(db, item.initial_mood_id):
+            detail = f"Initial mood with ID {item.initial_mood_id} not found"
+        elif not await mood_cache.get(db, item.target_mood_id):
+            detail = f"Target mood with ID {item.target_mood_id} not found"
+        elif timestamp > latest_allowed:
+            detail = "Timestamp is in the future"
+
+        results.append({"index": index, "status": "error" if detail else "created", "detail": detail})
+        if not detail:
+            rows.append({
+                "initial_mood_id": item.initial_mood_id,
+                "target_mood_id": item.target_mood_id,
+                "timestamp": timestamp,
+                "user_id": current_user.id,
+            })
+
+    if rows:
+        ids = (await db.scalars(
+            insert(MoodTransition).returning(MoodTransition.id, sort_by_parameter_order=True),
+            rows
+        )).all()
+        await record_transitions(db, current_user.id, [
+            (row["initial_mood_id"], row["target_mood_id"], row["timestamp"]) for row in rows
+        ])
+        await db.commit()
+
+        created = iter(ids)
+        for result in results:
+            if result["status"] == "created":
+                result["id"] = next(created)
+
+    return {
+        "created": len(rows),
+        "failed": len(results) - len(rows),
+        "results": results,
+    }
 
 @router.delete("/{transition_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_transition(
     transition_id: int, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CachedUser = Depends(get_async_current_user)
 ):
     """Delete a mood transition"""
-    transition = db.query(MoodTransition).filter(
-        MoodTransition.id == transition_id,
-        MoodTransition.user_id == current_user.id
-    ).first()
+    transition = await db.scalar(
+        select(MoodTransition).where(
+            MoodTransition.id == transition_id,
+            MoodTransition.user_id == current_user.id
+        )
+    )
     
     if not transition:
         raise HTTPException(
@@ -111,49 +220,51 @@ async def delete_transition(
             detail=f"Transition with ID {transition_id} not found"
         )
     
-    db.delete(transition)
-    db.commit()
+    await db.delete(transition)
+    await db.flush()
+    await remove_transition(db, transition)
+    await db.commit()
     return None
 
 @router.get("/stats/common", response_model=List[dict])
 async def get_common_transitions(
-    db: Session = Depends(get_db), 
+    request: Request,
+    db: AsyncSession = Depends(get_async_db), 
     limit: int = 5,
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_async_current_user)
 ):
     """Get the most common mood transitions for the current user"""
-    from sqlalchemy import func, desc
+    # The rows themselves are the fingerprint: at most ``limit`` of them
+    # from the per-user aggregates, and exactly what the body is built from
+    stats = (await db.scalars(common_transitions(current_user.id, limit))).all()
 
-    common_transitions = (
-        db.query(
-            MoodTransition.initial_mood_id,
-            MoodTransition.target_mood_id,
-            func.count().label("count")
-        )
-        .filter(MoodTransition.user_id == current_user.id)
-        .group_by(MoodTransition.initial_mood_id, MoodTransition.target_mood_id)
-        .order_by(desc("count"))
-        .limit(limit)
-        .all()
+    async def build():
+        result = []
+        for t in stats:
+            initial_mood = await mood_cache.get(db, t.initial_mood_id)
+            target_mood = await mood_cache.get(db, t.target_mood_id)
+
+            result.append({
+                "initial_mood": {
+                    "id": initial_mood.id,
+                    "name": initial_mood.name,
+                    "color": initial_mood.color
+                },
+                "target_mood": {
+                    "id": target_mood.id,
+                    "name": target_mood.name,
+                    "color": target_mood.color
+                },
+                "count": t.count,
+                "last_seen": t.last_seen
+            })
+        return result
+
+    etag = make_etag(
+        "stats", current_user.id, limit,
+        *[(t.initial_mood_id, t.target_mood_id, t.count, t.last_seen) for t in stats],
+        await mood_cache.version(db),
+    )
+    return await response_cache.respond(
+        request, etag, build, "private, no-cache", vary="Authorization"
     )
-    
-    result = []
-    for t in common_transitions:
-        initial_mood = db.query(Mood).filter(Mood.id == t.initial_mood_id).first()
-        target_mood = db.query(Mood).filter(Mood.id == t.target_mood_id).first()
-
-        result.append({
-            "initial_mood": {
-                "id": initial_mood.id,
-                "name": initial_mood.name,
-                "color": initial_mood.color
-            },
-            "target_mood": {
-                "id": target_mood.id,
-                "name": target_mood.name,
-                "color": target_mood.color
-            },
-            "count": t.count
-        })
-
-    return result
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""Per-request latency with a database and Spotify time breakdown.
+
+``InstrumentationMiddleware`` opens a ``RequestTimings`` for every HTTP
+request and keeps it in a context variable. SQL statements (timed by
+engine events in ``app/db/session.py``) and Spotify calls (timed in
+``app/services/spotify_client.py``) add to the timings of the request
+they run for. Threadpool calls copy the context, so sync sessions are
+attributed too.
+
+When the response starts, the middleware adds a ``Server-Timing`` header
+with the breakdown, and when it ends, it records the request under its
+route template. Everything is rendered in the Prometheus text format by
+``Instrumentation.render`` and served at ``/metrics``.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import Histogram, prometheus_histogram, prometheus_samples
+
+# Label for requests that did not match any route, so scanners and typos
+# cannot create unbounded label values
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestTimings:
+    """Statement and Spotify call totals for one request."""
+
+    __slots__ = ("db_count", "db_seconds", "spotify_count", "spotify_seconds", "_lock")
+
+    def __init__(self) -> None:
+        self.db_count = 0
+        self.db_seconds = 0.0
+        self.spotify_count = 0
+        self.spotify_seconds = 0.0
+        # Sync sessions report from threadpool threads
+        self._lock = threading.Lock()
+
+    def add_sql(self, seconds: float) -> None:
+        with self._lock:
+            self.db_count += 1
+            self.db_seconds += seconds
+
+    def add_spotify(self, seconds: float) -> None:
+        with self._lock:
+            self.spotify_count += 1
+            self.spotify_seconds += seconds
+
+    def server_timing(self, total: float) -> str:
+        """
+        Value for the ``Server-Timing`` header, durations in milliseconds.
+
+        db and spotify are summed over calls, so with concurrent calls
+        they can exceed the request's own duration.
+        """
+        return ", ".join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_count} queries"',
+            f'spotify;dur={self.spotify_seconds * 1000:.1f};desc="{self.spotify_count} calls"',
+            f"app;dur={total * 1000:.1f}",
+        ])
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class _Route:
+    """Totals for one (method, route) pair."""
+
+    __slots__ = ("db_count", "db_seconds", "spotify_count", "spotify_seconds")
+
+    def __init__(self) -> None:
+        self.db_count = 0
+        self.db_seconds = 0.0
+        self.spotify_count = 0
+        self.spotify_seconds = 0.0
+
+
+class Instrumentation:
+    """Process-wide request, SQL and Spotify metrics."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_progress = 0
+        self.request_latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.routes: Dict[Tuple[str, str], _Route] = {}
+        self.sql_latency = Histogram()
+        self.spotify_latency: Dict[str, Histogram] = {}
+
+    def record_sql(self, seconds: float) -> None:
+        """Record one SQL statement, also against the current request."""
+        self.sql_latency.observe(seconds)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_sql(seconds)
+
+    def record_spotify(self, seconds: float, status: str) -> None:
+        """Record one HTTP call to Spotify, also against the current request."""
+        histogram = self.spotify_latency.get(status)
+        if histogram is None:
+            with self._lock:
+                histogram = self.spotify_latency.setdefault(status, Histogram())
+        histogram.observe(seconds)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_spotify(seconds)
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_progress += 1
+
+    def request_finished(
+        self, method: str, route: str, status: int, seconds: float, timings: RequestTimings
+    ) -> None:
+        key = (method, route, str(status))
+        with self._lock:
+            self.in_progress -= 1
+            histogram = self.request_latency.setdefault(key, Histogram())
+            totals = self.routes.setdefault((method, route), _Route())
+            totals.db_count += timings.db_count
+            totals.db_seconds += timings.db_seconds
+            totals.spotify_count += timings.spotify_count
+            totals.spotify_seconds += timings.spotify_seconds
+        histogram.observe(seconds)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            latency = sorted(self.request_latency.items())
+            routes = sorted(
+                (key, (t.db_count, t.db_seconds, t.spotify_count, t.spotify_seconds))
+                for key, t in self.routes.items()
+            )
+            spotify = sorted(self.spotify_latency.items())
+            in_progress = self.in_progress
+
+        def per_route(index: int):
+            return [({"method": m, "route": r}, values[index]) for (m, r), values in routes]
+
+        lines: List[str] = []
+        lines += prometheus_samples(
+            "http_requests_in_progress", "gauge", "HTTP requests being handled",
+            [({}, in_progress)],
+        )
+        lines += prometheus_histogram(
+            "http_request_duration_seconds", "HTTP request latency by route",
+            [({"method": m, "route": r, "status": s}, h) for (m, r, s), h in latency],
+        )
+        lines += prometheus_samples(
+            "http_request_db_statements_total", "counter",
+            "SQL statements executed while handling requests", per_route(0),
+        )
+        lines += prometheus_samples(
+            "http_request_db_seconds_total", "counter",
+            "Time spent in SQL statements while handling requests", per_route(1),
+        )
+        lines += prometheus_samples(
+            "http_request_spotify_calls_total", "counter",
+            "Spotify API calls made while handling requests", per_route(2),
+        )
+        lines += prometheus_samples(
+            "http_request_spotify_seconds_total", "counter",
+            "Time spent in Spotify API calls while handling requests", per_route(3),
+        )
+        lines += prometheus_histogram(
+            "db_statement_duration_seconds", "SQL statement latency, including background work",
+            [({}, self.sql_latency)],
+        )
+        lines += prometheus_histogram(
+            "spotify_request_duration_seconds", "Spotify API call latency by response status",
+            [({"status": status}, h) for status, h in spotify],
+        )
+        return "\n".join(lines) + "\n"
+
+
+instrumentation = Instrumentation()
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware timing each HTTP request and adding ``Server-Timing``."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.server_timing(time.perf_counter() - start))
+            await send(message)
+
+        instrumentation.request_started()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            instrumentation.request_finished(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status_code,
+                time.perf_counter() - start,
+                timings,
+            )
+            _current.reset(token)
@@ -0,0 +1,328 @@
+"""Statistical sampling profiler for live workers.
+
+A daemon thread snapshots the Python stack of every thread in the
+process each ``PROFILING_SAMPLE_INTERVAL_SECONDS`` with
+``sys._current_frames()`` and keeps the recent samples in a ring buffer.
+It only runs while something is subscribed, so it costs nothing when
+profiling is idle. A profile is the samples taken during a time window,
+folded into collapsed stacks (``thread;outer;...;inner count``), the
+input format of flamegraph.pl, inferno and speedscope.
+
+Profiles are captured three ways:
+
+- ``Profiler.capture`` samples the whole worker for N seconds.
+- ``ProfilingMiddleware`` samples while a request carrying a valid
+  ``X-Profile-Token`` header runs, and names the profile in the
+  response's ``X-Profile-Id`` header.
+- With ``PROFILING_SLOW_REQUEST_SECONDS`` set, the sampler runs
+  continuously and the middleware keeps the samples of any request that
+  takes longer, at most once per route per cooldown.
+
+Samples cover the whole worker, so a request's profile also contains
+whatever other requests the event loop ran at the same time. Threads
+parked in ``threading`` or ``queue`` waits, such as idle threadpool
+workers, are skipped; the event loop thread is always kept, and time it
+spends in ``select`` is idle time.
+"""
+import asyncio
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as StackCounts, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from types import CodeType, FrameType
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.instrumentation import UNMATCHED_ROUTE
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+
+# Leaf frames from these files mean a thread is parked waiting for work
+_IDLE_FILES = (
+    os.sep + "threading.py",
+    os.sep + "queue.py",
+    os.path.join(os.sep + "concurrent", "futures", "thread.py"),
+)
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@lru_cache(maxsize=8192)
+def _frame_label(code: CodeType) -> str:
+    """``function (path:line)`` with paths shortened to the app or package."""
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT):
+        filename = os.path.relpath(filename, _APP_ROOT)
+    else:
+        for marker in ("site-packages", "dist-packages"):
+            if marker in filename:
+                filename = filename.split(marker, 1)[1].lstrip(os.sep)
+                break
+        else:
+            filename = os.path.basename(filename)
+    # Semicolons separate frames in the collapsed format
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse_stack(frame: FrameType, thread_name: str) -> str:
+    labels = []
+    current: Optional[FrameType] = frame
+    while current is not None:
+        labels.append(_frame_label(current.f_code))
+        current = current.f_back
+    labels.append(thread_name.replace(";", ":"))
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler:
+    """Background thread sampling every thread's stack into a ring buffer."""
+
+    def __init__(self, interval: float, buffer_seconds: float) -> None:
+        self.interval = interval
+        self._samples: Deque[Tuple[float, Tuple[str, ...]]] = deque(
+            maxlen=max(1, int(buffer_seconds / interval))
+        )
+        self._lock = threading.Lock()
+        self._subscribers = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.samples_taken = 0
+
+    def subscribe(self) -> None:
+        """Start sampling, if not already running, until a matching unsubscribe."""
+        with self._lock:
+            self._subscribers += 1
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._stop,), name="stack-sampler", daemon=True
+                )
+                self._thread.start()
+
+    def unsubscribe(self) -> None:
+        with self._lock:
+            self._subscribers -= 1
+            if self._subscribers <= 0 and self._thread is not None:
+                self._subscribers = 0
+                self._stop.set()
+                self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def _run(self, stop: threading.Event) -> None:
+        own = threading.get_ident()
+        main = threading.main_thread().ident
+        while not stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident != main and frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stacks.append(collapse_stack(frame, names.get(ident, f"thread-{ident}")))
+            self._samples.append((time.monotonic(), tuple(stacks)))
+            self.samples_taken += 1
+
+    def collect(self, since: float, until: float) -> Tuple[int, StackCounts]:
+        """Number of samples taken in [since, until] and their folded stacks."""
+        counts: StackCounts = StackCounts()
+        taken = 0
+        # Copy first; the sampler thread appends concurrently
+        for timestamp, stacks in list(self._samples):
+            if since <= timestamp <= until:
+                taken += 1
+                counts.update(stacks)
+        return taken, counts
+
+
+@dataclass
+class Profile:
+    """Folded stacks sampled during one capture."""
+    id: str
+    trigger: str
+    seconds: float
+    samples: int
+    stacks: StackCounts
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    method: Optional[str] = None
+    route: Optional[str] = None
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one ``frame;frame;frame count`` line per stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "method": self.method,
+            "route": self.route,
+            "seconds": round(self.seconds, 4),
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "created_at": self.created_at,
+        }
+
+
+class Profiler:
+    """Owns the sampler and the most recent profiles."""
+
+    def __init__(
+        self,
+        interval: float,
+        max_seconds: float,
+        max_profiles: int,
+        slow_request_seconds: Optional[float],
+        slow_cooldown: float,
+    ) -> None:
+        self.max_seconds = max_seconds
+        self.slow_request_seconds = slow_request_seconds
+        self.slow_cooldown = slow_cooldown
+        # Long enough for a full manual capture or slow request
+        self.sampler = StackSampler(interval, buffer_seconds=max_seconds * 2)
+        self._profiles: Dict[str, Profile] = {}
+        self._order: Deque[str] = deque()
+        self.max_profiles = max_profiles
+        self._last_slow: Dict[Tuple[str, str], float] = {}
+        self._continuous = False
+
+    def start(self) -> None:
+        """Keep sampling continuously when slow-request capture is configured."""
+        if self.slow_request_seconds is not None and not self._continuous:
+            self._continuous = True
+            self.sampler.subscribe()
+
+    def stop(self) -> None:
+        if self._continuous:
+            self._continuous = False
+            self.sampler.unsubscribe()
+
+    def _store(self, profile: Profile) -> Profile:
+        self._profiles[profile.id] = profile
+        self._order.append(profile.id)
+        while len(self._order) > self.max_profiles:
+            self._profiles.pop(self._order.popleft(), None)
+        return profile
+
+    def build(
+        self,
+        trigger: str,
+        since: float,
+        until: float,
+        profile_id: Optional[str] = None,
+        method: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Profile:
+        """Fold the samples taken between two ``time.monotonic()`` readings."""
+        samples, stacks = self.sampler.collect(since, until)
+        return self._store(Profile(
+            id=profile_id or uuid.uuid4().hex[:16],
+            trigger=trigger,
+            seconds=until - since,
+            samples=samples,
+            stacks=stacks,
+            method=method,
+            route=route,
+        ))
+
+    async def capture(self, seconds: float) -> Profile:
+        """Sample the whole worker for ``seconds``."""
+        self.sampler.subscribe()
+        try:
+            since = time.monotonic()
+            await asyncio.sleep(seconds)
+            return self.build("manual", since, time.monotonic())
+        finally:
+            self.sampler.unsubscribe()
+
+    def should_capture_slow(self, method: str, route: str, seconds: float) -> bool:
+        if self.slow_request_seconds is None or seconds < self.slow_request_seconds:
+            return False
+        now = time.monotonic()
+        last = self._last_slow.get((method, route))
+        if last is not None and now - last < self.slow_cooldown:
+            return False
+        self._last_slow[(method, route)] = now
+        return True
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self._profiles.get(profile_id)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        return [self._profiles[profile_id].summary() for profile_id in reversed(self._order)]
+
+
+def token_matches(candidate: Optional[str]) -> bool:
+    """Whether ``candidate`` is the configured profiling token."""
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_TOKEN or not candidate:
+        return False
+    return hmac.compare_digest(candidate.encode(), settings.PROFILING_TOKEN.encode())
+
+
+profiler = Profiler(
+    interval=settings.PROFILING_SAMPLE_INTERVAL_SECONDS,
+    max_seconds=settings.PROFILING_MAX_SECONDS,
+    max_profiles=settings.PROFILING_MAX_PROFILES,
+    slow_request_seconds=settings.PROFILING_SLOW_REQUEST_SECONDS,
+    slow_cooldown=settings.PROFILING_SLOW_COOLDOWN_SECONDS,
+)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware for header-triggered and slow-request profiles."""
+
+    def __init__(self, app: ASGIApp, exclude_prefix: Optional[str] = None) -> None:
+        self.app = app
+        # Requests to the profiling endpoints themselves are never profiled
+        self.exclude_prefix = exclude_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        excluded = self.exclude_prefix and scope.get("path", "").startswith(self.exclude_prefix)
+        if scope["type"] != "http" or excluded:
+            await self.app(scope, receive, send)
+            return
+
+        requested = token_matches(Headers(scope=scope).get(PROFILE_TOKEN_HEADER))
+        if not requested and profiler.slow_request_seconds is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:16]
+
+        async def send_with_profile_id(message: Message) -> None:
+            if requested and message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        if requested:
+            profiler.sampler.subscribe()
+        since = time.monotonic()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            until = time.monotonic()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            if requested:
+                profiler.build("request", since, until, profile_id, scope["method"], route)
+                profiler.sampler.unsubscribe()
+            elif profiler.should_capture_slow(scope["method"], route, until - since):
+                profile = profiler.build("slow", since, until, None, scope["method"], route)
+                logger.warning(
+                    f"Slow request {scope['method']} {route} took {until - since:.2f}s; "
+                    f"saved profile {profile.id} ({profile.samples} samples)"
+                )
@@ -1,34 +1,34 @@
 """Security utilities for authentication and authorization."""
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Union
 
 from jose import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import get_async_db, get_db
 from app.models.user import User
+from app.services.principal_cache import CachedUser, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def create_access_token(
-    subject: Union[str, Any], expires_delta: Optional[timedelta] = None
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    user_id: Optional[int] = None,
 ) -> str:
     """
     Create a JWT access token.
     
     Args:
-        subject: The subject of the token, typically a user ID.
+        subject: The subject of the token, typically the username.
         expires_delta: Optional expiration time delta.
+        user_id: Optional user id, stored as the ``uid`` claim so the user
+            can be loaded by primary key.
         
     Returns:
         Encoded JWT token as a string.
@@ -41,48 +41,126 @@ def create_access_token(
         )
     
     to_encode = {"exp": expire, "sub": str(subject)}
+    if user_id is not None:
+        to_encode["uid"] = user_id
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
+def create_oauth_state(user_id: int) -> str:
     """
-    Validate token and return current user.
-    
-    Args:
-        token: JWT token from request
-        db: Database session
-        
-    Returns:
-        User object for the authenticated user
-        
-    Raises:
-        HTTPException: If token is invalid or user not found
+    Create the signed state parameter for the Spotify OAuth flow.
+
+    The callback is a browser redirect without our bearer token, so the
+    state carries the user the Spotify tokens belong to.
     """
-    credentials_exception = HTTPException(
+    expire = datetime.utcnow() + timedelta(
+        minutes=settings.SPOTIFY_OAUTH_STATE_EXPIRE_MINUTES
+    )
+    to_encode = {"exp": expire, "sub": str(user_id), "purpose": "spotify-oauth"}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def decode_oauth_state(state: str) -> Optional[int]:
+    """Return the user id from an OAuth state, or None if it is invalid."""
+    try:
+        payload = jwt.decode(
+            state, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except jwt.JWTError:
+        return None
+    if payload.get("purpose") != "spotify-oauth":
+        return None
+    try:
+        return int(payload["sub"])
+    except (KeyError, ValueError):
+        return None
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _decode_token(token: str) -> Dict[str, Any]:
+    """Decode a JWT and return its claims, or raise a 401."""
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except jwt.JWTError:
-        raise credentials_exception
-        
-    user = db.query(User).filter(User.username == username).first()
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    # OAuth states are signed with the same key but are not access tokens
+    if "purpose" in payload:
+        raise _credentials_exception()
+    return payload
+
+def _check_active(user: CachedUser) -> CachedUser:
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
+        )
+    return user
+
+def _remember(token: str, payload: Dict[str, Any], user: Optional[User]) -> CachedUser:
+    """Cache the user a freshly decoded token belongs to."""
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    principal = CachedUser.from_user(user)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> CachedUser:
+    """
+    Validate token and return current user.
     
-    return user
+    Args:
+        token: JWT token from request
+        db: Database session
+        
+    Returns:
+        Snapshot of the authenticated user
+        
+    Raises:
+        HTTPException: If token is invalid, user not found or inactive
+    """
+    principal = principal_cache.get(token)
+    if principal is None:
+        payload = _decode_token(token)
+        if "uid" in payload:
+            user = db.get(User, payload["uid"])
+        else:
+            # Tokens issued before the uid claim only carry the username
+            user = db.query(User).filter(User.username == payload["sub"]).first()
+        principal = _remember(token, payload, user)
+
+    return _check_active(principal)
+
+async def get_async_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> CachedUser:
+    """
+    Async version of get_current_user.
+
+    Shares the request's database session, so authentication does not
+    check out a second pooled connection, and skips the database entirely
+    while the token is in the principal cache.
+    """
+    principal = principal_cache.get(token)
+    if principal is None:
+        payload = _decode_token(token)
+        if "uid" in payload:
+            user = await db.get(User, payload["uid"])
+        else:
+            user = await db.scalar(select(User).where(User.username == payload["sub"]))
+        principal = _remember(token, payload, user)
+
+    return _check_active(principal)
 
 def validate_spotify_credentials() -> bool:
     """
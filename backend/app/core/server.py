@@ -0,0 +1,55 @@
+"""Worker sizing and the gunicorn worker class for the production server.
+
+``gunicorn.conf.py`` runs ``app.main:app`` under gunicorn with
+``AppWorker``, uvicorn's gunicorn worker. Uvicorn picks uvloop and
+httptools when they are installed and falls back to asyncio and h11.
+"""
+import math
+import os
+from typing import Optional
+
+from uvicorn_worker import UvicornWorker
+
+# Time kept back from the graceful timeout for the lifespan shutdown hooks
+SHUTDOWN_HOOK_SECONDS = 5
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by a cgroup v2 quota, such as ``docker run --cpus``."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return int(quota) / int(period)
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, honouring affinity and container limits."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+class AppWorker(UvicornWorker):
+    """
+    Uvicorn worker that stops draining requests in time for cleanup.
+
+    The gunicorn master kills a worker once ``graceful_timeout`` has
+    passed since it was asked to stop. Uvicorn would otherwise wait for
+    in-flight requests without a limit, so a slow request could use up
+    the whole budget and the shutdown hooks would never run.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(
+            1, self.cfg.graceful_timeout - SHUTDOWN_HOOK_SECONDS
+        )
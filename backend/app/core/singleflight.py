@@ -0,0 +1,57 @@
+"""Share one in-flight call per key between concurrent callers.
+
+The call runs in a task of its own rather than in the first caller, and
+every caller, the first included, waits on it through ``asyncio.shield``.
+A caller that is cancelled (a client disconnect, a ``wait_for`` timeout)
+therefore only stops waiting; the others still get the result. The call
+itself is cancelled once nobody is waiting for it any more.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls with the same key."""
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of ``call()``, or of an identical call in flight."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0:
+                if not flight.task.done():
+                    # Every caller gave up; later callers start a fresh call
+                    self._forget(key, flight)
+                    flight.task.cancel()
+                elif not flight.task.cancelled():
+                    # Mark the exception as retrieved when nobody else was waiting
+                    flight.task.exception()
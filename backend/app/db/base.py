@@ -4,6 +4,7 @@ before creating the tables.
 """
 from app.db.session import Base
 
-from app.models.mood import Mood, MoodTransition
-from app.models.spotify import SpotifyPlaylist
+from app.models.mood import Mood, MoodTransition, MoodTransitionStat
+from app.models.spotify import PlaylistJob, SpotifyPlaylist, SpotifyToken
+from app.models.track import MoodTrack
 from app.models.user import User
\ No newline at end of file
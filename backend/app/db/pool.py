@@ -0,0 +1,64 @@
+"""Connection pool classes that record checkout statistics."""
+import time
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.metrics import Counter, Histogram
+
+
+class PoolStats:
+    """Checkout counters and wait-time histogram for one pool."""
+
+    def __init__(self) -> None:
+        self.checkouts = Counter()
+        self.timeouts = Counter()
+        self.wait_time = Histogram()
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+                timeout=pool.timeout(),
+            )
+        stats.update(
+            checkouts=self.checkouts.value,
+            timeouts=self.timeouts.value,
+            wait_seconds=self.wait_time.snapshot(),
+        )
+        return stats
+
+
+class _WaitTimingMixin:
+    """Times how long each checkout takes to obtain a connection."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts.inc()
+            raise
+        finally:
+            self.stats.wait_time.observe(time.perf_counter() - start)
+        self.stats.checkouts.inc()
+        return connection
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    """QueuePool for the sync engine."""
+
+    stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool for the asyncio engine."""
+
+    stats = PoolStats()
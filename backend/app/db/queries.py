@@ -0,0 +1,64 @@
+"""
+Reusable query builders.
+
+Listing endpoints build their statements here so that related rows are
+loaded in the same round trip, keeping each call to a constant number of
+SQL statements regardless of page size.
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.orm import joinedload
+
+from app.models.mood import MoodTransition, MoodTransitionStat
+from app.models.spotify import SpotifyPlaylist
+
+
+def transitions_with_moods() -> Select:
+    """Select transitions with both moods joined into the same query."""
+    return select(MoodTransition).options(
+        joinedload(MoodTransition.initial_mood),
+        joinedload(MoodTransition.target_mood),
+    )
+
+
+def user_transitions(
+    user_id: int,
+    before: Optional[Tuple[datetime, int]] = None
+) -> Select:
+    """Select a user's transitions with moods, newest first.
+
+    ``before`` is a (timestamp, id) keyset position; only rows strictly
+    older than it are returned. Ties on timestamp are broken by id so the
+    order is total and pages never skip or repeat rows.
+    """
+    query = (
+        transitions_with_moods()
+        .where(MoodTransition.user_id == user_id)
+        .order_by(MoodTransition.timestamp.desc(), MoodTransition.id.desc())
+    )
+    if before is not None:
+        query = query.where(
+            tuple_(MoodTransition.timestamp, MoodTransition.id) < tuple_(*before)
+        )
+    return query
+
+
+def common_transitions(user_id: int, limit: int) -> Select:
+    """Select a user's most frequent mood pairs from the maintained aggregates."""
+    return (
+        select(MoodTransitionStat)
+        .where(MoodTransitionStat.user_id == user_id)
+        .order_by(MoodTransitionStat.count.desc(), MoodTransitionStat.last_seen.desc())
+        .limit(limit)
+    )
+
+
+def playlists_version() -> Select:
+    """Select a fingerprint of the playlist records: (rows, highest id, latest created_at)."""
+    return select(
+        func.count(),
+        func.max(SpotifyPlaylist.id),
+        func.max(SpotifyPlaylist.created_at),
+    )
@@ -0,0 +1,62 @@
+"""
+Count the SQL statements an engine executes.
+
+Used to pin endpoints to a constant number of queries::
+
+    with assert_max_queries(2):
+        client.get("/api/v1/transitions/?limit=100", headers=auth)
+"""
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db.session import async_engine, engine
+
+
+class QueryCounter:
+    """Statements captured while a count_queries block is active."""
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+def _default_engines() -> List[Engine]:
+    engines = [engine]
+    if async_engine is not None:
+        engines.append(async_engine.sync_engine)
+    return engines
+
+
+@contextmanager
+def count_queries(engines: Optional[List[Engine]] = None) -> Iterator[QueryCounter]:
+    """Record every statement executed on the given (default: app) engines."""
+    counter = QueryCounter()
+    engines = engines or _default_engines()
+    for target in engines:
+        event.listen(target, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", counter)
+
+
+@contextmanager
+def assert_max_queries(expected: int, engines: Optional[List[Engine]] = None) -> Iterator[QueryCounter]:
+    """Fail with the captured statements if more than ``expected`` ran."""
+    with count_queries(engines) as counter:
+        yield counter
+    if counter.count > expected:
+        statements = "\n".join(f"  {s}" for s in counter.statements)
+        raise AssertionError(
+            f"Expected at most {expected} queries, {counter.count} ran:\n{statements}"
+        )
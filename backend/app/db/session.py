@@ -1,15 +1,63 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Generator, Optional, Sequence
+
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
+
 from app.core.config import settings
+from app.core.instrumentation import instrumentation
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+
+def engine_options(url: str, poolclass: type) -> Dict[str, Any]:
+    """Engine keyword arguments built from the DB_* pool settings."""
+    options: Dict[str, Any] = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "echo": settings.DB_ECHO,
+    }
+
+    # In-memory SQLite needs its single shared connection, not a queue pool
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_use_lifo=settings.DB_POOL_USE_LIFO,
+    )
+    return options
+
+
+def instrument_engine(target: Engine) -> None:
+    """Report the duration of every statement ``target`` executes."""
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._instrument_start = time.perf_counter()
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        instrumentation.record_sql(time.perf_counter() - context._instrument_start)
 
 
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.DEBUG,
+    **engine_options(settings.DATABASE_URL, InstrumentedQueuePool),
 )
 
 
+instrument_engine(engine)
+
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -17,4 +65,142 @@ SessionLocal = sessionmaker(
 )
 
 
-Base = declarative_base()
\ No newline at end of file
+# Async drivers to use for each sync URL scheme
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def make_async_url(url: str) -> str:
+    """Translate a sync database URL into its asyncio driver equivalent."""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DATABASE_ASYNC:
+    async_database_url = settings.ASYNC_DATABASE_URL or make_async_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(
+        async_database_url,
+        **engine_options(async_database_url, InstrumentedAsyncQueuePool),
+    )
+
+    instrument_engine(async_engine.sync_engine)
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+class ThreadedSession:
+    """
+    Awaitable facade over a sync Session.
+
+    Implements the subset of the AsyncSession API the routers use, running
+    every blocking call in the threadpool. This lets the same handler code
+    run on either engine while keeping the event loop free in both modes.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.sync_session = session
+        # A cancelled await leaves its call running in the threadpool; the
+        # lock keeps later calls, such as close(), from overlapping with it
+        self._lock = threading.Lock()
+
+    async def _run(self, method, *args, **kwargs):
+        def locked():
+            with self._lock:
+                return method(*args, **kwargs)
+
+        return await run_in_threadpool(locked)
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Sequence[Any]) -> None:
+        self.sync_session.add_all(instances)
+
+    def get_bind(self, *args, **kwargs):
+        return self.sync_session.get_bind(*args, **kwargs)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await self._run(self.sync_session.execute, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await self._run(self.sync_session.scalars, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await self._run(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await self._run(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        await self._run(self.sync_session.delete, instance)
+
+    async def refresh(self, instance: Any, attribute_names: Optional[Sequence[str]] = None) -> None:
+        await self._run(self.sync_session.refresh, instance, attribute_names)
+
+    async def flush(self) -> None:
+        await self._run(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await self._run(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await self._run(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await self._run(self.sync_session.close)
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    """
+    Open an awaitable session outside of a request.
+
+    Yields an AsyncSession when DATABASE_ASYNC is enabled, otherwise a
+    ThreadedSession over a regular session.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedSession(SessionLocal(expire_on_commit=False))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def get_db() -> Generator[Session, None, None]:
+    """
+    Dependency for getting database session.
+    Creates a new SQLAlchemy session and ensures it's closed after use.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting an awaitable database session.
+    Uses the asyncio engine when DATABASE_ASYNC is enabled, otherwise wraps
+    a regular session so its blocking calls run in the threadpool.
+    """
+    async with async_session_scope() as db:
+        yield db
+
+
+Base = declarative_base()
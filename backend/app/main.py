@@ -1,11 +1,23 @@
 import os
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
 from app.core.config import settings
-from app.db.session import engine
+from app.core.instrumentation import InstrumentationMiddleware, instrumentation
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE
+from app.core.profiling import ProfilingMiddleware, profiler
+from app.db.session import async_session_scope, engine
 from app.db import base  # Import to register all models with SQLAlchemy
+from app.services.health import health_checker
+from app.services.mood_cache import mood_cache
+from app.services.password_hasher import password_hasher
+from app.services.playlist_jobs import playlist_jobs
+from app.services.spotify_client import close_http_client
+from app.services.spotify_tokens import spotify_tokens
+from app.services.track_cache import track_cache
+from app.services.track_pools import track_pool_refresher
 
 # Configure logging
 logging.basicConfig(
@@ -28,9 +40,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "X-Profile-Id"],
 )
 
-from app.api.endpoints import mood, transitions, spotify, auth
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, exclude_prefix=f"{settings.API_V1_STR}/profiling")
+
+# Outermost, so its timings cover every other middleware
+if settings.INSTRUMENTATION_ENABLED:
+    app.add_middleware(InstrumentationMiddleware)
+
+from app.api.endpoints import mood, transitions, spotify, auth, metrics, profiling
 
 # Include routers
 app.include_router(
@@ -53,6 +73,16 @@ app.include_router(
     prefix=f"{settings.API_V1_STR}/spotify",
     tags=["spotify"],
 )
+app.include_router(
+    metrics.router,
+    prefix=f"{settings.API_V1_STR}/metrics",
+    tags=["metrics"],
+)
+app.include_router(
+    profiling.router,
+    prefix=f"{settings.API_V1_STR}/profiling",
+    tags=["profiling"],
+)
 
 # Startup and shutdown events
 @app.on_event("startup")
@@ -74,6 +104,19 @@ async def startup_db_client():
         except Exception as e:
             logger.error(f"Error creating database tables: {e}")
     
+    try:
+        async with async_session_scope() as db:
+            await mood_cache.load(db)
+    except Exception as e:
+        logger.error(f"Error loading mood catalog cache: {e}")
+    await mood_cache.start_listener()
+    if settings.TRACK_POOL_REFRESH_ENABLED:
+        track_pool_refresher.start()
+    await playlist_jobs.start()
+    if settings.PROFILING_ENABLED:
+        profiler.start()
+    health_checker.start()
+
     required_env_vars = ["DATABASE_URL"]
     if settings.SPOTIFY_CLIENT_ID:
         logger.info("Spotify integration enabled")
@@ -86,7 +129,16 @@ async def shutdown_db_client():
     Perform cleanup when the container is stopped.
     """
     logger.info("Shutting down application")
-    # Any cleanup needed for container shutdown
+    # Fail readiness first so load balancers stop sending new requests
+    await health_checker.stop()
+    await playlist_jobs.stop()
+    await track_pool_refresher.stop()
+    await mood_cache.stop_listener()
+    await track_cache.close()
+    await spotify_tokens.close()
+    await close_http_client()
+    password_hasher.shutdown()
+    profiler.stop()
 
 # Root endpoint
 @app.get("/", tags=["root"])
@@ -101,24 +153,34 @@ async def root():
         "container_id": os.environ.get("HOSTNAME", "unknown"),
     }
 
-# Health check endpoint for container orchestration
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Request latency by route with SQL and Spotify breakdowns, in the
+    Prometheus text format.
+    """
+    return Response(content=instrumentation.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+# Health check endpoints for container orchestration
 @app.get("/health", tags=["health"])
-async def health_check():
+@app.get("/health/live", tags=["health"])
+async def liveness():
     """
-    Health check endpoint for Docker health checks and monitoring.
+    Liveness probe: the worker is up and its event loop is responsive.
+    Does no I/O, so it is safe to probe as often as needed.
     """
-    # Add any health checks needed by Docker or orchestration tools
-    try:
-        # Check database connection
-        with engine.connect() as connection:
-            connection.execute("SELECT 1")
-        db_status = "connected"
-    except Exception as e:
-        logger.error(f"Database health check failed: {e}")
-        db_status = "disconnected"
-    
-    return {
-        "status": "healthy" if db_status == "connected" else "unhealthy",
-        "database": db_status,
-        "api_version": "1.0.0",
-    }
\ No newline at end of file
+    return {"status": "alive", "api_version": "1.0.0"}
+
+@app.get("/health/ready", tags=["health"])
+async def readiness():
+    """
+    Readiness probe: serves the latest background health report and
+    answers 503 while the database is unreachable, the report is stale,
+    or the worker is starting up or shutting down.
+    """
+    ready, report = health_checker.readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=report,
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -50,6 +50,10 @@ class MoodTransition(Base):
         timestamp: Timestamp of the transition
     """
     __tablename__ = "mood_transitions"
+    __table_args__ = (
+        # Serves per-user history pages ordered by (timestamp, id)
+        Index("ix_mood_transitions_user_id_timestamp_id", "user_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     initial_mood_id = Column(Integer, ForeignKey("moods.id"))
@@ -74,3 +78,31 @@ class MoodTransition(Base):
 
     def __repr__(self):
         return f"<MoodTransition(id={self.id}, initial_mood_id={self.initial_mood_id}, target_mood_id={self.target_mood_id}, timestamp='{self.timestamp}')>"
+
+
+class MoodTransitionStat(Base):
+    """
+    Model for per-user transition counts, maintained incrementally as
+    transitions are recorded and deleted.
+
+    Attributes:
+        user_id: Foreign key to the user the counts belong to
+        initial_mood_id: Foreign key to the initial mood
+        target_mood_id: Foreign key to the target mood
+        count: Number of recorded transitions for this mood pair
+        last_seen: Timestamp of the most recent transition for this pair
+    """
+    __tablename__ = "mood_transition_stats"
+    __table_args__ = (
+        # Serves the per-user "most common transitions" lookup
+        Index("ix_mood_transition_stats_user_id_count", "user_id", "count"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    initial_mood_id = Column(Integer, ForeignKey("moods.id", ondelete="CASCADE"), primary_key=True)
+    target_mood_id = Column(Integer, ForeignKey("moods.id", ondelete="CASCADE"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    last_seen = Column(DateTime)
+
+    def __repr__(self):
+        return f"<MoodTransitionStat(user_id={self.user_id}, initial_mood_id={self.initial_mood_id}, target_mood_id={self.target_mood_id}, count={self.count})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -36,4 +36,70 @@ class SpotifyPlaylist(Base):
     )
 
     def __repr__(self):
-        return f"<SpotifyPlaylist(id={self.id}, spotify_id='{self.spotify_id}'>"
\ No newline at end of file
+        return f"<SpotifyPlaylist(id={self.id}, spotify_id='{self.spotify_id}'>"
+
+
+class PlaylistJob(Base):
+    """
+    Model for background playlist creation jobs.
+
+    Attributes:
+        id: Random job ID handed to the client
+        user_id: Foreign key to the user who submitted the job
+        transition_id: Foreign key to the mood transition the playlist is for
+        status: queued, running, succeeded or failed
+        stage: Name of the stage the job is in (or finished in)
+        stages: List of {name, started_at, finished_at} for each stage reached
+        version: Incremented on every update, used by long-polling clients
+        error: Failure message for failed jobs
+        playlist_id: Foreign key to the playlist record once it is saved
+        playlist_url: Public URL of the created playlist
+        track_count: Number of tracks added to the playlist
+        created_at: When the job was submitted
+        updated_at: When the job last changed
+    """
+    __tablename__ = "playlist_jobs"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    transition_id = Column(Integer, ForeignKey("mood_transitions.id", ondelete="SET NULL"))
+    status = Column(String, nullable=False)
+    stage = Column(String, nullable=False)
+    stages = Column(JSON, nullable=False, default=list)
+    version = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    playlist_id = Column(Integer, ForeignKey("spotify_playlists.id", ondelete="SET NULL"))
+    playlist_url = Column(String)
+    track_count = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    playlist = relationship("SpotifyPlaylist")
+
+    def __repr__(self):
+        return f"<PlaylistJob(id='{self.id}', status='{self.status}', stage='{self.stage}')>"
+
+
+class SpotifyToken(Base):
+    """
+    Model for the Spotify OAuth tokens of each user.
+
+    Attributes:
+        user_id: Foreign key to the user the tokens belong to
+        access_token: Current Spotify access token
+        refresh_token: Token used to obtain a new access token
+        expires_at: When the access token expires (UTC)
+        scope: Scopes the user granted
+        updated_at: When the tokens were last stored or refreshed
+    """
+    __tablename__ = "spotify_tokens"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    access_token = Column(String, nullable=False)
+    refresh_token = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    scope = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<SpotifyToken(user_id={self.user_id}, expires_at='{self.expires_at}')>"
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint
+from datetime import datetime
+
+from app.db.session import Base
+
+
+class MoodTrack(Base):
+    """
+    Model for the precomputed candidate track pool of a mood, refreshed
+    periodically by the track pool worker.
+
+    Attributes:
+        id: Primary key
+        mood_name: Name of the mood whose pool this track belongs to
+        spotify_uri: Spotify URI of the track
+        energy: Spotify audio feature, 0.0 - 1.0
+        valence: Spotify audio feature, 0.0 - 1.0
+        tempo: Spotify audio feature, beats per minute
+        danceability: Spotify audio feature, 0.0 - 1.0
+        duration_ms: Track length in milliseconds
+        fetched_at: When the pool containing this track was built
+    """
+    __tablename__ = "mood_tracks"
+    __table_args__ = (
+        UniqueConstraint("mood_name", "spotify_uri", name="uq_mood_tracks_mood_name_spotify_uri"),
+        # Serves "fresh pool for this mood" lookups
+        Index("ix_mood_tracks_mood_name_fetched_at", "mood_name", "fetched_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    mood_name = Column(String, nullable=False)
+    spotify_uri = Column(String, nullable=False)
+    energy = Column(Float, nullable=False)
+    valence = Column(Float, nullable=False)
+    tempo = Column(Float)
+    danceability = Column(Float)
+    duration_ms = Column(Integer)
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<MoodTrack(id={self.id}, mood_name='{self.mood_name}', spotify_uri='{self.spotify_uri}')>"
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, AnyHttpUrl
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 
 class PlaylistRequest(BaseModel):
@@ -8,6 +8,23 @@ class PlaylistRequest(BaseModel):
     initial_mood_id: int = Field(..., title="ID of the initial mood")
     target_mood_id: int = Field(..., title="ID of the target mood")
     transition_id: int = Field(..., title="ID of the mood transition")
+    curve: Optional[Literal["linear", "ease-in-out", "overshoot"]] = Field(
+        None, description="Shape of the path from the initial to the target mood"
+    )
+    waypoints: Optional[int] = Field(
+        None, ge=2, le=20, description="Number of steps along the transition path"
+    )
+    target_duration_minutes: Optional[int] = Field(
+        None, ge=5, le=1440, description="Approximate playlist length in minutes"
+    )
+
+    @property
+    def uses_waypoints(self) -> bool:
+        """Whether any multi-step transition option was given."""
+        return any(
+            value is not None
+            for value in (self.curve, self.waypoints, self.target_duration_minutes)
+        )
 
 
 class PlaylistBase(BaseModel):
@@ -22,16 +39,50 @@ class PlaylistCreate(PlaylistBase):
     pass
 
 
+class PlaylistChunkTiming(BaseModel):
+    """Schema for the timing of one add-items call."""
+    chunk: int = Field(..., description="Position of the chunk in the playlist, from 0")
+    tracks: int = Field(..., description="Number of tracks in the chunk")
+    seconds: float = Field(..., description="Time taken to add the chunk")
+
+
 class PlaylistResponse(PlaylistBase):
     """Schema for Spotify playlist responses."""
     id: int = Field(..., description="Unique identifier for the playlist record")
     created_at: datetime = Field(..., description="When the playlist was created")
     track_count: Optional[int] = Field(None, description="Number of tracks in the playlist")
+    add_items_chunks: Optional[List[PlaylistChunkTiming]] = Field(
+        None, description="Timing of each batch of tracks added to the playlist"
+    )
 
     class Config:
         orm_mode = True
 
 
+class PlaylistJobStage(BaseModel):
+    """Schema for one stage of a playlist creation job."""
+    name: str = Field(..., description="Stage name")
+    started_at: datetime = Field(..., description="When the stage started")
+    finished_at: Optional[datetime] = Field(None, description="When the stage finished")
+
+
+class PlaylistJobResponse(BaseModel):
+    """Schema for playlist creation job status responses."""
+    job_id: str = Field(..., description="Unique identifier for the job")
+    transition_id: Optional[int] = Field(None, description="Id of the associated mood transition")
+    status: Literal["queued", "running", "succeeded", "failed"] = Field(..., description="Job status")
+    stage: str = Field(..., description="Stage the job is in, or finished in")
+    progress: float = Field(..., description="Fraction of stages completed, 0.0 - 1.0")
+    stages: List[PlaylistJobStage] = Field(..., description="Timing of every stage reached so far")
+    version: int = Field(..., description="Incremented on every change; pass as 'after' to long-poll")
+    error: Optional[str] = Field(None, description="Failure reason for failed jobs")
+    playlist_id: Optional[int] = Field(None, description="Playlist record created by the job")
+    playlist_url: Optional[AnyHttpUrl] = Field(None, description="Public URL of the created playlist")
+    track_count: Optional[int] = Field(None, description="Number of tracks in the playlist")
+    created_at: datetime = Field(..., description="When the job was submitted")
+    updated_at: datetime = Field(..., description="When the job last changed")
+
+
 class UserProfile(BaseModel):
     """Schema for Spotify user profile data."""
     success: bool = Field(..., description="Whether the request was successful")
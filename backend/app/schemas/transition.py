@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from app.schemas.mood import MoodResponse
 
@@ -44,4 +44,30 @@ class TransitionStats(BaseModel):
     """Schema for transition statistics."""
     initial_mood: MoodResponse
     target_mood: MoodResponse
-    count: int = Field(..., description="Number of times this transition has occurred")
\ No newline at end of file
+    count: int = Field(..., description="Number of times this transition has occurred")
+
+class TransitionBatchItem(TransitionBase):
+    """Schema for one transition in a batch upload."""
+    timestamp: Optional[datetime] = Field(
+        None, description="When the transition happened; defaults to the time of upload"
+    )
+
+
+class TransitionBatchCreate(BaseModel):
+    """Schema for recording many mood transitions at once."""
+    items: List[TransitionBatchItem] = Field(..., description="Transitions to record, in order")
+
+
+class TransitionBatchItemResult(BaseModel):
+    """Schema for the outcome of one batch item."""
+    index: int = Field(..., description="Position of the item in the request")
+    status: str = Field(..., description="'created' or 'error'")
+    id: Optional[int] = Field(None, description="ID of the created transition")
+    detail: Optional[str] = Field(None, description="Why the item was rejected")
+
+
+class TransitionBatchResponse(BaseModel):
+    """Schema for batch upload responses."""
+    created: int = Field(..., description="Number of transitions recorded")
+    failed: int = Field(..., description="Number of items rejected")
+    results: List[TransitionBatchItemResult]
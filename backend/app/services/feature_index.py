@@ -0,0 +1,291 @@
+"""Nearest-neighbour index over the audio features of pooled tracks.
+
+Every track in the precomputed mood pools becomes a point in a small
+feature space (energy, valence, tempo, danceability). The points are held
+as one contiguous float32 matrix, 16 bytes per track, so an index over
+every pooled track fits comfortably in each worker. A transition's
+middle section is then picked locally by walking a straight path from
+the initial mood's point to the target mood's point and taking the
+nearest unused track at each step, instead of asking Spotify for
+recommendations.
+
+The index is rebuilt from ``mood_tracks`` after ``TRACK_INDEX_TTL_SECONDS``
+and whenever this process refreshes the pools. When ``TRACK_INDEX_PATH``
+is set, the refresher also writes the index there as a compressed
+``.npz`` file and workers load that file instead of scanning the table,
+unless it is older than ``TRACK_POOL_MAX_AGE_SECONDS``.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.db.session import async_session_scope
+from app.models.track import MoodTrack
+from app.services.mood_features import mood_params
+
+logger = logging.getLogger(__name__)
+
+# Tempo is in beats per minute; scale it into roughly the 0-1 range of the others
+TEMPO_SCALE = 200.0
+# Energy and valence define the mood; tempo and danceability refine it
+FEATURE_WEIGHTS = np.array([1.0, 1.0, 0.5, 0.5], dtype=np.float32)
+# Used for tracks whose tempo, danceability or length is unknown
+NEUTRAL_TEMPO = 100.0
+NEUTRAL_DANCEABILITY = 0.5
+NEUTRAL_DURATION_MS = 210_000
+
+FeatureTuple = Tuple[float, float, Optional[float], Optional[float]]
+
+
+def _to_space(features: np.ndarray) -> np.ndarray:
+    """Map raw (energy, valence, tempo, danceability) rows into index space."""
+    features = np.array(features, dtype=np.float32).reshape(-1, 4)
+    features[:, 2] /= TEMPO_SCALE
+    return features * np.sqrt(FEATURE_WEIGHTS)
+
+
+def mood_point(
+    mood_name: str,
+    energy: Optional[float] = None,
+    valence: Optional[float] = None
+) -> FeatureTuple:
+    """The feature point of a mood, optionally overriding energy and valence."""
+    params = mood_params(mood_name)
+    return (
+        params["target_energy"] if energy is None else energy,
+        params["target_valence"] if valence is None else valence,
+        params["target_tempo"],
+        params["target_danceability"],
+    )
+
+
+class FeatureIndex:
+    """Exact k-nearest-neighbour search over a float32 feature matrix."""
+
+    def __init__(
+        self,
+        uris: Sequence[str],
+        features: np.ndarray,
+        durations: Optional[np.ndarray] = None
+    ) -> None:
+        self.uris = list(uris)
+        self.features = _to_space(features)
+        self._sq_norms = (self.features ** 2).sum(axis=1)
+        if durations is None:
+            durations = np.full(len(self.uris), NEUTRAL_DURATION_MS)
+        self.durations = np.asarray(durations, dtype=np.int32)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, float, float, Optional[float], Optional[float], Optional[int]]]) -> "FeatureIndex":
+        """Build an index from (uri, energy, valence, tempo, danceability, duration_ms) rows."""
+        uris, features, durations = [], [], []
+        for uri, energy, valence, tempo, danceability, duration_ms in rows:
+            uris.append(uri)
+            features.append((
+                energy,
+                valence,
+                NEUTRAL_TEMPO if tempo is None else tempo,
+                NEUTRAL_DANCEABILITY if danceability is None else danceability,
+            ))
+            durations.append(duration_ms or NEUTRAL_DURATION_MS)
+        return cls(uris, np.array(features, dtype=np.float32).reshape(-1, 4), np.array(durations))
+
+    def __len__(self) -> int:
+        return len(self.uris)
+
+    @property
+    def nbytes(self) -> int:
+        return self.features.nbytes + self._sq_norms.nbytes + self.durations.nbytes
+
+    @property
+    def mean_duration_ms(self) -> float:
+        return float(self.durations.mean()) if len(self) else NEUTRAL_DURATION_MS
+
+    def save(self, path: str) -> None:
+        """Write the index to a compressed ``.npz`` file."""
+        raw = self.features / np.sqrt(FEATURE_WEIGHTS)
+        raw[:, 2] *= TEMPO_SCALE
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            uris=np.array(self.uris, dtype=str),
+            features=raw,
+            durations=self.durations
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureIndex":
+        with np.load(path) as data:
+            durations = data["durations"] if "durations" in data.files else None
+            return cls(data["uris"].tolist(), data["features"], durations)
+
+    def query(self, points: Sequence[FeatureTuple], k: int) -> np.ndarray:
+        """Indices of the ``k`` nearest tracks to each point, nearest first.
+
+        All points are answered with one matrix product, so a whole path
+        costs about the same as a single lookup.
+        """
+        k = min(k, len(self))
+        points = _to_space(points)
+        distances = (
+            self._sq_norms[None, :]
+            - 2 * points @ self.features.T
+            + (points ** 2).sum(axis=1)[:, None]
+        )
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+        return np.take_along_axis(nearest, order, axis=1)
+
+    def pick(
+        self,
+        points: Sequence[FeatureTuple],
+        per_point: int = 1,
+        neighbors: Optional[int] = None,
+        exclude: Iterable[str] = ()
+    ) -> List[List[int]]:
+        """Pick ``per_point`` distinct tracks near each point, as row indices.
+
+        Every point is answered by the same single query. Each pick is a
+        random track among the ``neighbors`` nearest ones not yet used by
+        an earlier point (or listed in ``exclude``), so repeated
+        transitions between the same moods vary.
+        """
+        if not len(self) or not len(points):
+            return [[] for _ in points]
+        neighbors = neighbors or settings.TRACK_INDEX_NEIGHBORS
+
+        excluded = set(exclude)
+        nearest = self.query(points, neighbors + per_point * len(points) + len(excluded))
+
+        used = set()
+        picks = []
+        for row in nearest:
+            available = [i for i in row if i not in used and self.uris[i] not in excluded]
+            chosen = random.sample(available[:neighbors + per_point - 1], min(per_point, len(available)))
+            # Keep each point's picks ordered from nearest to farthest
+            chosen.sort(key=available.index)
+            used.update(chosen)
+            picks.append(chosen)
+        return picks
+
+    def path(
+        self,
+        start: FeatureTuple,
+        end: FeatureTuple,
+        steps: int,
+        neighbors: Optional[int] = None,
+        exclude: Iterable[str] = ()
+    ) -> List[str]:
+        """Pick one track per step along the straight path from start to end.
+
+        The endpoints themselves are skipped, since the initial and target
+        sections of the playlist already cover them.
+        """
+        if steps <= 0:
+            return []
+
+        start_point = np.array(start, dtype=np.float32)
+        end_point = np.array(end, dtype=np.float32)
+        t = np.arange(1, steps + 1, dtype=np.float32)[:, None] / (steps + 1)
+        points = start_point + t * (end_point - start_point)
+
+        picks = self.pick(points, 1, neighbors, exclude)
+        return [self.uris[i] for chosen in picks for i in chosen]
+
+
+def _is_fresh_file(path: str) -> bool:
+    """Whether an index file exists and is newer than the pool age limit.
+
+    A file left behind by a refresher that has stopped would otherwise be
+    served forever, long after ``build`` would have dropped its tracks.
+    """
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return False
+    if age >= settings.TRACK_POOL_MAX_AGE_SECONDS:
+        logger.warning(f"Ignoring track feature index {path}: written {age:.0f}s ago")
+        return False
+    return True
+
+
+class FeatureIndexCache:
+    """Lazily built, periodically reloaded process-wide feature index."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._index: Optional[FeatureIndex] = None
+        self._loaded_at: Optional[float] = None
+        self._loading = SingleFlight()
+
+    @property
+    def is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    async def build(self, db: AsyncSession) -> FeatureIndex:
+        """Build an index over every pool that is not stale."""
+        oldest = datetime.utcnow() - timedelta(seconds=settings.TRACK_POOL_MAX_AGE_SECONDS)
+        rows = (await db.execute(
+            select(
+                MoodTrack.spotify_uri,
+                MoodTrack.energy,
+                MoodTrack.valence,
+                MoodTrack.tempo,
+                MoodTrack.danceability,
+                MoodTrack.duration_ms,
+            )
+            .where(MoodTrack.fetched_at >= oldest)
+            .distinct()
+        )).all()
+        return FeatureIndex.from_rows(rows)
+
+    async def load(self, db: AsyncSession) -> None:
+        path = settings.TRACK_INDEX_PATH
+        if path and _is_fresh_file(path):
+            self._index = await asyncio.to_thread(FeatureIndex.load, path)
+        else:
+            self._index = await self.build(db)
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded track feature index: {len(self._index)} tracks")
+
+    async def get(self) -> Optional[FeatureIndex]:
+        """Get the current index, or None if there are no pooled tracks.
+
+        Requests that find the index expired wait for a single shared
+        reload. It runs in its own session, so it is not tied to the
+        request that happened to start it.
+        """
+        if not self.is_fresh:
+            await self._loading.run("index", self._reload)
+        return self._index if self._index else None
+
+    async def _reload(self) -> None:
+        async with async_session_scope() as db:
+            await self.load(db)
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Rebuild from the table and rewrite ``TRACK_INDEX_PATH`` if set."""
+        self._index = await self.build(db)
+        self._loaded_at = time.monotonic()
+        if settings.TRACK_INDEX_PATH:
+            await asyncio.to_thread(self._index.save, settings.TRACK_INDEX_PATH)
+
+    def clear(self) -> None:
+        self._loaded_at = None
+
+
+feature_index = FeatureIndexCache(ttl=settings.TRACK_INDEX_TTL_SECONDS)
@@ -0,0 +1,186 @@
+"""Readiness checks computed in the background and served from memory.
+
+Orchestrators probe often, so the probe endpoints must not do I/O. A
+background task runs the checks every ``HEALTH_CHECK_INTERVAL_SECONDS``,
+each bounded by ``HEALTH_CHECK_TIMEOUT_SECONDS``, and keeps the latest
+report:
+
+- database: a ``SELECT 1`` through the normal session machinery, so it
+  runs on the asyncio engine or in the threadpool, never on the loop.
+- pool: how much of each connection pool is checked out.
+- spotify: whether credentials are configured and whether user token
+  refreshes have failed since the previous check.
+- cache: a ``PING`` to Redis when ``REDIS_URL`` is set.
+
+Only the database decides readiness. The other checks report
+``degraded`` without taking the worker out of rotation, since the app
+keeps serving without them. A report older than
+``HEALTH_MAX_AGE_SECONDS`` counts as not ready, as does a worker that
+is shutting down.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db.session import async_engine, async_session_scope, engine
+from app.services.spotify_tokens import spotify_tokens
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+DEGRADED = "degraded"
+FAILED = "failed"
+DISABLED = "disabled"
+
+
+class HealthChecker:
+    """Background task keeping the latest readiness report."""
+
+    def __init__(self, interval: float, timeout: float, max_age: float) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.max_age = max_age
+        self._task: Optional[asyncio.Task] = None
+        self._report: Optional[Dict[str, Any]] = None
+        self._checked_at: Optional[float] = None
+        self._refresh_errors = spotify_tokens.refresh_errors.value
+        self._redis = None
+        self.shutting_down = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self.shutting_down = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Report not ready from now on and stop checking."""
+        self.shutting_down = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Health check failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _timed(self, name: str, check) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(check(), self.timeout)
+        except asyncio.TimeoutError:
+            result = {"status": FAILED, "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            logger.warning(f"Health check {name} failed: {e}")
+            result = {"status": FAILED, "error": str(e)}
+        result["seconds"] = round(time.perf_counter() - start, 4)
+        return result
+
+    async def _check_database(self) -> Dict[str, Any]:
+        async with async_session_scope() as db:
+            await db.execute(text("SELECT 1"))
+        return {"status": OK}
+
+    async def _check_pools(self) -> Dict[str, Any]:
+        pools = {"sync": engine.pool}
+        if async_engine is not None:
+            pools["async"] = async_engine.pool
+
+        result: Dict[str, Any] = {"status": OK}
+        for name, pool in pools.items():
+            if not isinstance(pool, QueuePool):
+                result[name] = {"pool_class": type(pool).__name__}
+                continue
+            result[name] = {"checked_out": pool.checkedout()}
+            if settings.DB_MAX_OVERFLOW < 0:
+                # Unbounded overflow never saturates
+                continue
+            capacity = pool.size() + settings.DB_MAX_OVERFLOW
+            saturation = pool.checkedout() / capacity
+            result[name].update(capacity=capacity, saturation=round(saturation, 3))
+            if saturation >= settings.HEALTH_POOL_SATURATION_THRESHOLD:
+                result["status"] = DEGRADED
+        return result
+
+    async def _check_spotify(self) -> Dict[str, Any]:
+        if not settings.SPOTIFY_CLIENT_ID or not settings.SPOTIFY_CLIENT_SECRET:
+            return {"status": DISABLED}
+        freshness = spotify_tokens.freshness()
+        new_errors = freshness["refresh_errors"] - self._refresh_errors
+        self._refresh_errors = freshness["refresh_errors"]
+        return {
+            "status": DEGRADED if new_errors else OK,
+            "refresh_errors_since_last_check": new_errors,
+            **freshness,
+        }
+
+    async def _check_cache(self) -> Dict[str, Any]:
+        if not settings.REDIS_URL:
+            return {"status": DISABLED}
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(settings.REDIS_URL)
+        await self._redis.ping()
+        return {"status": OK}
+
+    async def check(self) -> Dict[str, Any]:
+        """Run every check concurrently and keep the report."""
+        probes = {
+            "database": self._check_database,
+            "pool": self._check_pools,
+            "spotify": self._check_spotify,
+            "cache": self._check_cache,
+        }
+        results = await asyncio.gather(*(self._timed(name, probe) for name, probe in probes.items()))
+        checks = dict(zip(probes, results))
+
+        self._report = {
+            "checked_at": datetime.utcnow().isoformat(),
+            "checks": checks,
+        }
+        self._checked_at = time.monotonic()
+        return self._report
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """Whether the worker should receive traffic, with the latest report."""
+        if self.shutting_down:
+            return False, {"status": "shutting down"}
+        if self._report is None:
+            return False, {"status": "starting"}
+
+        age = time.monotonic() - self._checked_at
+        checks = self._report["checks"]
+        ready = checks["database"]["status"] == OK and age <= self.max_age
+        if not ready:
+            status = "unready"
+        elif any(check["status"] in (DEGRADED, FAILED) for check in checks.values()):
+            status = DEGRADED
+        else:
+            status = OK
+        return ready, {"status": status, "age_seconds": round(age, 2), **self._report}
+
+
+health_checker = HealthChecker(
+    interval=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+    timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+    max_age=settings.HEALTH_MAX_AGE_SECONDS,
+)
@@ -0,0 +1,146 @@
+"""Process-local cache of the mood catalog.
+
+The ``moods`` table is a tiny, nearly static catalog, so every worker
+keeps a copy in memory keyed by id and by name. The cache is loaded at
+startup, reloaded after ``MOOD_CACHE_TTL_SECONDS`` as a safety net, and
+invalidated by the mood endpoints whenever the catalog changes. When
+``REDIS_URL`` is set, invalidations are also broadcast over a Redis
+pub/sub channel so that every worker drops its copy.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.mood import Mood
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedMood:
+    """Immutable snapshot of a mood row."""
+    id: int
+    name: str
+    color: str
+
+
+class MoodCache:
+    """In-memory mood catalog keyed by id and by name."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._by_id: Dict[int, CachedMood] = {}
+        self._by_name: Dict[str, CachedMood] = {}
+        self._loaded_at: Optional[float] = None
+        self._version = ""
+        # Identifies this process so it can ignore its own broadcasts
+        self._instance_id = uuid.uuid4().hex
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    async def load(self, db: AsyncSession) -> None:
+        """Replace the cached catalog with the current table contents."""
+        moods = (await db.scalars(select(Mood).order_by(Mood.id))).all()
+        snapshot = [CachedMood(id=m.id, name=m.name, color=m.color) for m in moods]
+        self._by_id = {mood.id: mood for mood in snapshot}
+        self._by_name = {mood.name: mood for mood in snapshot}
+        # A content hash, so every worker reports the same version for the same catalog
+        self._version = hashlib.sha1(
+            "\n".join(f"{m.id}|{m.name}|{m.color}" for m in snapshot).encode()
+        ).hexdigest()[:16]
+        self._loaded_at = time.monotonic()
+
+    async def _ensure_loaded(self, db: AsyncSession) -> None:
+        if not self.is_fresh:
+            await self.load(db)
+
+    async def all(self, db: AsyncSession) -> List[CachedMood]:
+        """Get every mood, ordered by id."""
+        await self._ensure_loaded(db)
+        return list(self._by_id.values())
+
+    async def version(self, db: AsyncSession) -> str:
+        """Get a hash of the current catalog, which changes whenever it does."""
+        await self._ensure_loaded(db)
+        return self._version
+
+    async def get(self, db: AsyncSession, mood_id: int) -> Optional[CachedMood]:
+        """Get a mood by id, or None if it does not exist."""
+        await self._ensure_loaded(db)
+        return self._by_id.get(mood_id)
+
+    async def get_by_name(self, db: AsyncSession, name: str) -> Optional[CachedMood]:
+        """Get a mood by its exact name, or None if it does not exist."""
+        await self._ensure_loaded(db)
+        return self._by_name.get(name)
+
+    def clear(self) -> None:
+        """Drop the local copy; the next read reloads it."""
+        self._loaded_at = None
+
+    async def invalidate(self) -> None:
+        """Drop the local copy and tell the other workers to drop theirs."""
+        self.clear()
+        if self._redis is not None:
+            try:
+                await self._redis.publish(settings.MOOD_CACHE_CHANNEL, self._instance_id)
+            except Exception as e:
+                logger.warning(f"Could not broadcast mood cache invalidation: {e}")
+
+    async def start_listener(self) -> None:
+        """Subscribe to cross-worker invalidations if REDIS_URL is set."""
+        if not settings.REDIS_URL or self._listener is not None:
+            return
+
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(settings.REDIS_URL)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                await pubsub.subscribe(settings.MOOD_CACHE_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    if message["data"].decode() != self._instance_id:
+                        self.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Mood cache invalidation listener error: {e}")
+                # Anything may have changed while we were disconnected
+                self.clear()
+                await asyncio.sleep(5)
+
+    async def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+mood_cache = MoodCache(ttl=settings.MOOD_CACHE_TTL_SECONDS)
@@ -0,0 +1,24 @@
+"""Target audio features and search genres for each mood."""
+from typing import Any, Dict
+
+MOOD_FEATURES = {
+    "Angry": {"target_energy": 0.8, "target_valence": 0.2,
+            "target_tempo": 140.0, "target_danceability": 0.5,
+            "genres": ["metal", "punk", "hard-rock", "rage", "intense", "heavy"]},
+    "Happy": {"target_energy": 0.7, "target_valence": 0.8,
+            "target_tempo": 120.0, "target_danceability": 0.75,
+            "genres": ["pop", "dance", "happy", "upbeat", "feel-good", "cheerful"]},
+    "Sad": {"target_energy": 0.4, "target_valence": 0.2,
+        "target_tempo": 80.0, "target_danceability": 0.35,
+        "genres": ["sad", "indie", "chill", "melancholy", "acoustic", "blues"]},
+    "Indifferent": {"target_energy": 0.5, "target_valence": 0.5,
+                "target_tempo": 100.0, "target_danceability": 0.5,
+                "genres": ["ambient", "study", "focus", "background", "neutral", "calm"]}
+}
+
+FALLBACK_GENRES = ["electronic", "indie", "alternative"]
+
+
+def mood_params(name: str) -> Dict[str, Any]:
+    """Get the features for a mood, treating unknown moods as Indifferent."""
+    return MOOD_FEATURES.get(name, MOOD_FEATURES["Indifferent"])
@@ -0,0 +1,132 @@
+"""Password hashing off the event loop.
+
+bcrypt is deliberately slow: at the default cost a hash or a check takes
+a few hundred milliseconds of CPU. Run inline in an ``async def`` handler,
+every login stalls all other requests on the worker for that long.
+
+Hashes and checks are instead run on a dedicated thread pool. bcrypt
+releases the GIL while it works, so the pool spreads logins across CPU
+cores while the event loop keeps serving other requests. Work beyond the
+busy threads waits in a bounded queue; once that is full, callers get
+``HashQueueFull`` rather than piling up behind a login storm.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+from app.models.user import pwd_context
+
+
+class HashQueueFull(Exception):
+    """Raised when too many hashes are already waiting for a thread."""
+
+
+class PasswordHasher:
+    """Bounded thread pool for bcrypt hashing and verification."""
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Updated from worker threads and done callbacks
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+
+        self.hashed = Counter()
+        self.verified = Counter()
+        self.rehashed = Counter()
+        self.rejected = Counter()
+        self.queue_wait = Histogram()
+        self.duration = Histogram()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected.inc()
+                raise HashQueueFull()
+            self._pending += 1
+
+        submitted = time.monotonic()
+
+        def call() -> Tuple[float, float, Any]:
+            started = time.monotonic()
+            with self._lock:
+                self._running += 1
+            try:
+                result = fn(*args)
+                return started, time.monotonic(), result
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        def done(_) -> None:
+            # Runs even if the awaiting request was cancelled
+            with self._lock:
+                self._pending -= 1
+
+        future = self._get_executor().submit(call)
+        future.add_done_callback(done)
+        started, finished, result = await asyncio.wrap_future(future)
+
+        self.queue_wait.observe(started - submitted)
+        self.duration.observe(finished - started)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password at the configured cost."""
+        hashed = await self._run(pwd_context.hash, password)
+        self.hashed.inc()
+        return hashed
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password against its stored hash.
+
+        Returns whether it matched and, when the stored hash uses an
+        outdated scheme or cost, a replacement hash to store instead.
+        """
+        valid, new_hash = await self._run(pwd_context.verify_and_update, password, hashed)
+        self.verified.inc()
+        if new_hash is not None:
+            self.rehashed.inc()
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            pending, running = self._pending, self._running
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "bcrypt_rounds": settings.PASSWORD_BCRYPT_ROUNDS,
+            "running": running,
+            "queued": pending - running,
+            "hashed": self.hashed.value,
+            "verified": self.verified.value,
+            "rehashed": self.rehashed.value,
+            "rejected": self.rejected.value,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "duration_seconds": self.duration.snapshot(),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
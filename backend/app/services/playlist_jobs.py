@@ -0,0 +1,360 @@
+"""Background playlist creation jobs.
+
+``POST /spotify/playlist-jobs`` validates the request, stores a job row
+and returns its id straight away. A fixed pool of ``PLAYLIST_JOB_WORKERS``
+asyncio worker tasks takes jobs from a bounded queue and runs them. Each
+stage the job enters is written to the ``playlist_jobs`` table, so any
+API worker can answer status requests.
+
+Clients polling the process that runs the job are woken as soon as it
+changes. Other processes re-read the row every ``POLL_INTERVAL`` seconds.
+Jobs live in the queue of the process that accepted them, so queued jobs
+are lost if that process stops. Unfinished jobs that have not been
+updated for ``PLAYLIST_JOB_STALE_SECONDS`` are reported as failed.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, update
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+from app.db.session import async_session_scope
+from app.models.spotify import PlaylistJob
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["queued", "selecting_tracks", "creating_playlist", "adding_tracks", "saving", "done"]
+ACTIVE_STATUSES = ("queued", "running")
+# Seconds between re-reads when waiting on a job owned by another process
+POLL_INTERVAL = 0.5
+
+ProgressCallback = Callable[[str], Awaitable[None]]
+# A job body reports its stages through the callback and returns the
+# playlist_id, playlist_url and track_count of the saved playlist
+JobFunction = Callable[[ProgressCallback], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def job_snapshot(job: PlaylistJob) -> Dict[str, Any]:
+    """Public view of a stored job row."""
+    status, error = job.status, job.error
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.PLAYLIST_JOB_STALE_SECONDS)
+    if status in ACTIVE_STATUSES and job.updated_at < stale_before:
+        status, error = "failed", "Job was interrupted"
+
+    return _with_progress({
+        "job_id": job.id,
+        "user_id": job.user_id,
+        "transition_id": job.transition_id,
+        "status": status,
+        "stage": job.stage,
+        "stages": list(job.stages or []),
+        "version": job.version,
+        "error": error,
+        "playlist_id": job.playlist_id,
+        "playlist_url": job.playlist_url,
+        "track_count": job.track_count,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    })
+
+
+def _with_progress(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the fraction of stages completed."""
+    if snapshot["status"] == "succeeded":
+        snapshot["progress"] = 1.0
+    else:
+        position = STAGES.index(snapshot["stage"]) if snapshot["stage"] in STAGES else 0
+        snapshot["progress"] = round(position / (len(STAGES) - 1), 2)
+    return snapshot
+
+
+class PlaylistJobManager:
+    """Bounded queue of playlist jobs served by a fixed set of workers."""
+
+    def __init__(self, workers: int, queue_size: int, timeout: float) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._changed: Optional[asyncio.Condition] = None
+        # Jobs accepted by this process, keyed by id
+        self._local: Dict[str, Dict[str, Any]] = {}
+
+        self.submitted = Counter()
+        self.succeeded = Counter()
+        self.failed = Counter()
+        self.rejected = Counter()
+        self.queue_wait = Histogram()
+        self.duration = Histogram()
+        self._running = 0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._changed = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for job_id, snapshot in list(self._local.items()):
+            if snapshot["status"] in ACTIVE_STATUSES:
+                try:
+                    await self._update(job_id, status="failed", error="Server shut down before the job finished")
+                except Exception as e:
+                    logger.warning(f"Could not mark playlist job {job_id} as failed: {e}")
+
+    async def submit(self, user_id: int, transition_id: int, run: JobFunction) -> Dict[str, Any]:
+        """Store and enqueue a job, returning its initial snapshot."""
+        if self._queue is None:
+            raise RuntimeError("Playlist job workers are not running")
+        if self._queue.full():
+            self.rejected.inc()
+            raise JobQueueFull()
+        self._prune()
+
+        now = datetime.utcnow()
+        job_id = uuid.uuid4().hex
+        row = {
+            "id": job_id,
+            "user_id": user_id,
+            "transition_id": transition_id,
+            "status": "queued",
+            "stage": "queued",
+            "stages": [{"name": "queued", "started_at": now.isoformat(), "finished_at": None}],
+            "version": 1,
+            "created_at": now,
+            "updated_at": now,
+        }
+        async with async_session_scope() as db:
+            await db.execute(insert(PlaylistJob), [row])
+            await db.commit()
+
+        snapshot = _with_progress({
+            "job_id": job_id,
+            "user_id": user_id,
+            "transition_id": transition_id,
+            "status": "queued",
+            "stage": "queued",
+            "stages": row["stages"],
+            "version": 1,
+            "error": None,
+            "playlist_id": None,
+            "playlist_url": None,
+            "track_count": None,
+            "created_at": now,
+            "updated_at": now,
+        })
+        self._local[job_id] = snapshot
+        self._queue.put_nowait((job_id, run, time.perf_counter()))
+        self.submitted.inc()
+        return dict(snapshot)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, run, enqueued_at = await self._queue.get()
+            self.queue_wait.observe(time.perf_counter() - enqueued_at)
+            self._running += 1
+            started_at = time.perf_counter()
+            try:
+                await self._run(job_id, run)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Playlist job {job_id} could not record its result: {e}")
+                # The row may be left queued or running; at least stop
+                # reporting the job as active from this process
+                await self._publish(job_id, self._apply(
+                    job_id, status="failed", error="Could not record the job's progress"
+                ))
+            finally:
+                self._running -= 1
+                self.duration.observe(time.perf_counter() - started_at)
+                self._queue.task_done()
+
+    async def _run(self, job_id: str, run: JobFunction) -> None:
+        await self._update(job_id, status="running")
+
+        async def progress(stage: str) -> None:
+            await self._update(job_id, stage=stage)
+
+        try:
+            result = await asyncio.wait_for(run(progress), self.timeout)
+        except asyncio.TimeoutError:
+            self.failed.inc()
+            await self._update(job_id, status="failed", error=f"Timed out after {self.timeout:.0f}s")
+        except Exception as e:
+            self.failed.inc()
+            detail = getattr(e, "detail", None) or str(e) or type(e).__name__
+            await self._update(job_id, status="failed", error=str(detail))
+        else:
+            self.succeeded.inc()
+            await self._update(job_id, status="succeeded", stage="done", **result)
+
+    async def _update(
+        self,
+        job_id: str,
+        status: Optional[str] = None,
+        stage: Optional[str] = None,
+        **fields: Any
+    ) -> None:
+        """Apply a change to a local job, persist it and wake its waiters."""
+        snapshot = self._apply(job_id, status, stage, **fields)
+
+        async with async_session_scope() as db:
+            await db.execute(
+                update(PlaylistJob)
+                .where(PlaylistJob.id == job_id)
+                .values(
+                    status=snapshot["status"],
+                    stage=snapshot["stage"],
+                    stages=snapshot["stages"],
+                    version=snapshot["version"],
+                    error=snapshot["error"],
+                    playlist_id=snapshot["playlist_id"],
+                    playlist_url=snapshot["playlist_url"],
+                    track_count=snapshot["track_count"],
+                    updated_at=snapshot["updated_at"],
+                )
+            )
+            await db.commit()
+
+        await self._publish(job_id, snapshot)
+
+    def _apply(
+        self,
+        job_id: str,
+        status: Optional[str] = None,
+        stage: Optional[str] = None,
+        **fields: Any
+    ) -> Dict[str, Any]:
+        """Return a copy of a local job with a change applied."""
+        snapshot = dict(self._local[job_id])
+        stages = [dict(s) for s in snapshot["stages"]]
+        now = _timestamp()
+
+        if stage is not None and stage != snapshot["stage"]:
+            stages[-1]["finished_at"] = now
+            if stage != "done":
+                stages.append({"name": stage, "started_at": now, "finished_at": None})
+            snapshot["stage"] = stage
+        if status is not None:
+            snapshot["status"] = status
+            if status not in ACTIVE_STATUSES and stages[-1]["finished_at"] is None:
+                stages[-1]["finished_at"] = now
+
+        snapshot.update(fields)
+        snapshot["stages"] = stages
+        snapshot["version"] += 1
+        snapshot["updated_at"] = datetime.utcnow()
+        return _with_progress(snapshot)
+
+    async def _publish(self, job_id: str, snapshot: Dict[str, Any]) -> None:
+        """Replace a local job and wake its waiters."""
+        self._local[job_id] = snapshot
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _prune(self) -> None:
+        """Forget finished local jobs; their rows remain readable."""
+        for job_id, snapshot in list(self._local.items()):
+            if snapshot["status"] not in ACTIVE_STATUSES:
+                del self._local[job_id]
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's current snapshot, or None if it does not exist."""
+        snapshot = self._local.get(job_id)
+        if snapshot is not None:
+            return dict(snapshot)
+        async with async_session_scope() as db:
+            job = await db.get(PlaylistJob, job_id)
+            return job_snapshot(job) if job else None
+
+    async def wait(self, job_id: str, after: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """Long-poll until the job's version exceeds ``after``, it finishes,
+        or ``timeout`` seconds pass; returns the latest snapshot."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+            if job_id in self._local and self._changed is not None:
+                async with self._changed:
+                    snapshot = self._local.get(job_id)
+                    if snapshot is not None:
+                        remaining = deadline - loop.time()
+                        if (snapshot["version"] > after
+                                or snapshot["status"] not in ACTIVE_STATUSES
+                                or remaining <= 0):
+                            return dict(snapshot)
+                        try:
+                            await asyncio.wait_for(self._changed.wait(), remaining)
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+
+            snapshot = await self.get(job_id)
+            remaining = deadline - loop.time()
+            if (snapshot is None
+                    or snapshot["version"] > after
+                    or snapshot["status"] not in ACTIVE_STATUSES
+                    or remaining <= 0):
+                return snapshot
+            await asyncio.sleep(min(POLL_INTERVAL, remaining))
+
+    async def events(self, job_id: str, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield a snapshot on every change until the job finishes.
+
+        Yields None after ``heartbeat`` seconds without a change so the
+        caller can keep the connection alive.
+        """
+        after = 0
+        while True:
+            snapshot = await self.wait(job_id, after, heartbeat)
+            if snapshot is None:
+                return
+            if snapshot["version"] > after:
+                after = snapshot["version"]
+                yield snapshot
+            else:
+                yield None
+            if snapshot["status"] not in ACTIVE_STATUSES:
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "submitted": self.submitted.value,
+            "succeeded": self.succeeded.value,
+            "failed": self.failed.value,
+            "rejected": self.rejected.value,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "duration_seconds": self.duration.snapshot(),
+        }
+
+
+playlist_jobs = PlaylistJobManager(
+    workers=settings.PLAYLIST_JOB_WORKERS,
+    queue_size=settings.PLAYLIST_JOB_QUEUE_SIZE,
+    timeout=settings.PLAYLIST_JOB_TIMEOUT_SECONDS,
+)
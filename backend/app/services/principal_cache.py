@@ -0,0 +1,101 @@
+"""Process-local cache of authenticated principals.
+
+Every authenticated request used to decode its JWT and look the user up
+by username. The cache maps a bearer token to an immutable snapshot of
+its user for ``AUTH_USER_CACHE_TTL_SECONDS``, never past the token's own
+expiry, so repeat requests with the same token skip both the signature
+check and the query.
+
+Nothing evicts an entry early: a user deactivated in the database keeps
+being served from the snapshot until it expires, so the TTL bounds how
+long the account stays usable.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Immutable snapshot of a user row, safe to share between requests."""
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+        )
+
+
+class PrincipalCache:
+    """LRU of token -> user snapshot with a per-entry expiry."""
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[CachedUser, float]]" = OrderedDict()
+
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def get(self, token: str) -> Optional[CachedUser]:
+        """Get the user a token was verified for, or None."""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses.inc()
+            return None
+
+        user, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[token]
+            self.misses.inc()
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits.inc()
+        return user
+
+    def put(self, token: str, user: CachedUser, token_expires: Optional[float] = None) -> None:
+        """Remember a verified token; ``token_expires`` is its ``exp`` claim."""
+        lifetime = self.ttl
+        if token_expires is not None:
+            lifetime = min(lifetime, token_expires - time.time())
+        if lifetime <= 0:
+            return
+
+        self._entries.pop(token, None)
+        self._entries[token] = (user, time.monotonic() + lifetime)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def snapshot(self) -> Dict[str, float]:
+        lookups = self.hits.value + self.misses.value
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits.value,
+            "misses": self.misses.value,
+            "hit_rate": round(self.hits.value / lookups, 4) if lookups else None,
+        }
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+)
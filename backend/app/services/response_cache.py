@@ -0,0 +1,102 @@
+"""Conditional GET support for frequently polled read endpoints.
+
+Each endpoint derives a version for its data: a hash of the cached mood
+catalog, or a cheap aggregate over the rows a response is built from.
+The version becomes the response's ``ETag``. A request whose
+``If-None-Match`` matches is answered with an empty 304 before any rows
+are loaded or serialized. Otherwise the serialized body is kept in a
+small LRU keyed by path and ETag, so clients that poll without the
+header, or after another client caused the rebuild, get the stored bytes
+back.
+
+Versions come from the database rather than per-process counters, so
+every worker hands out the same ETag for the same data.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.core.metrics import Counter
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the string form of ``parts``."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers ``etag`` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+class ResponseCache:
+    """LRU of serialized JSON bodies keyed by path and ETag."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+
+        self.not_modified = Counter()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    async def respond(
+        self,
+        request: Request,
+        etag: str,
+        build: Callable[[], Awaitable[Any]],
+        cache_control: str = "no-cache",
+        vary: Optional[str] = None,
+    ) -> Response:
+        """Answer with 304, a stored body, or the body ``build()`` returns."""
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if vary:
+            headers["Vary"] = vary
+
+        if etag_matches(request, etag):
+            self.not_modified.inc()
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        key = f"{request.url.path}?{request.url.query}|{etag}"
+        body = self._bodies.get(key)
+        if body is not None:
+            self.hits.inc()
+            self._bodies.move_to_end(key)
+        else:
+            self.misses.inc()
+            content = jsonable_encoder(await build())
+            body = json.dumps(content, separators=(",", ":")).encode()
+            self._bodies[key] = body
+            if len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self) -> None:
+        self._bodies.clear()
+
+    def snapshot(self) -> dict:
+        served = self.not_modified.value + self.hits.value + self.misses.value
+        return {
+            "entries": len(self._bodies),
+            "max_entries": self.max_entries,
+            "not_modified": self.not_modified.value,
+            "body_hits": self.hits.value,
+            "body_misses": self.misses.value,
+            "rebuild_rate": round(self.misses.value / served, 4) if served else None,
+        }
+
+
+response_cache = ResponseCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
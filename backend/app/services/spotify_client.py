@@ -0,0 +1,403 @@
+"""Async client for the Spotify Web API.
+
+All requests share one pooled keep-alive ``httpx.AsyncClient`` so that
+Spotify calls never block the event loop and reuse TLS connections
+across requests. The client mirrors the subset of the ``spotipy.Spotify``
+interface that the application uses.
+
+Every call is paced by the shared scheduler in
+``app/services/spotify_scheduler.py``, which also coalesces identical
+catalog reads.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.instrumentation import instrumentation
+from app.services.spotify_scheduler import INTERACTIVE, RateLimited, spotify_scheduler
+
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Spotify accepts at most this many URIs per add-items call
+ADD_ITEMS_MAX = 100
+# and returns at most this many tracks per recommendations call
+RECOMMENDATIONS_MAX = 100
+
+# Catalog reads that identical concurrent calls can share
+COALESCED_PATHS = frozenset({"search", "recommendations", "audio-features"})
+
+
+class SpotifyAPIError(Exception):
+    """Raised when a Spotify API call fails after all retries."""
+
+    def __init__(
+        self,
+        status_code: int,
+        message: str,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        super().__init__(f"Spotify API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+        # Seconds Spotify asked us to wait, for rate-limited calls
+        self.retry_after = retry_after
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=settings.SPOTIFY_API_URL,
+            timeout=httpx.Timeout(settings.SPOTIFY_HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.SPOTIFY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SPOTIFY_MAX_CONNECTIONS,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _timed(call: Awaitable[httpx.Response]) -> httpx.Response:
+    """Await one HTTP call to Spotify, reporting its duration and status."""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = await call
+        status = str(response.status_code)
+        return response
+    finally:
+        instrumentation.record_spotify(time.perf_counter() - start, status)
+
+
+def _retry_delay(response: Optional[httpx.Response], attempt: int) -> float:
+    """Seconds to wait before retrying, honouring Retry-After when present."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+    return min(2 ** attempt * 0.5, settings.SPOTIFY_MAX_RETRY_AFTER)
+
+
+def _get_id(uri: str) -> str:
+    """Extract the bare Spotify ID from a URI or URL."""
+    return uri.rstrip("/").split("/")[-1].split(":")[-1].split("?")[0]
+
+
+class AsyncSpotify:
+    """Minimal asyncio Spotify Web API client bound to one access token.
+
+    ``priority`` is the scheduler class its calls are queued under.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        priority: int = INTERACTIVE,
+    ) -> None:
+        self.access_token = access_token
+        self._client = http_client
+        self.priority = priority
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """Send a request, sharing identical catalog reads already in flight.
+
+        Only calls with the same access token and priority are shared: the
+        token decides both the market of the results and whether the call
+        is authorized, and a user's request must not wait on background
+        pacing.
+        """
+        if settings.SPOTIFY_COALESCE_REQUESTS and method == "GET" and path in COALESCED_PATHS:
+            key = (
+                hashlib.sha256(self.access_token.encode()).hexdigest(),
+                self.priority,
+                path,
+                tuple(sorted((params or {}).items())),
+            )
+            return await spotify_scheduler.coalesce(
+                key, lambda: self._send(method, path, params, json)
+            )
+        return await self._send(method, path, params, json)
+
+    async def _acquire(self) -> None:
+        """Wait for the scheduler to allow the next call."""
+        if not settings.SPOTIFY_RATE_LIMIT_ENABLED:
+            return
+        # Users should not wait longer than we would wait out a Retry-After
+        max_wait = settings.SPOTIFY_MAX_RETRY_AFTER if self.priority == INTERACTIVE else None
+        try:
+            await spotify_scheduler.acquire(self.priority, max_wait)
+        except RateLimited as e:
+            raise SpotifyAPIError(429, str(e), retry_after=e.retry_after) from e
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """Send a request, retrying on 429, 5xx and transport errors."""
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        max_retries = settings.SPOTIFY_MAX_RETRIES
+        paced = settings.SPOTIFY_RATE_LIMIT_ENABLED
+
+        for attempt in range(max_retries + 1):
+            await self._acquire()
+            response = None
+            try:
+                response = await _timed(self.client.request(
+                    method, path, params=params, json=json, headers=headers
+                ))
+            except httpx.TransportError as e:
+                if attempt >= max_retries:
+                    raise SpotifyAPIError(503, f"{method} {path} failed: {e}") from e
+            else:
+                throttled = response.status_code == 429
+                retryable = throttled or response.status_code >= 500
+                if not retryable:
+                    if paced:
+                        spotify_scheduler.on_success()
+                    break
+                if throttled and paced:
+                    spotify_scheduler.on_throttled(_retry_delay(response, attempt))
+                if attempt >= max_retries:
+                    break
+
+            delay = _retry_delay(response, attempt)
+            if delay > settings.SPOTIFY_MAX_RETRY_AFTER:
+                break
+            logger.warning(
+                f"Spotify {method} {path} retrying in {delay:.2f}s "
+                f"(attempt {attempt + 1}/{max_retries})"
+            )
+            if response is not None and response.status_code == 429 and paced:
+                # The scheduler holds every call, this retry included, until the pause ends
+                continue
+            await asyncio.sleep(delay)
+
+        if response.status_code >= 400:
+            try:
+                message = response.json()["error"]["message"]
+            except Exception:
+                message = response.text
+            retry_after = _retry_delay(response, attempt) if response.status_code == 429 else None
+            raise SpotifyAPIError(response.status_code, message, retry_after)
+
+        if not response.content:
+            return {}
+        return response.json()
+
+    async def current_user(self) -> Dict[str, Any]:
+        """Get the profile of the user that owns the access token."""
+        return await self._request("GET", "me")
+
+    async def search(
+        self,
+        q: str,
+        limit: int = 10,
+        offset: int = 0,
+        type: str = "track",
+        market: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Search the Spotify catalog."""
+        params = {"q": q, "limit": limit, "offset": offset, "type": type}
+        if market:
+            params["market"] = market
+        return await self._request("GET", "search", params=params)
+
+    async def recommendations(
+        self,
+        seed_artists: Optional[List[str]] = None,
+        seed_genres: Optional[List[str]] = None,
+        seed_tracks: Optional[List[str]] = None,
+        limit: int = 20,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Get track recommendations; extra kwargs are tunable attributes."""
+        params: Dict[str, Any] = {"limit": limit}
+        if seed_artists:
+            params["seed_artists"] = ",".join(_get_id(a) for a in seed_artists)
+        if seed_genres:
+            params["seed_genres"] = ",".join(seed_genres)
+        if seed_tracks:
+            params["seed_tracks"] = ",".join(_get_id(t) for t in seed_tracks)
+        params.update(kwargs)
+        return await self._request("GET", "recommendations", params=params)
+
+    async def audio_features(self, tracks: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Get audio features for up to 100 tracks; unknown tracks are None."""
+        ids = ",".join(_get_id(t) for t in tracks)
+        result = await self._request("GET", "audio-features", params={"ids": ids})
+        return result.get("audio_features", [])
+
+    async def user_playlist_create(
+        self,
+        user: str,
+        name: str,
+        public: bool = True,
+        collaborative: bool = False,
+        description: str = "",
+    ) -> Dict[str, Any]:
+        """Create a playlist for a user."""
+        data = {
+            "name": name,
+            "public": public,
+            "collaborative": collaborative,
+            "description": description,
+        }
+        return await self._request("POST", f"users/{user}/playlists", json=data)
+
+    async def playlist_add_items(
+        self,
+        playlist_id: str,
+        items: List[str],
+        position: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Add track URIs to a playlist."""
+        data: Dict[str, Any] = {"uris": items}
+        if position is not None:
+            data["position"] = position
+        return await self._request(
+            "POST", f"playlists/{_get_id(playlist_id)}/tracks", json=data
+        )
+
+    async def playlist_add_items_chunked(
+        self,
+        playlist_id: str,
+        items: List[str],
+        ordered: bool = True,
+        max_concurrency: int = 1,
+        chunk_size: int = ADD_ITEMS_MAX,
+    ) -> List[Dict[str, Any]]:
+        """Add any number of track URIs, at most ``chunk_size`` per call.
+
+        Spotify appends each call's tracks in the order the calls arrive,
+        so ordered adds send each chunk as soon as the previous one is
+        acknowledged. Unordered adds keep up to ``max_concurrency`` chunks
+        in flight at once.
+
+        Returns the index, track count, seconds taken and resulting
+        snapshot id of every chunk, in chunk order.
+        """
+        chunk_size = min(chunk_size, ADD_ITEMS_MAX)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        semaphore = asyncio.Semaphore(1 if ordered else max(1, max_concurrency))
+
+        async def add(index: int, chunk: List[str]) -> Dict[str, Any]:
+            async with semaphore:
+                start = time.perf_counter()
+                result = await self.playlist_add_items(playlist_id, chunk)
+                return {
+                    "chunk": index,
+                    "tracks": len(chunk),
+                    "seconds": round(time.perf_counter() - start, 4),
+                    "snapshot_id": result.get("snapshot_id"),
+                }
+
+        if ordered:
+            return [await add(index, chunk) for index, chunk in enumerate(chunks)]
+        return list(await asyncio.gather(
+            *(add(index, chunk) for index, chunk in enumerate(chunks))
+        ))
+
+
+async def _request_token(
+    data: Dict[str, str],
+    http_client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """POST a grant to the Spotify token endpoint using the app credentials."""
+    if not settings.SPOTIFY_CLIENT_ID or not settings.SPOTIFY_CLIENT_SECRET:
+        raise SpotifyAPIError(401, "Spotify client credentials are not configured")
+
+    client = http_client or get_http_client()
+    try:
+        response = await _timed(client.post(
+            settings.SPOTIFY_TOKEN_URL,
+            data=data,
+            auth=(settings.SPOTIFY_CLIENT_ID, settings.SPOTIFY_CLIENT_SECRET),
+        ))
+    except httpx.TransportError as e:
+        raise SpotifyAPIError(503, f"Token request failed: {e}") from e
+
+    if response.status_code >= 400:
+        raise SpotifyAPIError(response.status_code, response.text)
+    return response.json()
+
+
+async def request_app_token(http_client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+    """Get an app-only access token via the client credentials flow.
+
+    The token is not tied to any user, so it can only read public catalog
+    data such as search results and audio features. Background jobs use
+    it when no user request is available.
+    """
+    return await _request_token({"grant_type": "client_credentials"}, http_client)
+
+
+def authorize_url(state: str) -> str:
+    """URL of the Spotify consent page for the authorization code flow."""
+    params = {
+        "client_id": settings.SPOTIFY_CLIENT_ID or "",
+        "response_type": "code",
+        "redirect_uri": settings.SPOTIFY_REDIRECT_URI,
+        "scope": settings.SPOTIFY_SCOPE,
+        "state": state,
+    }
+    return str(httpx.URL(settings.SPOTIFY_AUTHORIZE_URL, params=params))
+
+
+async def request_user_token(
+    code: str,
+    http_client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """Exchange an authorization code from the OAuth callback for user tokens."""
+    return await _request_token({
+        "grant_type": "authorization_code",
+        "code": code,
+        "redirect_uri": settings.SPOTIFY_REDIRECT_URI,
+    }, http_client)
+
+
+async def refresh_user_token(
+    refresh_token: str,
+    http_client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """Get a new access token for a user.
+
+    Spotify may or may not return a new refresh token; callers keep the
+    old one when it does not.
+    """
+    return await _request_token({
+        "grant_type": "refresh_token",
+        "refresh_token": refresh_token,
+    }, http_client)
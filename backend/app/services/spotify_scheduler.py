@@ -0,0 +1,201 @@
+"""Central pacing of outbound Spotify Web API calls.
+
+Spotify rate-limits each app across all of its users, over a rolling
+window, and answers 429 with a ``Retry-After`` header once the limit is
+hit. Every ``AsyncSpotify`` request therefore takes a slot from one
+shared scheduler before it is sent:
+
+- A token bucket paces calls to ``SPOTIFY_RATE_LIMIT_PER_SECOND`` with
+  bursts of up to ``SPOTIFY_RATE_LIMIT_BURST``.
+- Waiting calls are served by priority, so requests a user is waiting
+  on go ahead of the background pool refresher.
+- A 429 pauses every call until its ``Retry-After`` has passed and halves
+  the rate. Each successful call then raises the rate slightly, back up
+  to the configured maximum.
+- Identical catalog reads (searches, recommendations, audio features)
+  that are already in flight with the same token and priority are
+  coalesced into one call.
+
+The limits are per process; with several workers, divide the app's quota
+between them.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Priority classes; lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Fraction of the maximum rate regained after each successful call
+RATE_RECOVERY = 0.05
+
+
+class RateLimited(Exception):
+    """Raised when a call would wait longer than its caller allows."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Spotify rate limit reached, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class SpotifyScheduler:
+    """Token bucket with priority queueing, adaptive backoff and coalescing."""
+
+    def __init__(self, rate: float, burst: int, min_rate: float) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight = SingleFlight()
+
+        self.sent = {name: Counter() for name in PRIORITY_NAMES.values()}
+        self.wait = {name: Histogram() for name in PRIORITY_NAMES.values()}
+        self.coalesced = Counter()
+        self.throttled = Counter()
+        self.rejected = Counter()
+
+    def _bind(self) -> asyncio.AbstractEventLoop:
+        """Reset per-loop state when used from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._waiters = []
+            self._timer = None
+            self._inflight = SingleFlight()
+        return loop
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _next_slot_in(self, now: float) -> float:
+        """Seconds until the next call may be sent."""
+        return max(self._paused_until - now, (1 - self._tokens) / self.rate, 0.0)
+
+    async def acquire(self, priority: int = INTERACTIVE, max_wait: Optional[float] = None) -> None:
+        """Wait for a slot to send one call.
+
+        Raises ``RateLimited`` without waiting when the expected wait
+        exceeds ``max_wait``.
+        """
+        loop = self._bind()
+        now = time.monotonic()
+        self._refill(now)
+        started = now
+
+        if not self._waiters and now >= self._paused_until and self._tokens >= 1:
+            self._tokens -= 1
+        else:
+            if max_wait is not None:
+                # Everyone queued ahead needs a slot first
+                ahead = sum(1 for p, _, f in self._waiters if p <= priority and not f.done())
+                expected = self._next_slot_in(now) + ahead / self.rate
+                if expected > max_wait:
+                    self.rejected.inc()
+                    raise RateLimited(expected)
+
+            future = loop.create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+            self._dispatch()
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # The slot was granted as we were cancelled; pass it on
+                    self._tokens += 1
+                    self._dispatch()
+                raise
+
+        name = PRIORITY_NAMES.get(priority, "background")
+        self.sent[name].inc()
+        self.wait[name].observe(time.monotonic() - started)
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters in priority order, then arm a timer for the rest."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and now >= self._paused_until and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self._waiters:
+            self._timer = self._loop.call_later(self._next_slot_in(now), self._dispatch)
+
+    def on_throttled(self, retry_after: float) -> None:
+        """Record a 429: pause all calls and halve the rate."""
+        self.throttled.inc()
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + retry_after)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._refill(now)
+        self._tokens = 0.0
+        logger.warning(
+            f"Spotify rate limit hit; pausing {retry_after:.1f}s at {self.rate:.1f} calls/s"
+        )
+        if self._loop is not None and self._waiters:
+            self._dispatch()
+
+    def on_success(self) -> None:
+        """Record a successful call, recovering the rate towards its maximum."""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY)
+
+    async def coalesce(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``call``, or share the result of an identical call in flight."""
+        self._bind()
+        if key in self._inflight:
+            self.coalesced.inc()
+        return await self._inflight.run(key, call)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "rate_per_second": round(self.rate, 2),
+            "max_rate_per_second": self.max_rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "paused_for_seconds": round(max(0.0, self._paused_until - now), 2),
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            "in_flight_coalescable": len(self._inflight),
+            "sent": {name: counter.value for name, counter in self.sent.items()},
+            "coalesced": self.coalesced.value,
+            "throttled": self.throttled.value,
+            "rejected": self.rejected.value,
+            "wait_seconds": {name: hist.snapshot() for name, hist in self.wait.items()},
+        }
+
+
+spotify_scheduler = SpotifyScheduler(
+    rate=settings.SPOTIFY_RATE_LIMIT_PER_SECOND,
+    burst=settings.SPOTIFY_RATE_LIMIT_BURST,
+    min_rate=settings.SPOTIFY_RATE_LIMIT_MIN_PER_SECOND,
+)
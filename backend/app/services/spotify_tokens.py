@@ -0,0 +1,280 @@
+"""Per-user Spotify OAuth tokens.
+
+Tokens are stored in the ``spotify_tokens`` table, one row per user, and
+kept in an in-memory cache so a request normally needs neither a query
+nor any file I/O to get its access token.
+
+Tokens are refreshed before they expire. Once less than
+``SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS`` remain, the first request starts
+a refresh in the background and carries on with the still-valid token.
+Requests only wait when less than ``SPOTIFY_TOKEN_MIN_TTL_SECONDS`` remain.
+Refreshes are single-flight per user: concurrent requests share one
+refresh call. A refresh only talks to Spotify; the new token is written
+back to the table afterwards, so requests waiting on it, which already
+hold a pooled connection each, never need another one.
+
+Worker processes refresh independently. Spotify may rotate the refresh
+token on a refresh, and a reconnect replaces it too, so a worker can be
+left holding one that is no longer valid. When a refresh is rejected the
+row is reloaded and, if another writer has stored new tokens meanwhile,
+those are used instead. The row is only deleted while it still holds the
+rejected refresh token.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.errors import SpotifyError
+from app.core.metrics import Counter
+from app.db.session import async_session_scope
+from app.models.spotify import SpotifyToken
+from app.services.spotify_client import SpotifyAPIError, refresh_user_token
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    """Immutable snapshot of a user's token row."""
+    access_token: str
+    refresh_token: str
+    expires_at: datetime
+
+    @property
+    def expires_in(self) -> float:
+        return (self.expires_at - datetime.utcnow()).total_seconds()
+
+
+def _cached(row: SpotifyToken) -> CachedToken:
+    return CachedToken(row.access_token, row.refresh_token, row.expires_at)
+
+
+def _token_values(token_info: Dict[str, Any], refresh_token: Optional[str] = None) -> Dict[str, Any]:
+    """Column values for a token response, keeping the old refresh token if none is returned."""
+    now = datetime.utcnow()
+    values = {
+        "access_token": token_info["access_token"],
+        "refresh_token": token_info.get("refresh_token") or refresh_token,
+        "expires_at": now + timedelta(seconds=int(token_info.get("expires_in", 3600))),
+        "updated_at": now,
+    }
+    if "scope" in token_info:
+        values["scope"] = token_info["scope"]
+    return values
+
+
+def _auth_required() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Spotify authentication required"
+    )
+
+
+class SpotifyTokenStore:
+    """Database-backed token store with an in-memory cache in front."""
+
+    def __init__(self, refresh_margin: float, min_ttl: float) -> None:
+        self.refresh_margin = refresh_margin
+        self.min_ttl = min_ttl
+        self._tokens: Dict[int, CachedToken] = {}
+        self._refreshing: Dict[int, asyncio.Task] = {}
+        self._writes: Set[asyncio.Task] = set()
+
+        self.hits = Counter()
+        self.loads = Counter()
+        self.refreshes = Counter()
+        self.background_refreshes = Counter()
+        self.joined_refreshes = Counter()
+        self.refresh_errors = Counter()
+
+    async def get_access_token(
+        self, db: AsyncSession, user_id: int, min_ttl: Optional[float] = None
+    ) -> str:
+        """Get a valid access token for a user, refreshing it if needed.
+
+        The token stays valid for at least ``min_ttl`` seconds, by default
+        ``SPOTIFY_TOKEN_MIN_TTL_SECONDS``. Raises a 401 when the user has
+        not connected Spotify or has revoked access.
+        """
+        token = self._tokens.get(user_id)
+        if token is None:
+            self.loads.inc()
+            row = await db.get(SpotifyToken, user_id)
+            if row is None:
+                raise _auth_required()
+            # Keep a token another request refreshed while this one was loading
+            token = self._tokens.setdefault(user_id, _cached(row))
+        else:
+            self.hits.inc()
+
+        expires_in = token.expires_in
+        if expires_in < max(self.min_ttl, min_ttl or 0):
+            token = await self._refresh(user_id, token)
+        elif expires_in < self.refresh_margin:
+            if user_id not in self._refreshing:
+                self.background_refreshes.inc()
+            self._refresh_task(user_id, token)
+        return token.access_token
+
+    async def save(self, db: AsyncSession, user_id: int, token_info: Dict[str, Any]) -> None:
+        """Store the tokens returned by the authorization code exchange."""
+        row = await db.get(SpotifyToken, user_id)
+        values = _token_values(token_info, row.refresh_token if row else None)
+        if row is None:
+            row = SpotifyToken(user_id=user_id)
+            db.add(row)
+        for name, value in values.items():
+            setattr(row, name, value)
+        await db.commit()
+        self._tokens[user_id] = _cached(row)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's cached token so the next request reloads the row."""
+        self._tokens.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._tokens.clear()
+
+    async def close(self) -> None:
+        """Wait for refreshed tokens still being written to the table."""
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def _refresh_task(self, user_id: int, current: CachedToken) -> asyncio.Task:
+        """Return the user's in-flight refresh, starting one if there is none."""
+        task = self._refreshing.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._do_refresh(user_id, current))
+            self._refreshing[user_id] = task
+            task.add_done_callback(lambda t: self._refresh_done(user_id, t))
+        return task
+
+    def _refresh_done(self, user_id: int, task: asyncio.Task) -> None:
+        if self._refreshing.get(user_id) is task:
+            del self._refreshing[user_id]
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors.inc()
+            logger.warning(f"Spotify token refresh for user {user_id} failed: {task.exception()}")
+
+    async def _refresh(self, user_id: int, current: CachedToken) -> CachedToken:
+        """Wait for the user's refresh, joining one already in flight."""
+        if user_id in self._refreshing:
+            self.joined_refreshes.inc()
+        # Shielded so a cancelled request does not abort a refresh others wait on
+        return await asyncio.shield(self._refresh_task(user_id, current))
+
+    async def _do_refresh(self, user_id: int, current: CachedToken, retry: bool = True) -> CachedToken:
+        self.refreshes.inc()
+        try:
+            token_info = await refresh_user_token(current.refresh_token)
+        except SpotifyAPIError as e:
+            if e.status_code not in (400, 401):
+                raise SpotifyError(detail=f"Could not refresh Spotify token: {e}")
+
+            stored = await self._load(user_id)
+            if retry and stored is not None and stored.refresh_token != current.refresh_token:
+                # Another worker or a reconnect stored new tokens meanwhile
+                self._tokens[user_id] = stored
+                if stored.expires_in >= self.min_ttl:
+                    return stored
+                return await self._do_refresh(user_id, stored, retry=False)
+
+            # The refresh token was revoked; the user has to reconnect
+            self.invalidate(user_id)
+            if stored is not None:
+                self._write(user_id, None, current.refresh_token)
+            raise _auth_required()
+
+        values = _token_values(token_info, current.refresh_token)
+        token = CachedToken(values["access_token"], values["refresh_token"], values["expires_at"])
+        self._tokens[user_id] = token
+        self._write(user_id, values)
+        return token
+
+    async def _load(self, user_id: int) -> Optional[CachedToken]:
+        """Read a user's token row as currently stored, bypassing the cache."""
+        async with async_session_scope() as db:
+            row = await db.get(SpotifyToken, user_id)
+            return _cached(row) if row is not None else None
+
+    def _write(
+        self,
+        user_id: int,
+        values: Optional[Dict[str, Any]],
+        revoked_refresh_token: Optional[str] = None
+    ) -> None:
+        """Persist a refreshed token in the background.
+
+        With ``values`` None the row is deleted instead, but only while it
+        still holds ``revoked_refresh_token``.
+        """
+        task = asyncio.create_task(self._do_write(user_id, values, revoked_refresh_token))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _do_write(
+        self,
+        user_id: int,
+        values: Optional[Dict[str, Any]],
+        revoked_refresh_token: Optional[str]
+    ) -> None:
+        try:
+            async with async_session_scope() as db:
+                if values is None:
+                    await db.execute(
+                        delete(SpotifyToken).where(
+                            SpotifyToken.user_id == user_id,
+                            SpotifyToken.refresh_token == revoked_refresh_token,
+                        )
+                    )
+                else:
+                    await db.execute(
+                        update(SpotifyToken)
+                        .where(SpotifyToken.user_id == user_id)
+                        .values(**values)
+                    )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Could not store Spotify token for user {user_id}: {e}")
+
+    def freshness(self) -> Dict[str, int]:
+        """How many cached tokens are expired or due for a refresh."""
+        expired = due = 0
+        for token in list(self._tokens.values()):
+            expires_in = token.expires_in
+            if expires_in <= 0:
+                expired += 1
+            elif expires_in < self.refresh_margin:
+                due += 1
+        return {
+            "cached_users": len(self._tokens),
+            "expired": expired,
+            "due_for_refresh": due,
+            "refreshing": len(self._refreshing),
+            "refresh_errors": self.refresh_errors.value,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "cached_users": len(self._tokens),
+            "refreshing": len(self._refreshing),
+            "hits": self.hits.value,
+            "loads": self.loads.value,
+            "refreshes": self.refreshes.value,
+            "background_refreshes": self.background_refreshes.value,
+            "joined_refreshes": self.joined_refreshes.value,
+            "refresh_errors": self.refresh_errors.value,
+        }
+
+
+spotify_tokens = SpotifyTokenStore(
+    refresh_margin=settings.SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS,
+    min_ttl=settings.SPOTIFY_TOKEN_MIN_TTL_SECONDS,
+)
@@ -0,0 +1,189 @@
+"""Shared cache of Spotify track-candidate pools.
+
+Playlist generation searches Spotify with a small, fixed vocabulary of
+genre, decade and popularity filters drawn from ``MOOD_FEATURES``, so the
+same queries are repeated for every user all day. Instead of asking
+Spotify for the handful of tracks a playlist needs, a miss fetches a
+larger candidate pool (``TRACK_CACHE_POOL_SIZE`` tracks) for the
+normalized query and caches it for ``TRACK_CACHE_TTL_SECONDS``. Callers
+then sample a random subset from the pool, which keeps playlists varied
+while most requests never reach Spotify.
+
+Pools live in a per-process LRU by default. With
+``TRACK_CACHE_BACKEND=redis`` they are stored in Redis at ``REDIS_URL``
+and shared by every worker; Redis applies the TTL and its own
+``maxmemory-policy`` takes care of eviction.
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[str, int], Awaitable[List[str]]]
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a search query used as the cache key.
+
+    Spotify treats filters as an unordered, case-insensitive set, so
+    ``"Genre:pop  year:1980-1989"`` and ``"year:1980-1989 genre:pop"``
+    share one pool.
+    """
+    return " ".join(sorted(query.lower().split()))
+
+
+class MemoryTrackPoolBackend:
+    """Process-local LRU of track pools with per-entry expiry."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self.evictions = Counter()
+
+    async def get(self, key: str) -> Optional[List[str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, uris = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return uris
+
+    async def set(self, key: str, uris: List[str], ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, uris)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions.inc()
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    async def close(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisTrackPoolBackend:
+    """Track pools stored as JSON strings in a Redis-compatible server."""
+
+    def __init__(self, client: Any, prefix: str = "track-pool:") -> None:
+        self._client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisTrackPoolBackend":
+        import redis.asyncio as redis
+
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[List[str]]:
+        value = await self._client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, uris: List[str], ttl: float) -> None:
+        await self._client.set(self.prefix + key, json.dumps(uris), ex=max(1, int(ttl)))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self._client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self._client.delete(*keys)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class TrackPoolCache:
+    """Read-through cache of candidate track URIs per search query."""
+
+    def __init__(self, backend: Any, ttl: float, pool_size: int) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.hits = Counter()
+        self.misses = Counter()
+        self.errors = Counter()
+        # Misses currently being fetched, so concurrent requests for the
+        # same pool wait for one Spotify call instead of each making their own
+        self._pending = SingleFlight()
+
+    async def get_pool(self, query: str, fetch: Fetcher) -> List[str]:
+        """Get the candidate pool for ``query``, calling ``fetch`` on a miss.
+
+        ``fetch(query, limit)`` must return a list of track URIs. Backend
+        failures are logged and treated as misses, so a Redis outage only
+        costs the extra Spotify calls.
+        """
+        key = normalize_query(query)
+
+        try:
+            uris = await self.backend.get(key)
+        except Exception as e:
+            self.errors.inc()
+            logger.warning(f"Track cache read failed: {e}")
+            uris = None
+
+        if uris is not None:
+            self.hits.inc()
+            return uris
+
+        self.misses.inc()
+        return await self._pending.run(key, lambda: self._fill(key, query, fetch))
+
+    async def _fill(self, key: str, query: str, fetch: Fetcher) -> List[str]:
+        uris = await fetch(query, self.pool_size)
+        if uris:
+            try:
+                await self.backend.set(key, uris, self.ttl)
+            except Exception as e:
+                self.errors.inc()
+                logger.warning(f"Track cache write failed: {e}")
+        return uris
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        hits, misses = self.hits.value, self.misses.value
+        lookups = hits + misses
+        result = {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "errors": self.errors.value,
+            "hit_rate": hits / lookups if lookups else None,
+            "ttl_seconds": self.ttl,
+            "pool_size": self.pool_size,
+        }
+        if isinstance(self.backend, MemoryTrackPoolBackend):
+            result["entries"] = len(self.backend)
+            result["max_entries"] = self.backend.max_entries
+            result["evictions"] = self.backend.evictions.value
+        return result
+
+
+def _make_backend() -> Any:
+    if settings.TRACK_CACHE_BACKEND == "redis":
+        return RedisTrackPoolBackend.from_url(settings.REDIS_URL)
+    return MemoryTrackPoolBackend(max_entries=settings.TRACK_CACHE_MAX_ENTRIES)
+
+
+track_cache = TrackPoolCache(
+    backend=_make_backend(),
+    ttl=settings.TRACK_CACHE_TTL_SECONDS,
+    pool_size=settings.TRACK_CACHE_POOL_SIZE,
+)
@@ -0,0 +1,228 @@
+"""Precomputed candidate track pools per mood.
+
+A background refresher periodically searches Spotify for every mood's
+genres, looks up the audio features of the results and stores the
+tracks with their energy and valence in the ``mood_tracks`` table. Each
+refresh replaces a mood's pool in one transaction. Playlist creation can
+then pick tracks from the local pools and only needs Spotify to create
+the playlist and add the items.
+
+Pools are refreshed every ``TRACK_POOL_REFRESH_INTERVAL_SECONDS`` and
+ignored once they are older than ``TRACK_POOL_MAX_AGE_SECONDS``. The
+refresher runs inside the API when ``TRACK_POOL_REFRESH_ENABLED`` is set,
+or as a one-off job::
+
+    python -m app.services.track_pools [--force]
+"""
+import argparse
+import asyncio
+import logging
+import math
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_session_scope
+from app.models.track import MoodTrack
+from app.services.feature_index import feature_index
+from app.services.mood_cache import mood_cache
+from app.services.mood_features import MOOD_FEATURES, mood_params
+from app.services.spotify_client import AsyncSpotify, request_app_token
+from app.services.spotify_scheduler import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+# Spotify caps search pages at 50 results and audio-feature lookups at 100 ids
+SEARCH_PAGE_SIZE = 50
+AUDIO_FEATURES_BATCH = 100
+
+
+@dataclass(frozen=True)
+class PoolTrack:
+    """A candidate track and the audio features used to place it."""
+    uri: str
+    energy: float
+    valence: float
+    duration_ms: Optional[int]
+
+
+async def fetch_mood_pool(
+    spotify: AsyncSpotify,
+    mood_name: str,
+    size: int
+) -> List[Dict[str, Any]]:
+    """Search Spotify for a mood's genres and return pool rows with features."""
+    genres = mood_params(mood_name)["genres"]
+    per_genre = math.ceil(size / len(genres))
+    semaphore = asyncio.Semaphore(settings.SPOTIFY_MAX_CONCURRENCY)
+
+    async def call(coro):
+        async with semaphore:
+            return await coro
+
+    pages = await asyncio.gather(*(
+        call(spotify.search(
+            q=f"genre:{genre}",
+            type="track",
+            limit=min(SEARCH_PAGE_SIZE, per_genre - offset),
+            offset=offset
+        ))
+        for genre in genres
+        for offset in range(0, per_genre, SEARCH_PAGE_SIZE)
+    ))
+
+    tracks: Dict[str, Dict[str, Any]] = {}
+    for page in pages:
+        for item in page["tracks"]["items"]:
+            tracks.setdefault(item["uri"], item)
+
+    uris = list(tracks)
+    batches = await asyncio.gather(*(
+        call(spotify.audio_features(uris[i:i + AUDIO_FEATURES_BATCH]))
+        for i in range(0, len(uris), AUDIO_FEATURES_BATCH)
+    ))
+
+    rows = []
+    for uri, features in zip(uris, (f for batch in batches for f in batch)):
+        if not features:
+            continue
+        rows.append({
+            "mood_name": mood_name,
+            "spotify_uri": uri,
+            "energy": features["energy"],
+            "valence": features["valence"],
+            "tempo": features.get("tempo"),
+            "danceability": features.get("danceability"),
+            "duration_ms": tracks[uri].get("duration_ms"),
+        })
+    return rows
+
+
+async def replace_pool(db: AsyncSession, mood_name: str, rows: List[Dict[str, Any]]) -> None:
+    """Atomically swap a mood's stored pool for ``rows``."""
+    fetched_at = datetime.utcnow()
+    await db.execute(delete(MoodTrack).where(MoodTrack.mood_name == mood_name))
+    if rows:
+        await db.execute(insert(MoodTrack), [dict(row, fetched_at=fetched_at) for row in rows])
+    await db.commit()
+
+
+async def pool_fetched_at(db: AsyncSession, mood_name: str) -> Optional[datetime]:
+    """When a mood's pool was last refreshed, or None if it has none."""
+    return await db.scalar(
+        select(func.max(MoodTrack.fetched_at)).where(MoodTrack.mood_name == mood_name)
+    )
+
+
+async def load_pool(db: AsyncSession, mood_name: str) -> List[PoolTrack]:
+    """Get a mood's pool, or an empty list if it is missing, small or stale."""
+    oldest = datetime.utcnow() - timedelta(seconds=settings.TRACK_POOL_MAX_AGE_SECONDS)
+    rows = (await db.execute(
+        select(MoodTrack.spotify_uri, MoodTrack.energy, MoodTrack.valence, MoodTrack.duration_ms)
+        .where(MoodTrack.mood_name == mood_name, MoodTrack.fetched_at >= oldest)
+    )).all()
+    if len(rows) < settings.TRACK_POOL_MIN_TRACKS:
+        return []
+    return [PoolTrack(*row) for row in rows]
+
+
+async def refresh_pools(
+    spotify: Optional[AsyncSpotify] = None,
+    force: bool = False
+) -> Dict[str, int]:
+    """Rebuild every mood pool that is due, returning the new pool sizes.
+
+    Pools refreshed less than ``TRACK_POOL_REFRESH_INTERVAL_SECONDS`` ago
+    are skipped unless ``force`` is set, so several API workers running
+    the refresher do not all repeat the same work.
+    """
+    due_before = datetime.utcnow() - timedelta(seconds=settings.TRACK_POOL_REFRESH_INTERVAL_SECONDS)
+    refreshed = {}
+
+    async with async_session_scope() as db:
+        names = list(MOOD_FEATURES)
+        names += [mood.name for mood in await mood_cache.all(db) if mood.name not in MOOD_FEATURES]
+
+        for name in names:
+            fetched_at = await pool_fetched_at(db, name)
+            if not force and fetched_at is not None and fetched_at > due_before:
+                continue
+
+            if spotify is None:
+                token = await request_app_token()
+                spotify = AsyncSpotify(token["access_token"], priority=BACKGROUND)
+
+            rows = await fetch_mood_pool(spotify, name, settings.TRACK_POOL_SIZE)
+            await replace_pool(db, name, rows)
+            refreshed[name] = len(rows)
+            logger.info(f"Refreshed track pool for {name}: {len(rows)} tracks")
+
+        if refreshed:
+            await feature_index.rebuild(db)
+
+    return refreshed
+
+
+class TrackPoolRefresher:
+    """Background task that keeps the track pools fresh."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        # Spread out workers that start at the same moment
+        await asyncio.sleep(random.uniform(0, 10))
+        while True:
+            try:
+                await refresh_pools()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Track pool refresh failed: {e}")
+            # Wake up often enough to notice pools refreshed elsewhere
+            await asyncio.sleep(min(self.interval, 15 * 60) * random.uniform(0.9, 1.1))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+track_pool_refresher = TrackPoolRefresher(interval=settings.TRACK_POOL_REFRESH_INTERVAL_SECONDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the precomputed mood track pools")
+    parser.add_argument("--force", action="store_true", help="refresh pools that are not due yet")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        from app.services.spotify_client import close_http_client
+
+        try:
+            return await refresh_pools(force=args.force)
+        finally:
+            await close_http_client()
+
+    for name, count in asyncio.run(run()).items():
+        print(f"{name}: {count} tracks")
+
+
+if __name__ == "__main__":
+    main()
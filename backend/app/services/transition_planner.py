@@ -0,0 +1,96 @@
+"""Waypoint planning for multi-step mood transitions.
+
+A transition is a path through audio-feature space from the initial
+mood's point to the target mood's point. The planner places N waypoints
+along that path, spaced evenly in time but advanced according to a
+curve:
+
+- ``linear``: constant pace from start to finish.
+- ``ease-in-out``: lingers near both moods and moves quickly in between.
+- ``overshoot``: swings slightly past the target mood before settling
+  on it.
+
+Each waypoint gets an equal share of the playlist's target duration.
+"""
+import math
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from app.services.feature_index import FeatureTuple, mood_point
+
+# Typical track length, used to size requests before real durations are known
+DEFAULT_TRACK_MS = 210_000
+# How far the overshoot curve swings past the target (the classic "back" easing)
+OVERSHOOT = 1.70158
+
+
+def _linear(t: float) -> float:
+    return t
+
+
+def _ease_in_out(t: float) -> float:
+    return t * t * (3 - 2 * t)
+
+
+def _overshoot(t: float) -> float:
+    u = t - 1
+    return 1 + (OVERSHOOT + 1) * u ** 3 + OVERSHOOT * u ** 2
+
+
+CURVES: Dict[str, Callable[[float], float]] = {
+    "linear": _linear,
+    "ease-in-out": _ease_in_out,
+    "overshoot": _overshoot,
+}
+
+
+@dataclass(frozen=True)
+class Waypoint:
+    """One step of a transition and the playlist time allotted to it."""
+    position: int
+    progress: float
+    point: FeatureTuple
+    budget_ms: int
+
+    @property
+    def estimated_tracks(self) -> int:
+        return max(1, math.ceil(self.budget_ms / DEFAULT_TRACK_MS))
+
+
+def _clamp_point(point: List[float]) -> FeatureTuple:
+    energy, valence, tempo, danceability = point
+    return (
+        max(0.0, min(1.0, energy)),
+        max(0.0, min(1.0, valence)),
+        max(40.0, min(220.0, tempo)),
+        max(0.0, min(1.0, danceability)),
+    )
+
+
+def plan_waypoints(
+    initial_mood_name: str,
+    target_mood_name: str,
+    count: int,
+    curve: str,
+    duration_minutes: float
+) -> List[Waypoint]:
+    """Place ``count`` waypoints from the initial mood to the target mood.
+
+    The first and last waypoints sit on the moods themselves. The start
+    point's energy and valence are jittered slightly, as in the
+    three-segment plan, so repeated transitions differ.
+    """
+    ease = CURVES[curve]
+    start = list(mood_point(initial_mood_name))
+    start[0] *= random.uniform(0.85, 1.15)
+    start[1] *= random.uniform(0.85, 1.15)
+    end = mood_point(target_mood_name)
+
+    budget_ms = int(duration_minutes * 60_000 / count)
+    waypoints = []
+    for position in range(count):
+        progress = ease(position / (count - 1)) if count > 1 else 1.0
+        point = [a + progress * (b - a) for a, b in zip(start, end)]
+        waypoints.append(Waypoint(position, progress, _clamp_point(point), budget_ms))
+    return waypoints
@@ -0,0 +1,130 @@
+"""Incremental maintenance of the per-user transition aggregates.
+
+``mood_transition_stats`` holds one row per (user, initial mood, target
+mood) with a count and the last time that pair was recorded. Writers call
+these helpers inside the same transaction as the transition insert or
+delete, so the aggregates never drift from the history table and the
+stats endpoint is a single indexed lookup.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.mood import MoodTransition, MoodTransitionStat
+
+UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+# (initial_mood_id, target_mood_id, timestamp)
+TransitionKey = Tuple[int, int, datetime]
+
+
+def _group(transitions: Iterable[TransitionKey]) -> List[Dict]:
+    """Collapse transitions into one (count, last_seen) row per mood pair."""
+    grouped: Dict[Tuple[int, int], Dict] = defaultdict(lambda: {"count": 0, "last_seen": None})
+    for initial_mood_id, target_mood_id, timestamp in transitions:
+        row = grouped[(initial_mood_id, target_mood_id)]
+        row["count"] += 1
+        if row["last_seen"] is None or timestamp > row["last_seen"]:
+            row["last_seen"] = timestamp
+    return [
+        {"initial_mood_id": initial, "target_mood_id": target, **values}
+        for (initial, target), values in grouped.items()
+    ]
+
+
+async def record_transitions(
+    db: AsyncSession,
+    user_id: int,
+    transitions: Iterable[TransitionKey]
+) -> None:
+    """Add transitions to the user's aggregates (caller commits)."""
+    rows = [{"user_id": user_id, **row} for row in _group(transitions)]
+    if not rows:
+        return
+
+    insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        for row in rows:
+            await _merge_row(db, row)
+        return
+
+    stat = MoodTransitionStat.__table__
+    stmt = insert(stat).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[stat.c.user_id, stat.c.initial_mood_id, stat.c.target_mood_id],
+        set_={
+            "count": stat.c.count + stmt.excluded.count,
+            "last_seen": case(
+                (stat.c.last_seen.is_(None), stmt.excluded.last_seen),
+                (stmt.excluded.last_seen > stat.c.last_seen, stmt.excluded.last_seen),
+                else_=stat.c.last_seen,
+            ),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def _merge_row(db: AsyncSession, row: Dict) -> None:
+    """Portable read-modify-write fallback for dialects without upsert."""
+    existing = await db.get(
+        MoodTransitionStat,
+        (row["user_id"], row["initial_mood_id"], row["target_mood_id"]),
+        with_for_update=True,
+    )
+    if existing is None:
+        db.add(MoodTransitionStat(**row))
+        await db.flush()
+        return
+    existing.count += row["count"]
+    if existing.last_seen is None or row["last_seen"] > existing.last_seen:
+        existing.last_seen = row["last_seen"]
+    await db.flush()
+
+
+async def remove_transition(db: AsyncSession, transition: MoodTransition) -> None:
+    """Remove a transition from its user's aggregates (caller commits).
+
+    Must be called after the transition row itself has been deleted and
+    flushed, so that last_seen can be recomputed from the remaining rows.
+    """
+    key = (
+        MoodTransitionStat.user_id == transition.user_id,
+        MoodTransitionStat.initial_mood_id == transition.initial_mood_id,
+        MoodTransitionStat.target_mood_id == transition.target_mood_id,
+    )
+    await db.execute(
+        update(MoodTransitionStat)
+        .where(*key)
+        .values(count=MoodTransitionStat.count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        delete(MoodTransitionStat)
+        .where(*key, MoodTransitionStat.count <= 0)
+        .execution_options(synchronize_session=False)
+    )
+
+    # Only deleting the newest transition of a pair moves last_seen back
+    last_seen = await db.scalar(select(MoodTransitionStat.last_seen).where(*key))
+    if last_seen is not None and transition.timestamp >= last_seen:
+        newest = await db.scalar(
+            select(func.max(MoodTransition.timestamp)).where(
+                MoodTransition.user_id == transition.user_id,
+                MoodTransition.initial_mood_id == transition.initial_mood_id,
+                MoodTransition.target_mood_id == transition.target_mood_id,
+            )
+        )
+        await db.execute(
+            update(MoodTransitionStat)
+            .where(*key)
+            .values(last_seen=newest)
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,67 @@
+"""
+Time adding long track lists to a playlist in chunks of 100.
+
+Adds synthetic track lists of several lengths to playlists on the fake
+Spotify server, once in order (one chunk after another) and once
+unordered (several chunks in flight), checks what the server received
+and reports total and per-chunk timing::
+
+    python -m benchmarks.bench_add_items --latency 0.1 --tracks 100 350 800
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.services.spotify_client import AsyncSpotify
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+
+async def run(args, server):
+    results = []
+    async with httpx.AsyncClient(base_url=server.url) as client:
+        spotify = AsyncSpotify("fake-token", http_client=client)
+        for count in args.tracks:
+            uris = [f"spotify:track:bench-{i}" for i in range(count)]
+            for ordered in (True, False):
+                playlist = await spotify.user_playlist_create("fake-user", f"bench {count}")
+                start = time.perf_counter()
+                chunks = await spotify.playlist_add_items_chunked(
+                    playlist["id"], uris, ordered=ordered, max_concurrency=args.concurrency
+                )
+                elapsed = time.perf_counter() - start
+
+                added = server.playlists[playlist["id"]]
+                assert sorted(added) == sorted(uris), "every track should be added once"
+                if ordered:
+                    assert added == uris, "ordered adds should keep the track order"
+                results.append((count, ordered, elapsed, chunks))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per Spotify call")
+    parser.add_argument("--tracks", type=int, nargs="+", default=[100, 350, 800])
+    parser.add_argument("--concurrency", type=int, default=settings.SPOTIFY_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    server = FakeSpotifyServer(latency=args.latency).start()
+    results = asyncio.run(run(args, server))
+    server.stop()
+
+    print(f"Spotify latency: {args.latency * 1000:.0f} ms per call, "
+          f"up to {args.concurrency} unordered chunks in flight")
+    for count, ordered, elapsed, chunks in results:
+        per_chunk = [c["seconds"] for c in chunks]
+        print(f"  {count:5d} tracks {'ordered' if ordered else 'unordered':9}: "
+              f"{elapsed * 1000:7.1f} ms total, {len(chunks)} chunks, "
+              f"{statistics.mean(per_chunk) * 1000:6.1f} ms mean / "
+              f"{max(per_chunk) * 1000:6.1f} ms max per chunk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare request throughput with the sync and async database engines.
+
+Starts the API under uvicorn once with ``DATABASE_ASYNC=false`` and once
+with ``DATABASE_ASYNC=true`` against the same database, then drives the
+mood, transition and stats endpoints with concurrent clients::
+
+    python -m benchmarks.bench_db_modes --duration 5 --concurrency 32
+    python -m benchmarks.bench_db_modes --database-url postgresql://...
+
+Without ``--database-url`` a throwaway SQLite file is used.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import tempfile
+
+from benchmarks.common import AppServer, format_result, prepare_database, register_and_login, run_load
+
+
+def scenarios(mood_ids):
+    ids = list(mood_ids.values())
+    pairs = itertools.cycle(itertools.permutations(ids, 2))
+
+    def create(client):
+        initial, target = next(pairs)
+        return client.post("/api/v1/transitions/", json={
+            "initial_mood_id": initial, "target_mood_id": target,
+        })
+
+    return {
+        "GET /moods": lambda client: client.get("/api/v1/moods/"),
+        "POST /transitions": create,
+        "GET /transitions": lambda client: client.get("/api/v1/transitions/?limit=20"),
+        "GET /transitions/stats/common": lambda client: client.get("/api/v1/transitions/stats/common"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_db_modes.db"
+    mood_ids = prepare_database(database_url)
+
+    for mode in ("false", "true"):
+        env = {"DATABASE_URL": database_url, "DATABASE_ASYNC": mode}
+        with AppServer(env) as server:
+            token = register_and_login(server.url, f"bench-{mode}")
+            headers = {"Authorization": f"Bearer {token}"}
+            print(f"DATABASE_ASYNC={mode} (concurrency {args.concurrency}, {args.duration}s each)")
+            for name, send in scenarios(mood_ids).items():
+                result = asyncio.run(run_load(
+                    send, server.url, args.concurrency, args.duration, headers
+                ))
+                print(format_result(name, result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Check that slow Spotify calls do not stall unrelated requests.
+
+Boots the application in-process on a throwaway SQLite database, points
+the Spotify client at the fake Spotify server, and measures ``GET /moods``
+latency while idle and while several slow playlist creations are in
+flight::
+
+    python -m benchmarks.bench_event_loop --latency 0.5 --playlists 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_event_loop.db"
+)
+
+import httpx
+
+from app.api.dependencies import get_spotify_client
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.mood import Mood, MoodTransition
+from app.services.spotify_client import AsyncSpotify
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+
+def seed_database() -> dict:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        sad = db.query(Mood).filter(Mood.name == "Sad").first() or Mood(name="Sad", color="#4169E1")
+        happy = db.query(Mood).filter(Mood.name == "Happy").first() or Mood(name="Happy", color="#FFD700")
+        db.add_all([sad, happy])
+        db.commit()
+        transition = MoodTransition(initial_mood_id=sad.id, target_mood_id=happy.id)
+        db.add(transition)
+        db.commit()
+        return {
+            "initial_mood_id": sad.id,
+            "target_mood_id": happy.id,
+            "transition_id": transition.id,
+        }
+    finally:
+        db.close()
+
+
+async def measure_moods(client: httpx.AsyncClient, samples: int) -> list:
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        response = await client.get("/api/v1/moods/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+def summarize(label: str, latencies: list):
+    print(f"  {label:<22} p50 {statistics.median(latencies) * 1000:7.1f} ms"
+          f"   max {max(latencies) * 1000:7.1f} ms")
+
+
+async def run(args, spotify_url: str, playlist_request: dict):
+    spotify_http = httpx.AsyncClient(base_url=spotify_url)
+    app.dependency_overrides[get_spotify_client] = lambda: AsyncSpotify(
+        "fake-token", http_client=spotify_http
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        idle = await measure_moods(client, args.samples)
+
+        playlists = [
+            asyncio.create_task(client.post("/api/v1/spotify/create-playlist", json=playlist_request))
+            for _ in range(args.playlists)
+        ]
+        await asyncio.sleep(args.latency / 2)
+        busy = await measure_moods(client, args.samples)
+        responses = await asyncio.gather(*playlists)
+
+    await spotify_http.aclose()
+    app.dependency_overrides.clear()
+
+    failed = [r for r in responses if r.status_code != 200]
+    print(f"Spotify latency {args.latency * 1000:.0f} ms, "
+          f"{args.playlists} concurrent playlist creations ({len(failed)} failed)")
+    summarize("GET /moods idle", idle)
+    summarize("GET /moods under load", busy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per Spotify call")
+    parser.add_argument("--playlists", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+
+    playlist_request = seed_database()
+    server = FakeSpotifyServer(latency=args.latency).start()
+    try:
+        asyncio.run(run(args, server.url, playlist_request))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measure the track feature index: build time, size and path query latency.
+
+Builds a ``FeatureIndex`` over synthetic tracks with uniformly random
+audio features, then times transition-path queries and reports how far
+the picked tracks stray from the ideal straight-line path::
+
+    python -m benchmarks.bench_feature_index --tracks 100000 --steps 6
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.feature_index import FeatureIndex, _to_space, mood_point
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, default=100_000)
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+    features = rng.random((args.tracks, 4), dtype=np.float32)
+    features[:, 2] = 60 + features[:, 2] * 120  # tempo in BPM
+    uris = [f"spotify:track:{i}" for i in range(args.tracks)]
+
+    start = time.perf_counter()
+    index = FeatureIndex(uris, features)
+    build_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "index.npz")
+        index.save(path)
+        file_bytes = os.path.getsize(path)
+        start = time.perf_counter()
+        FeatureIndex.load(path)
+        load_seconds = time.perf_counter() - start
+
+    by_uri = {uri: i for i, uri in enumerate(uris)}
+    start_point, end_point = mood_point("Sad"), mood_point("Happy")
+    ideal = _to_space([
+        np.array(start_point) + t * (np.array(end_point) - np.array(start_point))
+        for t in np.arange(1, args.steps + 1) / (args.steps + 1)
+    ])
+
+    latencies, errors = [], []
+    for _ in range(args.queries):
+        t0 = time.perf_counter()
+        picked = index.path(start_point, end_point, args.steps)
+        latencies.append(time.perf_counter() - t0)
+        chosen = index.features[[by_uri[uri] for uri in picked]]
+        errors.append(float(np.linalg.norm(chosen - ideal, axis=1).mean()))
+
+    print(f"{args.tracks} tracks, {args.steps} steps per path")
+    print(f"  build:  {build_seconds * 1000:8.1f} ms, {index.nbytes / 1e6:.1f} MB in memory")
+    print(f"  file:   {file_bytes / 1e6:8.1f} MB compressed, loads in {load_seconds * 1000:.1f} ms")
+    print(f"  path:   {statistics.mean(latencies) * 1000:8.2f} ms mean, "
+          f"p95 {sorted(latencies)[int(len(latencies) * 0.95)] * 1000:.2f} ms")
+    print(f"  error:  {statistics.mean(errors):8.4f} mean distance from the ideal path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare OFFSET and keyset (cursor) pagination over a long history.
+
+Seeds one user with a few million synthetic transitions and times the
+``GET /transitions`` query at increasing depths in both modes::
+
+    python -m benchmarks.bench_pagination --rows 3000000
+    python -m benchmarks.bench_pagination --database-url postgresql://...
+
+OFFSET latency grows with depth while cursor latency stays constant,
+because the keyset query seeks straight into the
+(user_id, timestamp, id) index.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db.queries import user_transitions
+from app.models.mood import MoodTransition
+from app.models.user import User
+from benchmarks.common import prepare_database
+
+CHUNK = 50_000
+
+
+def seed(engine, rows: int, mood_ids: list) -> int:
+    with Session(engine) as db:
+        user = User(username=f"pagination-{time.time_ns()}", email=f"{time.time_ns()}@example.com",
+                    hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    table = MoodTransition.__table__
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, CHUNK):
+            conn.execute(table.insert(), [
+                {
+                    "user_id": user_id,
+                    "initial_mood_id": random.choice(mood_ids),
+                    "target_mood_id": random.choice(mood_ids),
+                    "timestamp": start + timedelta(seconds=i * 7),
+                }
+                for i in range(offset, min(rows, offset + CHUNK))
+            ])
+    return user_id
+
+
+def timed(db: Session, query, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        db.scalars(query).unique().all()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_pagination.db"
+    mood_ids = list(prepare_database(database_url).values())
+    engine = create_engine(database_url)
+
+    started = time.perf_counter()
+    user_id = seed(engine, args.rows, mood_ids)
+    print(f"Seeded {args.rows:,} transitions in {time.perf_counter() - started:.1f}s")
+
+    depths = [0, 1_000, 10_000, 100_000, 1_000_000, args.rows - args.page_size]
+    depths = sorted({d for d in depths if 0 <= d <= args.rows - args.page_size})
+
+    print(f"{'depth':>12} {'offset ms':>12} {'cursor ms':>12}")
+    with Session(engine) as db:
+        for depth in depths:
+            offset_query = user_transitions(user_id).offset(depth).limit(args.page_size)
+
+            # Position of the row just before the page, as a client cursor would hold
+            before = None
+            if depth:
+                row = db.execute(
+                    select(MoodTransition.timestamp, MoodTransition.id)
+                    .where(MoodTransition.user_id == user_id)
+                    .order_by(MoodTransition.timestamp.desc(), MoodTransition.id.desc())
+                    .offset(depth - 1).limit(1)
+                ).one()
+                before = (row.timestamp, row.id)
+            cursor_query = user_transitions(user_id, before=before).limit(args.page_size)
+
+            print(f"{depth:>12,} {timed(db, offset_query, args.repeats):>12.2f} "
+                  f"{timed(db, cursor_query, args.repeats):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
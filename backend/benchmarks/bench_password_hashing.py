@@ -0,0 +1,81 @@
+"""
+Measure login throughput and event-loop stalls from bcrypt checks.
+
+Runs a burst of concurrent password checks, first inline on the event
+loop (as the login handler used to) and then through the hashing thread
+pool with an increasing number of threads. Reports logins per second and
+the longest stall seen by a task ticking every 10 ms alongside them.
+Throughput through the pool should grow with the thread count up to the
+number of CPU cores::
+
+    PASSWORD_BCRYPT_ROUNDS=12 python -m benchmarks.bench_password_hashing --logins 64
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.core.config import settings
+from app.models.user import pwd_context
+from app.services.password_hasher import PasswordHasher
+
+TICK = 0.01
+
+
+async def max_stall(stop):
+    """Longest gap beyond ``TICK`` between ticks until ``stop`` is set."""
+    worst = 0.0
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - before - TICK)
+    return worst
+
+
+async def run(hashed, logins, workers):
+    """Check ``logins`` passwords concurrently; ``workers=0`` checks inline."""
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(max_stall(stop))
+    await asyncio.sleep(TICK * 2)
+
+    start = time.perf_counter()
+    if workers:
+        hasher = PasswordHasher(workers=workers, max_queue=logins)
+        results = await asyncio.gather(
+            *(hasher.verify_and_update("correct horse", hashed) for _ in range(logins))
+        )
+        hasher.shutdown()
+        assert all(valid for valid, _ in results)
+    else:
+        async def inline():
+            assert pwd_context.verify("correct horse", hashed)
+        await asyncio.gather(*(inline() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    return elapsed, await ticker
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument(
+        "--workers", type=int, nargs="+",
+        default=sorted({1, 2, 4, cores, cores * 2}),
+        help="thread pool sizes to try",
+    )
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash("correct horse")
+    print(f"bcrypt cost {settings.PASSWORD_BCRYPT_ROUNDS}, {cores} CPU cores, "
+          f"{args.logins} concurrent logins")
+    for workers in [0] + args.workers:
+        elapsed, stall = asyncio.run(run(hashed, args.logins, workers))
+        label = "inline" if workers == 0 else f"{workers} thread{'s' if workers > 1 else ''}"
+        print(f"  {label:10}: {args.logins / elapsed:7.1f} logins/s, "
+              f"longest event-loop stall {stall * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
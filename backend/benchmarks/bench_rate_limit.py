@@ -0,0 +1,139 @@
+"""
+Exercise the Spotify call scheduler against a rate-limited fake server.
+
+Starts the fake Spotify server with a per-second call limit, then fires
+a burst of concurrent transition playlists (interactive) while a
+background client searches continuously, once without the scheduler and
+once with it. Reports 429 responses, failed playlists, interactive
+latency and background throughput, then checks that identical in-flight
+searches are coalesced::
+
+    python -m benchmarks.bench_rate_limit --limit 20 --playlists 30
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.api.endpoints import spotify as spotify_endpoints
+from app.core.config import settings
+from app.services import spotify_client
+from app.services.mood_features import MOOD_FEATURES
+from app.services.spotify_client import AsyncSpotify, SpotifyAPIError
+from app.services.spotify_scheduler import BACKGROUND, SpotifyScheduler
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+MOOD_NAMES = list(MOOD_FEATURES)
+
+
+async def background_searches(client, stop):
+    """Keep searching at background priority until ``stop`` is set."""
+    spotify = AsyncSpotify("background-token", http_client=client, priority=BACKGROUND)
+    done = 0
+    for i in itertools.count():
+        if stop.is_set():
+            return done
+        try:
+            await spotify.search(f"genre:background-{i}", limit=50)
+            done += 1
+        except SpotifyAPIError:
+            await asyncio.sleep(0.1)
+
+
+async def run(args, server, paced):
+    settings.SPOTIFY_RATE_LIMIT_ENABLED = paced
+    settings.SPOTIFY_COALESCE_REQUESTS = paced
+    scheduler = SpotifyScheduler(rate=args.limit * 0.9, burst=args.limit, min_rate=1.0)
+    spotify_client.spotify_scheduler = scheduler
+
+    pairs = list(itertools.permutations(MOOD_NAMES, 2))
+    rng = random.Random(args.seed)
+    throttled_before = server.throttled
+
+    async def playlist(spotify):
+        initial, target = rng.choice(pairs)
+        start = time.perf_counter()
+        try:
+            await spotify_endpoints.get_mood_transition_tracks_concurrent(
+                spotify, SimpleNamespace(name=initial), SimpleNamespace(name=target)
+            )
+        except SpotifyAPIError:
+            return None
+        return time.perf_counter() - start
+
+    async with httpx.AsyncClient(base_url=server.url) as client:
+        spotify = AsyncSpotify("fake-token", http_client=client)
+        stop = asyncio.Event()
+        background = asyncio.create_task(background_searches(client, stop))
+        await asyncio.sleep(1.0)  # let the background client use up the quota
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(playlist(spotify) for _ in range(args.playlists)))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        background_done = await background
+
+    timings = [r for r in results if r is not None]
+    return {
+        "throttled": server.throttled - throttled_before,
+        "failed": len(results) - len(timings),
+        "timings": timings,
+        "elapsed": elapsed,
+        "background": background_done,
+        "scheduler": scheduler.snapshot(),
+    }
+
+
+async def coalescing(server):
+    settings.SPOTIFY_RATE_LIMIT_ENABLED = True
+    settings.SPOTIFY_COALESCE_REQUESTS = True
+    scheduler = SpotifyScheduler(rate=1000, burst=1000, min_rate=1.0)
+    spotify_client.spotify_scheduler = scheduler
+
+    before = len(server.requests)
+    async with httpx.AsyncClient(base_url=server.url) as client:
+        spotify = AsyncSpotify("fake-token", http_client=client)
+        await asyncio.gather(*(spotify.search("genre:rock", limit=50) for _ in range(20)))
+    return len(server.requests) - before, scheduler.coalesced.value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per Spotify call")
+    parser.add_argument("--limit", type=int, default=20, help="calls per second before 429")
+    parser.add_argument("--playlists", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    settings.TRACK_CACHE_ENABLED = False
+    settings.SPOTIFY_MAX_RETRY_AFTER = 30.0
+    server = FakeSpotifyServer(latency=args.latency, rate_limit=args.limit).start()
+
+    print(f"Fake Spotify allows {args.limit} calls/s, {args.latency * 1000:.0f} ms per call; "
+          f"{args.playlists} concurrent playlists plus a background client")
+    for paced in (False, True):
+        result = asyncio.run(run(args, server, paced))
+        timings = sorted(result["timings"]) or [0.0]
+        print(f"  {'scheduler' if paced else 'unpaced':9}: {result['throttled']:4d} x 429, "
+              f"{result['failed']:2d} failed, "
+              f"p50 {statistics.median(timings):5.2f} s, max {timings[-1]:5.2f} s, "
+              f"burst done in {result['elapsed']:5.2f} s, "
+              f"{result['background']} background searches")
+        if paced:
+            snapshot = result["scheduler"]
+            print(f"             sent {snapshot['sent']}, coalesced {snapshot['coalesced']}, "
+                  f"final rate {snapshot['rate_per_second']}/s")
+
+    calls, coalesced = asyncio.run(coalescing(server))
+    print(f"  coalescing: 20 identical concurrent searches made {calls} call(s), {coalesced} coalesced")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
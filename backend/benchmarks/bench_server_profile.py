@@ -0,0 +1,89 @@
+"""
+Compare the development server command with the production profile.
+
+Starts the API three ways against the same database and measures cold
+start (launch until the first response, the median of ``--starts``
+launches) and throughput on a cheap, a database-backed and a CPU-bound
+endpoint::
+
+    python -m benchmarks.bench_server_profile --duration 10 --concurrency 64
+    python -m benchmarks.bench_server_profile --workers 4 --database-url postgresql://...
+
+- dev: the old container command, one ``uvicorn --reload`` process on
+  the asyncio loop and the h11 parser.
+- single: ``gunicorn.conf.py`` with one worker, to separate the uvloop
+  and httptools gains from the extra processes.
+- production: ``gunicorn.conf.py`` with ``--workers`` workers, one per
+  available CPU by default.
+
+Without ``--database-url`` a throwaway SQLite file is used.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+
+from app.core.server import available_cpus
+from benchmarks.common import AppServer, format_result, prepare_database, register_and_login, run_load
+
+UVICORN_DEV = [
+    sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", "{port}",
+    "--reload", "--loop", "asyncio", "--http", "h11", "--log-level", "warning",
+]
+GUNICORN = [
+    sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "--bind", "127.0.0.1:{port}",
+    "--log-level", "warning", "app.main:app",
+]
+
+
+def scenarios():
+    return {
+        "GET /moods": lambda client: client.get("/api/v1/moods/"),
+        "GET /transitions": lambda client: client.get("/api/v1/transitions/?limit=20"),
+        "POST /auth/login": lambda client: client.post("/api/v1/auth/login", data={
+            "username": "bench-profile", "password": "benchmark",
+        }),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--workers", type=int, default=available_cpus())
+    parser.add_argument("--starts", type=int, default=5, help="launches per profile for cold start")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_server_profile.db"
+    prepare_database(database_url)
+    env = {"DATABASE_URL": database_url, "TRACK_POOL_REFRESH_ENABLED": "false"}
+
+    profiles = {
+        "dev": (UVICORN_DEV, {}),
+        "single": (GUNICORN, {"SERVER_WORKERS": "1"}),
+        f"production ({args.workers} workers)": (GUNICORN, {"SERVER_WORKERS": str(args.workers)}),
+    }
+    print(f"Concurrency {args.concurrency}, {args.duration}s per scenario, "
+          f"{available_cpus()} CPUs available")
+    for name, (command, extra) in profiles.items():
+        startups = []
+        for _ in range(args.starts):
+            with AppServer({**env, **extra}, command) as server:
+                startups.append(server.startup_seconds)
+
+        with AppServer({**env, **extra}, command) as server:
+            token = register_and_login(server.url, "bench-profile")
+            headers = {"Authorization": f"Bearer {token}"}
+            print(f"{name}: cold start {statistics.median(startups) * 1000:.0f} ms "
+                  f"(min {min(startups) * 1000:.0f}, max {max(startups) * 1000:.0f})")
+            for scenario, send in scenarios().items():
+                result = asyncio.run(run_load(
+                    send, server.url, args.concurrency, args.duration, headers
+                ))
+                print(format_result(scenario, result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Benchmark the API hot paths and write the results as JSON.
+
+Seeds a database with synthetic users and a large mood transition
+history, starts ``app.main:app`` under uvicorn against it with the fake
+Spotify server behind it, then drives each scenario with concurrent
+clients for a fixed time and records throughput and p50/p99 latency::
+
+    python -m benchmarks.bench_suite --transitions 2000000
+    python -m benchmarks.bench_suite --postgres --spotify-latency 0.1
+    python -m benchmarks.bench_suite --compare benchmarks/results/suite-<old>.json
+
+The database is a throwaway SQLite file unless ``--database-url`` or
+``--postgres`` (a temporary cluster started with initdb) is given.
+Seeding uses a fixed random seed, so two runs with the same arguments
+benchmark the same data. Results, together with the commit, machine and
+arguments, are written to ``benchmarks/results/`` for comparison with
+``--compare``.
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from jose import jwt
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.mood import MoodTransition
+from app.models.spotify import SpotifyToken
+from app.models.user import User
+from benchmarks.common import (
+    BACKEND_DIR,
+    AppServer,
+    EphemeralPostgres,
+    format_result,
+    prepare_database,
+    run_load,
+)
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+USERNAME_PREFIX = "bench-user-"
+PASSWORD = "benchmark"
+CHUNK = 50_000
+
+# Same aggregate the stats migration backfills from the history
+STATS_BACKFILL = """
+    INSERT INTO mood_transition_stats
+        (user_id, initial_mood_id, target_mood_id, count, last_seen)
+    SELECT user_id, initial_mood_id, target_mood_id, COUNT(*), MAX(timestamp)
+    FROM mood_transitions
+    GROUP BY user_id, initial_mood_id, target_mood_id
+"""
+
+
+def seed(database_url: str, users: int, transitions: int, mood_ids: List[int],
+         rounds: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Insert users with Spotify tokens and their transition history."""
+    engine = create_engine(database_url)
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(PASSWORD)
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"username": f"{USERNAME_PREFIX}{i}", "email": f"{USERNAME_PREFIX}{i}@example.com",
+             "hashed_password": hashed, "is_active": True}
+            for i in range(users)
+        ])
+        accounts = [
+            {"id": row.id, "username": row.username}
+            for row in conn.execute(
+                select(User.id, User.username)
+                .where(User.username.startswith(USERNAME_PREFIX))
+                .order_by(User.id)
+            )
+        ]
+        conn.execute(SpotifyToken.__table__.insert(), [
+            {"user_id": account["id"], "access_token": f"bench-{account['id']}",
+             "refresh_token": "bench", "expires_at": datetime.utcnow() + timedelta(days=30),
+             "updated_at": datetime.utcnow()}
+            for account in accounts
+        ])
+
+        user_ids = [account["id"] for account in accounts]
+        start = datetime(2020, 1, 1)
+        for offset in range(0, transitions, CHUNK):
+            conn.execute(MoodTransition.__table__.insert(), [
+                {
+                    "user_id": rng.choice(user_ids),
+                    "initial_mood_id": rng.choice(mood_ids),
+                    "target_mood_id": rng.choice(mood_ids),
+                    "timestamp": start + timedelta(seconds=i * 7),
+                }
+                for i in range(offset, min(transitions, offset + CHUNK))
+            ])
+        conn.execute(text("DELETE FROM mood_transition_stats"))
+        conn.execute(text(STATS_BACKFILL))
+    engine.dispose()
+    return accounts
+
+
+def load_accounts(database_url: str) -> List[Dict[str, Any]]:
+    """Users seeded by an earlier run, for ``--no-seed``."""
+    engine = create_engine(database_url)
+    with Session(engine) as db:
+        accounts = [
+            {"id": user.id, "username": user.username}
+            for user in db.scalars(
+                select(User).where(User.username.startswith(USERNAME_PREFIX)).order_by(User.id)
+            )
+        ]
+    engine.dispose()
+    if not accounts:
+        raise SystemExit("No benchmark users in the database; run without --no-seed first")
+    return accounts
+
+
+def any_transition_id(database_url: str) -> int:
+    engine = create_engine(database_url)
+    with Session(engine) as db:
+        transition_id = db.scalar(select(func.min(MoodTransition.id)))
+    engine.dispose()
+    return transition_id
+
+
+def bearer(secret: str, account: Dict[str, Any]) -> Dict[str, str]:
+    """Headers with an access token the server will accept for ``account``."""
+    token = jwt.encode(
+        {"sub": account["username"], "uid": account["id"],
+         "exp": datetime.utcnow() + timedelta(days=1)},
+        secret, algorithm=settings.ALGORITHM,
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def scenarios(accounts, secret, mood_ids, transition_id) -> Dict[str, Callable]:
+    """Request factories by scenario name; authenticated ones rotate users."""
+    auth = itertools.cycle([bearer(secret, account) for account in accounts])
+    logins = itertools.cycle(accounts)
+    pairs = itertools.cycle(itertools.permutations(mood_ids, 2))
+
+    def login(client):
+        return client.post("/api/v1/auth/login", data={
+            "username": next(logins)["username"], "password": PASSWORD,
+        })
+
+    def create_transition(client):
+        initial, target = next(pairs)
+        return client.post("/api/v1/transitions/", headers=next(auth), json={
+            "initial_mood_id": initial, "target_mood_id": target,
+        })
+
+    def create_playlist(client):
+        initial, target = next(pairs)
+        return client.post("/api/v1/spotify/create-playlist", headers=next(auth), json={
+            "initial_mood_id": initial, "target_mood_id": target, "transition_id": transition_id,
+        })
+
+    return {
+        "login": login,
+        "moods": lambda client: client.get("/api/v1/moods/"),
+        "create_transition": create_transition,
+        "list_transitions": lambda client: client.get(
+            "/api/v1/transitions/?limit=20", headers=next(auth)
+        ),
+        "stats_common": lambda client: client.get(
+            "/api/v1/transitions/stats/common", headers=next(auth)
+        ),
+        "create_playlist": create_playlist,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: Dict[str, Dict], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"Compared with {baseline['meta']['commit']} ({baseline_path}):")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if not before or not before["rps"]:
+            continue
+        rps = (result["rps"] / before["rps"] - 1) * 100
+        p99 = (result["p99_ms"] / before["p99_ms"] - 1) * 100 if before["p99_ms"] else 0.0
+        print(f"  {name:<28} throughput {rps:+6.1f}%   p99 {p99:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--database-url", default=None)
+    target.add_argument("--postgres", action="store_true", help="start a temporary PostgreSQL cluster")
+    parser.add_argument("--async-db", action="store_true", help="run the server with DATABASE_ASYNC")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--transitions", type=int, default=2_000_000)
+    parser.add_argument("--no-seed", action="store_true", help="reuse users seeded by an earlier run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bcrypt-rounds", type=int, default=settings.PASSWORD_BCRYPT_ROUNDS)
+    parser.add_argument("--spotify-latency", type=float, default=0.05, help="seconds per Spotify call")
+    parser.add_argument("--spotify-rate-limit", action="store_true",
+                        help="keep the outbound Spotify scheduler on")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", nargs="+", default=None, help="only run these scenarios")
+    parser.add_argument("--output", default=None, help="JSON results path")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare with")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        if args.postgres:
+            database_url = stack.enter_context(EphemeralPostgres()).url
+        else:
+            database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_suite.db"
+
+        mood_ids = list(prepare_database(database_url).values())
+        started = time.perf_counter()
+        if args.no_seed:
+            accounts = load_accounts(database_url)
+            print(f"Reusing {len(accounts)} seeded users")
+        else:
+            accounts = seed(database_url, args.users, args.transitions, mood_ids,
+                            args.bcrypt_rounds, random.Random(args.seed))
+            print(f"Seeded {len(accounts)} users and {args.transitions:,} transitions "
+                  f"in {time.perf_counter() - started:.1f}s")
+        seed_seconds = time.perf_counter() - started
+
+        spotify = FakeSpotifyServer(latency=args.spotify_latency).start()
+        stack.callback(spotify.stop)
+
+        secret = secrets.token_urlsafe(32)
+        env = {
+            "DATABASE_URL": database_url,
+            "DATABASE_ASYNC": str(args.async_db).lower(),
+            "SECRET_KEY": secret,
+            "PASSWORD_BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+            "SPOTIFY_API_URL": spotify.url,
+            "SPOTIFY_TOKEN_URL": spotify.token_url,
+            "SPOTIFY_CLIENT_ID": "bench",
+            "SPOTIFY_CLIENT_SECRET": "bench",
+            "SPOTIFY_RATE_LIMIT_ENABLED": str(args.spotify_rate_limit).lower(),
+            "TRACK_POOL_REFRESH_ENABLED": "false",
+        }
+        server = stack.enter_context(AppServer(env))
+
+        selected = scenarios(accounts, secret, mood_ids, any_transition_id(database_url))
+        if args.scenarios:
+            selected = {name: selected[name] for name in args.scenarios}
+
+        print(f"Concurrency {args.concurrency}, {args.duration}s per scenario, "
+              f"Spotify latency {args.spotify_latency * 1000:.0f} ms")
+        results = {}
+        for name, send in selected.items():
+            results[name] = asyncio.run(run_load(send, server.url, args.concurrency, args.duration))
+            print(format_result(name, results[name]))
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database": database_url.split(":", 1)[0],
+            "server_startup_seconds": server.startup_seconds,
+            "seed_seconds": seed_seconds,
+            # The database URL may carry credentials
+            "arguments": {
+                k: v for k, v in vars(args).items() if k not in ("database_url", "output", "compare")
+            },
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"suite-{commit}-{datetime.utcnow():%Y%m%d%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
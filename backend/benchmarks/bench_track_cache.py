@@ -0,0 +1,101 @@
+"""
+Measure the Spotify calls saved by the track-candidate cache.
+
+Generates a stream of transition playlists for random mood pairs against
+the fake Spotify server, once without the cache and once per cache
+backend (in-process LRU, and Redis through the local fake Redis server),
+and reports Spotify search calls, mean generation time and hit rate::
+
+    python -m benchmarks.bench_track_cache --latency 0.05 --playlists 200
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.api.endpoints import spotify as spotify_endpoints
+from app.core.config import settings
+from app.services.mood_features import MOOD_FEATURES
+from app.services.spotify_client import AsyncSpotify
+from app.services.track_cache import (
+    MemoryTrackPoolBackend,
+    RedisTrackPoolBackend,
+    TrackPoolCache,
+)
+from benchmarks.fake_redis import FakeRedisServer
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+MOOD_NAMES = list(MOOD_FEATURES)
+
+
+async def run(args, server, cache):
+    settings.TRACK_CACHE_ENABLED = cache is not None
+    if cache is not None:
+        spotify_endpoints.track_cache = cache
+
+    pairs = list(itertools.permutations(MOOD_NAMES, 2))
+    rng = random.Random(args.seed)
+    timings = []
+    before = len(server.requests)
+    async with httpx.AsyncClient(base_url=server.url) as client:
+        spotify = AsyncSpotify("fake-token", http_client=client)
+        for _ in range(args.playlists):
+            initial, target = rng.choice(pairs)
+            start = time.perf_counter()
+            await spotify_endpoints.get_mood_transition_tracks_concurrent(
+                spotify, SimpleNamespace(name=initial), SimpleNamespace(name=target)
+            )
+            timings.append(time.perf_counter() - start)
+
+    searches = sum(1 for _, path in server.requests[before:] if path.startswith("/v1/search"))
+    snapshot = cache.snapshot() if cache is not None else {}
+    if cache is not None:
+        await cache.close()
+    return timings, searches, snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per Spotify call")
+    parser.add_argument("--playlists", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    spotify_server = FakeSpotifyServer(latency=args.latency).start()
+    redis_server = FakeRedisServer().start()
+
+    variants = {
+        "no cache": lambda: None,
+        "memory LRU": lambda: TrackPoolCache(
+            MemoryTrackPoolBackend(settings.TRACK_CACHE_MAX_ENTRIES),
+            settings.TRACK_CACHE_TTL_SECONDS,
+            settings.TRACK_CACHE_POOL_SIZE,
+        ),
+        "redis": lambda: TrackPoolCache(
+            RedisTrackPoolBackend.from_url(redis_server.url),
+            settings.TRACK_CACHE_TTL_SECONDS,
+            settings.TRACK_CACHE_POOL_SIZE,
+        ),
+    }
+
+    print(f"Spotify latency: {args.latency * 1000:.0f} ms per call, "
+          f"{args.playlists} playlists")
+    for name, make_cache in variants.items():
+        random.seed(args.seed)
+        timings, searches, snapshot = asyncio.run(run(args, spotify_server, make_cache()))
+        hit_rate = snapshot.get("hit_rate")
+        print(f"  {name:<10}: {statistics.mean(timings) * 1000:7.1f} ms mean, "
+              f"{searches:5d} Spotify searches"
+              + (f", hit rate {hit_rate:.1%}" if hit_rate is not None else ""))
+
+    redis_server.stop()
+    spotify_server.stop()
+
+
+if __name__ == "__main__":
+    main()
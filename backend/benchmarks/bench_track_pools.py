@@ -0,0 +1,110 @@
+"""
+Compare live track selection with selection from precomputed pools.
+
+Refreshes the mood track pools from the fake Spotify server into a
+scratch database, then times building transition playlists from the
+local pools against the concurrent live-search path::
+
+    python -m benchmarks.bench_track_pools --latency 0.1 --runs 20
+    TRACK_INDEX_ENABLED=true python -m benchmarks.bench_track_pools
+
+With ``TRACK_INDEX_ENABLED`` both paths take their middle section from
+the feature index instead of Spotify recommendations.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+async def run(args, server):
+    import httpx
+
+    from app.api.endpoints.spotify import (
+        get_mood_transition_tracks_concurrent,
+        get_mood_transition_tracks_from_pools,
+    )
+    from app.core.config import settings
+    from app.db.session import async_session_scope
+    from app.services.feature_index import feature_index
+    from app.services.mood_cache import mood_cache
+    from app.services.spotify_client import AsyncSpotify, request_app_token
+    from app.services.track_pools import refresh_pools
+
+    settings.TRACK_CACHE_ENABLED = False
+
+    async with httpx.AsyncClient(base_url=server.url) as client:
+        token = await request_app_token(client)
+        spotify = AsyncSpotify(token["access_token"], http_client=client)
+
+        start = time.perf_counter()
+        sizes = await refresh_pools(spotify, force=True)
+        refresh_seconds = time.perf_counter() - start
+
+        live, pooled = [], []
+        async with async_session_scope() as db:
+            initial_mood = await mood_cache.get_by_name(db, "Sad")
+            target_mood = await mood_cache.get_by_name(db, "Happy")
+            index = await feature_index.get() if settings.TRACK_INDEX_ENABLED else None
+            before = len(server.requests)
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                await get_mood_transition_tracks_concurrent(
+                    spotify, initial_mood, target_mood, index=index
+                )
+                live.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                tracks = await get_mood_transition_tracks_from_pools(
+                    db, initial_mood, target_mood, index
+                )
+                pooled.append(time.perf_counter() - start)
+                assert tracks, "pools should not be empty after a refresh"
+            recommendation_calls = sum(
+                1 for _, path in server.requests[before:] if path.startswith("/v1/recommendations")
+            )
+
+    return sizes, refresh_seconds, live, pooled, recommendation_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per Spotify call")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--database-url", help="defaults to a scratch SQLite file")
+    args = parser.parse_args()
+
+    scratch = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{scratch.name}/pools.db"
+
+    from benchmarks.fake_spotify import FakeSpotifyServer
+
+    server = FakeSpotifyServer(latency=args.latency).start()
+    # Settings are read at import time, so configure them before importing the app
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "SPOTIFY_API_URL": server.url,
+        "SPOTIFY_TOKEN_URL": server.token_url,
+        "SPOTIFY_CLIENT_ID": "bench",
+        "SPOTIFY_CLIENT_SECRET": "bench",
+    })
+
+    from benchmarks.common import prepare_database
+
+    prepare_database(database_url)
+    sizes, refresh_seconds, live, pooled, recommendation_calls = asyncio.run(run(args, server))
+    server.stop()
+    scratch.cleanup()
+
+    print(f"Spotify latency: {args.latency * 1000:.0f} ms per call, {args.runs} runs")
+    print(f"  pool refresh: {refresh_seconds:.2f} s for "
+          + ", ".join(f"{name} {count}" for name, count in sizes.items()))
+    print(f"  live search:  {statistics.mean(live) * 1000:8.1f} ms mean, "
+          f"{recommendation_calls} recommendations calls")
+    print(f"  local pools:  {statistics.mean(pooled) * 1000:8.1f} ms mean")
+
+
+if __name__ == "__main__":
+    main()
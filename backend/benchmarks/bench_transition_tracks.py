@@ -0,0 +1,65 @@
+"""
+Compare sequential and concurrent track selection for a transition playlist.
+
+Runs ``get_mood_transition_tracks`` and
+``get_mood_transition_tracks_concurrent`` against the fake Spotify server
+with injected latency and reports the mean end-to-end time of each::
+
+    python -m benchmarks.bench_transition_tracks --latency 0.1 --runs 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.api.endpoints.spotify import (
+    get_mood_transition_tracks,
+    get_mood_transition_tracks_concurrent,
+)
+from app.services.spotify_client import AsyncSpotify
+from benchmarks.fake_spotify import FakeSpotifyServer
+
+
+async def run(args, server_url):
+    initial_mood = SimpleNamespace(name="Sad")
+    target_mood = SimpleNamespace(name="Happy")
+
+    sequential, concurrent = [], []
+    async with httpx.AsyncClient(base_url=server_url) as client:
+        spotify = AsyncSpotify("fake-token", http_client=client)
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            await get_mood_transition_tracks(spotify, initial_mood, target_mood)
+            sequential.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await get_mood_transition_tracks_concurrent(
+                spotify, initial_mood, target_mood, max_concurrency=args.concurrency
+            )
+            concurrent.append(time.perf_counter() - start)
+
+    return sequential, concurrent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per Spotify call")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    server = FakeSpotifyServer(latency=args.latency).start()
+    sequential, concurrent = asyncio.run(run(args, server.url))
+    server.stop()
+
+    print(f"Spotify latency: {args.latency * 1000:.0f} ms per call, {args.runs} runs")
+    print(f"  sequential: {statistics.mean(sequential) * 1000:8.1f} ms mean")
+    print(f"  concurrent: {statistics.mean(concurrent) * 1000:8.1f} ms mean "
+          f"(max {args.concurrency} in flight)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Shared helpers for the benchmark scripts."""
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.mood import Mood
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MOODS = [
+    {"name": "Angry", "color": "#FF4D4D"},
+    {"name": "Happy", "color": "#FFD700"},
+    {"name": "Sad", "color": "#4169E1"},
+    {"name": "Indifferent", "color": "#A9A9A9"},
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(database_url: str) -> Dict[str, int]:
+    """Create all tables and the mood catalog; return mood ids by name."""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        existing = {mood.name for mood in db.scalars(select(Mood))}
+        db.add_all(Mood(**mood) for mood in MOODS if mood["name"] not in existing)
+        db.commit()
+        mood_ids = {mood.name: mood.id for mood in db.scalars(select(Mood))}
+    engine.dispose()
+    return mood_ids
+
+
+class AppServer:
+    """Run ``app.main:app`` under uvicorn in a subprocess."""
+
+    def __init__(self, env: Optional[Dict[str, str]] = None, command: Optional[list] = None):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = {**os.environ, "DEBUG": "false", **(env or {})}
+        self.command = command or [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", "{port}", "--log-level", "warning",
+        ]
+        self.process = None
+        self.startup_seconds = None
+
+    def __enter__(self) -> "AppServer":
+        command = [part.replace("{port}", str(self.port)) for part in self.command]
+        start = time.perf_counter()
+        self.process = subprocess.Popen(command, cwd=BACKEND_DIR, env=self.env)
+        deadline = start + 60
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}")
+            try:
+                httpx.get(f"{self.url}/", timeout=1).raise_for_status()
+                self.startup_seconds = time.perf_counter() - start
+                return self
+            except httpx.HTTPError:
+                time.sleep(0.05)
+        self.__exit__()
+        raise RuntimeError("Server did not start within 60 seconds")
+
+    def __exit__(self, *exc_info):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class EphemeralPostgres:
+    """Throwaway PostgreSQL cluster in a temp directory, via initdb and pg_ctl."""
+
+    def __init__(self) -> None:
+        self.port = free_port()
+        self.directory = None
+        self.url = f"postgresql://postgres@127.0.0.1:{self.port}/postgres"
+
+    def _tool(self, name: str) -> str:
+        path = shutil.which(name)
+        if path is None:
+            raise RuntimeError(f"{name} not found on PATH; install PostgreSQL or pass --database-url")
+        return path
+
+    def __enter__(self) -> "EphemeralPostgres":
+        self.directory = tempfile.mkdtemp(prefix="bench-postgres-")
+        data = os.path.join(self.directory, "data")
+        subprocess.run(
+            [self._tool("initdb"), "-D", data, "-U", "postgres", "-A", "trust"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        subprocess.run(
+            [self._tool("pg_ctl"), "-D", data, "-l", os.path.join(self.directory, "log"), "-w",
+             "-o", f"-p {self.port} -k {self.directory} -c listen_addresses=127.0.0.1", "start"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.directory:
+            subprocess.run(
+                [self._tool("pg_ctl"), "-D", os.path.join(self.directory, "data"), "-m", "fast", "stop"],
+                stdout=subprocess.DEVNULL,
+            )
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def register_and_login(base_url: str, username: str, password: str = "benchmark") -> str:
+    """Create a user through the API and return a bearer token."""
+    api = f"{base_url}/api/v1/auth"
+    httpx.post(f"{api}/register", json={
+        "username": username, "email": f"{username}@example.com", "password": password,
+    }, timeout=30)
+    response = httpx.post(f"{api}/login", data={
+        "username": username, "password": password,
+    }, timeout=30)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_load(
+    send: Callable[[httpx.AsyncClient], Awaitable[httpx.Response]],
+    base_url: str,
+    concurrency: int = 16,
+    duration: float = 5.0,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, float]:
+    """Call ``send`` from ``concurrency`` workers for ``duration`` seconds."""
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=60
+    ) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await send(client)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def format_result(name: str, result: Dict[str, float]) -> str:
+    return (f"  {name:<28} {result['rps']:8.1f} req/s   p50 {result['p50_ms']:7.1f} ms"
+            f"   p99 {result['p99_ms']:7.1f} ms   errors {result['errors']}")
@@ -0,0 +1,165 @@
+"""
+A tiny local stand-in for a Redis server.
+
+Speaks enough of the RESP protocol for ``redis.asyncio`` to run the
+track cache against it: PING, GET, SET (with EX/PX), DEL, EXISTS, SCAN,
+FLUSHALL and the CLIENT/HELLO handshake commands. Keys live in a dict
+with optional expiry, so it is only meant for local benchmarks and
+manual testing without a real Redis.
+
+Run it standalone with::
+
+    python -m benchmarks.fake_redis --port 6390
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import List, Optional
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Connection handler that answers one RESP command at a time."""
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command, e.g. from telnet
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _write(self, value) -> None:
+        self.wfile.write(_encode(value))
+
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            if not command:
+                continue
+            name = command[0].decode().upper()
+            self.server.record_command(name)
+            try:
+                self._write(self.server.execute(name, command[1:]))
+            except Exception as e:
+                self.wfile.write(f"-ERR {e}\r\n".encode())
+
+
+class _Status(str):
+    """Marker for RESP simple-string replies such as +OK."""
+
+
+def _encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, _Status):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, list):
+        return f"*{len(value)}\r\n".encode() + b"".join(_encode(v) for v in value)
+    if isinstance(value, str):
+        value = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded in-memory key/value server speaking RESP."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), FakeRedisHandler)
+        self.data = {}
+        self.commands = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def record_command(self, name: str):
+        with self._lock:
+            self.commands.append(name)
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, name: str, args: List[bytes]):
+        with self._lock:
+            if name == "PING":
+                return _Status("PONG")
+            if name in ("CLIENT", "SELECT", "HELLO"):
+                return _Status("OK")
+            if name == "GET":
+                return self._live(args[0])
+            if name == "SET":
+                key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+                expires_at = None
+                if b"EX" in options:
+                    expires_at = time.monotonic() + float(args[2 + options.index(b"EX") + 1])
+                elif b"PX" in options:
+                    expires_at = time.monotonic() + float(args[2 + options.index(b"PX") + 1]) / 1000
+                self.data[key] = (value, expires_at)
+                return _Status("OK")
+            if name in ("DEL", "EXISTS"):
+                found = [key for key in args if self._live(key) is not None]
+                if name == "DEL":
+                    for key in found:
+                        del self.data[key]
+                return len(found)
+            if name == "SCAN":
+                pattern = "*"
+                options = [a.upper() for a in args]
+                if b"MATCH" in options:
+                    pattern = args[options.index(b"MATCH") + 1].decode()
+                keys = [k for k in list(self.data) if self._live(k) is not None
+                        and fnmatch.fnmatchcase(k.decode(), pattern)]
+                return [b"0", keys]
+            if name in ("FLUSHALL", "FLUSHDB"):
+                self.data.clear()
+                return _Status("OK")
+        raise ValueError(f"unknown command '{name}'")
+
+    def start(self) -> "FakeRedisServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = FakeRedisServer(args.host, args.port)
+    print(f"Fake Redis listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
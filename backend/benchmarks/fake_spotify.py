@@ -0,0 +1,252 @@
+"""
+A tiny local stand-in for the Spotify Web API with latency injection.
+
+Only the endpoints the backend talks to are implemented, and every
+response is synthetic. Each request sleeps for ``latency`` seconds before
+answering so that benchmarks can show how much of a request is spent
+waiting on Spotify. With ``rate_limit`` set, API calls beyond that many
+per one-second window are answered with 429 and a ``Retry-After``
+header, like Spotify's app-wide rate limit.
+
+Run it standalone with::
+
+    python -m benchmarks.fake_spotify --port 8900 --latency 0.1
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def _track(seed: str) -> dict:
+    return {
+        "uri": f"spotify:track:{seed}",
+        "id": seed,
+        "name": f"Track {seed}",
+        "duration_ms": 150_000 + int(_unit(seed, "duration") * 150_000),
+    }
+
+
+def _unit(seed: str, salt: str) -> float:
+    """Deterministic pseudo-random value in [0, 1) for a track."""
+    digest = hashlib.md5(f"{salt}:{seed}".encode()).digest()
+    return int.from_bytes(digest[:4], "big") / 2 ** 32
+
+
+def _audio_features(track_id: str) -> dict:
+    return {
+        "id": track_id,
+        "uri": f"spotify:track:{track_id}",
+        "energy": round(_unit(track_id, "energy"), 3),
+        "valence": round(_unit(track_id, "valence"), 3),
+        "danceability": round(_unit(track_id, "danceability"), 3),
+        "tempo": round(60 + _unit(track_id, "tempo") * 120, 3),
+    }
+
+
+class FakeSpotifyHandler(BaseHTTPRequestHandler):
+    """Request handler serving canned Spotify responses."""
+
+    server_version = "FakeSpotify/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: Optional[dict] = None):
+        body = json.dumps(payload or {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _handle(self, method: str):
+        self.server.record_request(method, self.path)
+        time.sleep(self.server.latency)
+
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+
+        if path.startswith("/v1/"):
+            retry_after = self.server.throttle()
+            if retry_after is not None:
+                body = json.dumps({"error": {"status": 429, "message": "API rate limit exceeded"}}).encode()
+                self.send_response(429)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Retry-After", str(retry_after))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if method == "GET" and path == "/v1/me":
+            return self._send(200, {
+                "id": "fake-user",
+                "display_name": "Fake User",
+                "external_urls": {"spotify": "https://open.spotify.com/user/fake-user"},
+            })
+
+        if method == "GET" and path == "/v1/search":
+            limit = int(query.get("limit", 10))
+            offset = int(query.get("offset", 0))
+            key = re.sub(r"\W+", "-", query.get("q", "")).strip("-")
+            items = [_track(f"{key}-{offset + i}") for i in range(limit)]
+            return self._send(200, {"tracks": {"items": items}})
+
+        if method == "GET" and path == "/v1/recommendations":
+            limit = int(query.get("limit", 20))
+            items = [_track(f"rec-{uuid.uuid4().hex[:8]}") for _ in range(limit)]
+            return self._send(200, {"tracks": items})
+
+        if method == "GET" and path == "/v1/audio-features":
+            ids = [i for i in query.get("ids", "").split(",") if i]
+            return self._send(200, {"audio_features": [_audio_features(i) for i in ids]})
+
+        if method == "POST" and path == "/api/token":
+            form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode())
+            grant = form.get("grant_type", [""])[0]
+            if grant == "client_credentials":
+                return self._send(200, {
+                    "access_token": f"fake-app-{uuid.uuid4().hex}",
+                    "token_type": "Bearer",
+                    "expires_in": 3600,
+                })
+            if grant in ("authorization_code", "refresh_token"):
+                # User tokens; refreshes keep the same refresh token
+                return self._send(200, {
+                    "access_token": f"fake-user-{uuid.uuid4().hex}",
+                    "token_type": "Bearer",
+                    "expires_in": 3600,
+                    "scope": "playlist-modify-private playlist-modify-public",
+                    **({"refresh_token": f"fake-refresh-{uuid.uuid4().hex}"}
+                       if grant == "authorization_code" else {}),
+                })
+            return self._send(400, {"error": "unsupported_grant_type"})
+
+        match = re.fullmatch(r"/v1/users/([^/]+)/playlists", path)
+        if method == "POST" and match:
+            self._read_json()
+            playlist_id = uuid.uuid4().hex[:22]
+            return self._send(201, {
+                "id": playlist_id,
+                "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"},
+            })
+
+        match = re.fullmatch(r"/v1/playlists/([^/]+)/tracks", path)
+        if method == "POST" and match:
+            uris = self._read_json().get("uris", [])
+            if len(uris) > 100:
+                return self._send(400, {"error": {"status": 400, "message": "Too many tracks requested"}})
+            self.server.add_playlist_items(match.group(1), uris)
+            return self._send(201, {"snapshot_id": uuid.uuid4().hex})
+
+        return self._send(404, {"error": {"status": 404, "message": "Not found"}})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class FakeSpotifyServer(ThreadingHTTPServer):
+    """Threaded fake Spotify server that records the calls it receives."""
+
+    daemon_threads = True
+    # Accept bursts of concurrent connections without resets
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        rate_limit: Optional[int] = None,
+        window: float = 1.0,
+    ):
+        super().__init__((host, port), FakeSpotifyHandler)
+        self.latency = latency
+        # At most ``rate_limit`` API calls per ``window`` seconds; the rest get 429
+        self.rate_limit = rate_limit
+        self.window = window
+        self.requests = []
+        self.throttled = 0
+        # Track URIs of each playlist, in the order they were added
+        self.playlists = {}
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    @property
+    def token_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/token"
+
+    def record_request(self, method: str, path: str):
+        with self._lock:
+            self.requests.append((method, path))
+
+    def add_playlist_items(self, playlist_id: str, uris: list):
+        with self._lock:
+            self.playlists.setdefault(playlist_id, []).extend(uris)
+
+    def throttle(self) -> Optional[int]:
+        """Count an API call; return a Retry-After in seconds if it is over the limit."""
+        if self.rate_limit is None:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start, self._window_calls = now, 0
+            self._window_calls += 1
+            if self._window_calls <= self.rate_limit:
+                return None
+            self.throttled += 1
+            return max(1, math.ceil(self._window_start + self.window - now))
+
+    def start(self) -> "FakeSpotifyServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per call")
+    parser.add_argument("--rate-limit", type=int, help="API calls per second before answering 429")
+    args = parser.parse_args()
+
+    server = FakeSpotifyServer(args.host, args.port, args.latency, args.rate_limit)
+    print(f"Fake Spotify API listening on {server.url} ({args.latency}s latency)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Production server profile::
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Runs ``SERVER_WORKERS`` uvicorn workers, one per available CPU by
+default, without reload. The app is imported once in the master and the
+workers are forked from it, so they start without importing anything and
+share the imported code pages.
+On SIGTERM each worker stops accepting connections, finishes in-flight
+requests and runs the shutdown hooks within
+``SERVER_GRACEFUL_TIMEOUT_SECONDS``.
+
+Starting the server only imports code; it installs nothing and changes
+no schema. Apply migrations as a separate deploy step with
+``alembic upgrade head``.
+"""
+import os
+
+from app.core.config import settings
+from app.core.server import AppWorker, available_cpus
+
+bind = "0.0.0.0:8000"
+workers = settings.SERVER_WORKERS or available_cpus()
+worker_class = AppWorker
+preload_app = True
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+keepalive = settings.SERVER_KEEPALIVE_SECONDS
+# Heartbeat files on tmpfs, so a slow container filesystem cannot stall workers
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+accesslog = "-" if settings.DEBUG else None
+
+
+def post_fork(server, worker):
+    # Nothing connects during import, but never share a pooled
+    # connection the master might hold with the forked workers
+    from app.db.session import async_engine, engine
+
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point them at a throwaway SQLite
+# database before any test module imports the app
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["DATABASE_ASYNC"] = "False"
+
+import pytest
+
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables, dropped again afterwards."""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
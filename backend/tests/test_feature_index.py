@@ -0,0 +1,53 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import feature_index as feature_index_module
+from app.services.feature_index import FeatureIndex, FeatureIndexCache
+
+
+def write_index(tmp_path) -> str:
+    path = str(tmp_path / "index.npz")
+    FeatureIndex(["spotify:track:1"], np.array([[0.5, 0.5, 120.0, 0.5]])).save(path)
+    return path
+
+
+def test_expired_index_is_reloaded_once_for_concurrent_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TRACK_INDEX_PATH", write_index(tmp_path))
+    loads = 0
+    load = FeatureIndex.load
+
+    def slow_load(path):
+        nonlocal loads
+        loads += 1
+        time.sleep(0.05)
+        return load(path)
+
+    monkeypatch.setattr(feature_index_module.FeatureIndex, "load", staticmethod(slow_load))
+    cache = FeatureIndexCache(ttl=60)
+
+    async def main():
+        first = await asyncio.gather(*(cache.get() for _ in range(5)))
+        cache.clear()
+        second = await asyncio.gather(*(cache.get() for _ in range(5)))
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert loads == 2
+    assert all(index is first[0] for index in first)
+    assert all(index is second[0] for index in second)
+    assert second[0].uris == ["spotify:track:1"]
+
+
+def test_index_file_older_than_the_pools_is_ignored(tmp_path, monkeypatch, db):
+    path = write_index(tmp_path)
+    written = time.time() - settings.TRACK_POOL_MAX_AGE_SECONDS - 60
+    os.utime(path, (written, written))
+    monkeypatch.setattr(settings, "TRACK_INDEX_PATH", path)
+    cache = FeatureIndexCache(ttl=60)
+
+    # The table is empty, so building instead of loading the file finds nothing
+    assert asyncio.run(cache.get()) is None
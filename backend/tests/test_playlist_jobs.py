@@ -0,0 +1,57 @@
+import asyncio
+
+from app.services.playlist_jobs import PlaylistJobManager
+
+
+def make_manager() -> PlaylistJobManager:
+    return PlaylistJobManager(workers=1, queue_size=4, timeout=5)
+
+
+async def create_playlist(progress):
+    await progress("selecting_tracks")
+    return {"playlist_id": "p1", "playlist_url": "https://open.spotify.com/playlist/p1", "track_count": 12}
+
+
+def test_job_reports_its_stages_and_result(db):
+    manager = make_manager()
+
+    async def main():
+        await manager.start()
+        try:
+            job = await manager.submit(1, 7, create_playlist)
+            events = [snapshot async for snapshot in manager.events(job["job_id"], heartbeat=1)]
+            manager._local.clear()
+            stored = await manager.get(job["job_id"])
+            return events, stored
+        finally:
+            await manager.stop()
+
+    events, stored = asyncio.run(main())
+    assert events[-1]["status"] == "succeeded"
+    assert stored["status"] == "succeeded"
+    assert stored["track_count"] == 12
+    assert [stage["name"] for stage in stored["stages"]] == ["queued", "selecting_tracks"]
+
+
+def test_job_whose_progress_cannot_be_stored_is_failed_locally(db, monkeypatch):
+    manager = make_manager()
+
+    async def update(job_id, status=None, stage=None, **fields):
+        raise RuntimeError("database is unavailable")
+
+    async def main():
+        await manager.start()
+        try:
+            job = await manager.submit(1, 7, create_playlist)
+            monkeypatch.setattr(manager, "_update", update)
+            waited = await manager.wait(job["job_id"], job["version"], timeout=2)
+            current = await manager.get(job["job_id"])
+            manager._prune()
+            return waited, current, job["job_id"] in manager._local
+        finally:
+            await manager.stop()
+
+    waited, current, still_local = asyncio.run(main())
+    assert waited["status"] == "failed"
+    assert current["status"] == "failed"
+    assert not still_local
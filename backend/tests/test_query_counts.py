@@ -0,0 +1,88 @@
+"""Pin the transition listings and stats to a constant number of queries.
+
+Each endpoint is requested at a small and a large page size under the
+same bound, so loading the moods of every row one by one (N+1) fails.
+"""
+from datetime import datetime, timedelta
+from itertools import permutations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.db.query_counter import assert_max_queries
+from app.main import app
+from app.models.mood import Mood, MoodTransition, MoodTransitionStat
+from app.models.user import User
+from app.services.mood_cache import mood_cache
+from app.services.principal_cache import principal_cache
+from app.services.response_cache import response_cache
+
+V = "/api/v1/transitions"
+PAGE_SIZES = [5, 100]
+
+
+@pytest.fixture
+def client(db):
+    user = User(username="listener", email="listener@example.com", hashed_password="x")
+    db.add(user)
+    db.add_all(Mood(name=f"Mood {i}", color="#000000") for i in range(11))
+    db.commit()
+
+    now = datetime.utcnow()
+    pairs = list(permutations(range(1, 12), 2))
+    db.add_all(
+        MoodTransition(
+            user_id=user.id,
+            initial_mood_id=pairs[i % len(pairs)][0],
+            target_mood_id=pairs[i % len(pairs)][1],
+            timestamp=now - timedelta(minutes=i),
+        )
+        for i in range(250)
+    )
+    db.add_all(
+        MoodTransitionStat(user_id=user.id, initial_mood_id=a, target_mood_id=b, count=1, last_seen=now)
+        for a, b in pairs
+    )
+    db.commit()
+
+    for cache in (mood_cache, principal_cache, response_cache):
+        cache.clear()
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token(user.username, user_id=user.id)}"
+    # Authenticate and load the mood catalog outside the counted requests
+    client.get(f"{V}/stats/common?limit=1").raise_for_status()
+    return client
+
+
+def get(client, url):
+    response = client.get(url)
+    response.raise_for_status()
+    return response
+
+
+@pytest.mark.parametrize("limit", PAGE_SIZES)
+def test_transition_list_query_count(client, limit):
+    with assert_max_queries(1):
+        response = get(client, f"{V}/?limit={limit}")
+    assert len(response.json()) == limit
+    assert response.json()[0]["initial_mood"]["name"].startswith("Mood")
+
+    with assert_max_queries(1):
+        response = get(client, f"{V}/?limit={limit}&cursor={response.headers['X-Next-Cursor']}")
+    assert len(response.json()) == limit
+
+
+@pytest.mark.parametrize("limit", PAGE_SIZES)
+def test_all_transitions_query_count(client, limit):
+    with assert_max_queries(1):
+        response = get(client, f"{V}/all?limit={limit}")
+    assert len(response.json()) == limit
+
+
+@pytest.mark.parametrize("limit", PAGE_SIZES)
+def test_common_transitions_query_count(client, limit):
+    with assert_max_queries(1):
+        response = get(client, f"{V}/stats/common?limit={limit}")
+    assert len(response.json()) == limit
+    assert response.json()[0]["target_mood"]["name"].startswith("Mood")
@@ -0,0 +1,259 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services import spotify_client as spotify_client_module
+from app.services.spotify_client import AsyncSpotify, SpotifyAPIError
+from app.services.spotify_scheduler import BACKGROUND, INTERACTIVE, RateLimited, SpotifyScheduler
+
+
+def make_scheduler(rate: float = 100.0, burst: int = 1, min_rate: float = 1.0) -> SpotifyScheduler:
+    return SpotifyScheduler(rate=rate, burst=burst, min_rate=min_rate)
+
+
+def test_acquire_within_burst_does_not_wait():
+    scheduler = make_scheduler(rate=1.0, burst=3)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(3):
+            await scheduler.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 0.05
+    assert scheduler.sent["interactive"].value == 3
+
+
+def test_acquire_beyond_burst_is_paced():
+    scheduler = make_scheduler(rate=20.0, burst=1)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(3):
+            await scheduler.acquire()
+        return time.monotonic() - start
+
+    # Two calls beyond the burst at 20 calls/s
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_waiters_are_served_by_priority():
+    scheduler = make_scheduler(rate=20.0, burst=1)
+    order = []
+
+    async def call(name, priority):
+        await scheduler.acquire(priority)
+        order.append(name)
+
+    async def main():
+        await scheduler.acquire()
+        background = asyncio.create_task(call("background", BACKGROUND))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", INTERACTIVE))
+        await asyncio.gather(background, interactive)
+
+    asyncio.run(main())
+    assert order == ["interactive", "background"]
+
+
+def test_acquire_rejects_when_wait_exceeds_max_wait():
+    scheduler = make_scheduler(rate=1.0, burst=1)
+
+    async def main():
+        await scheduler.acquire()
+        with pytest.raises(RateLimited) as excinfo:
+            await scheduler.acquire(max_wait=0.1)
+        return excinfo.value
+
+    error = asyncio.run(main())
+    assert error.retry_after > 0.1
+    assert scheduler.rejected.value == 1
+
+
+def test_cancelled_waiter_does_not_block_the_queue():
+    scheduler = make_scheduler(rate=20.0, burst=1)
+
+    async def main():
+        await scheduler.acquire()
+        cancelled = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.wait_for(scheduler.acquire(), 1)
+
+    asyncio.run(main())
+
+
+def test_throttled_pauses_calls_and_halves_the_rate():
+    scheduler = make_scheduler(rate=100.0, burst=5)
+
+    async def main():
+        scheduler.on_throttled(0.2)
+        start = time.monotonic()
+        await scheduler.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) >= 0.19
+    assert scheduler.rate == 50.0
+    assert scheduler.throttled.value == 1
+
+
+def test_throttled_rate_has_a_floor_and_recovers():
+    scheduler = make_scheduler(rate=10.0, min_rate=4.0)
+    scheduler.on_throttled(0)
+    scheduler.on_throttled(0)
+    assert scheduler.rate == 4.0
+
+    for _ in range(100):
+        scheduler.on_success()
+    assert scheduler.rate == 10.0
+
+
+def test_coalesce_shares_one_call():
+    scheduler = make_scheduler()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["track"]
+
+    async def main():
+        return await asyncio.gather(*(scheduler.coalesce("search", fetch) for _ in range(3)))
+
+    assert asyncio.run(main()) == [["track"]] * 3
+    assert calls == 1
+    assert scheduler.coalesced.value == 2
+
+
+def test_coalesce_shares_errors_then_retries():
+    scheduler = make_scheduler()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            scheduler.coalesce("search", fetch), scheduler.coalesce("search", fetch),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+        with pytest.raises(ValueError):
+            await scheduler.coalesce("search", fetch)
+
+    asyncio.run(main())
+    assert calls == 2
+
+
+def test_coalesce_survives_a_cancelled_leader():
+    scheduler = make_scheduler()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return ["track"]
+
+    async def main():
+        leader = asyncio.create_task(scheduler.coalesce("search", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(scheduler.coalesce("search", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == ["track"]
+
+
+def test_coalesce_cancels_the_call_once_nobody_waits():
+    scheduler = make_scheduler()
+
+    async def main():
+        stopped = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                stopped.set()
+                raise
+
+        caller = asyncio.create_task(scheduler.coalesce("search", fetch))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.wait_for(stopped.wait(), 1)
+        assert "search" not in scheduler._inflight
+
+    asyncio.run(main())
+
+
+def spotify_clients(tokens_and_priorities, rejected_token=None):
+    """AsyncSpotify clients on a stub transport, plus the requests it saw."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        if request.headers["Authorization"] == f"Bearer {rejected_token}":
+            return httpx.Response(401, json={"error": {"message": "The access token expired"}})
+        return httpx.Response(200, json={"tracks": {"items": []}})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://api.spotify.test/")
+    clients = [
+        AsyncSpotify(token, http_client=http_client, priority=priority)
+        for token, priority in tokens_and_priorities
+    ]
+    return clients, requests
+
+
+def test_client_coalesces_identical_searches_with_the_same_token():
+    clients, requests = spotify_clients([("token-a", INTERACTIVE), ("token-a", INTERACTIVE)])
+
+    async def main():
+        return await asyncio.gather(*(client.search("genre:pop") for client in clients))
+
+    assert asyncio.run(main()) == [{"tracks": {"items": []}}] * 2
+    assert len(requests) == 1
+
+
+def test_client_does_not_share_calls_between_tokens():
+    clients, requests = spotify_clients(
+        [("token-expired", INTERACTIVE), ("token-b", INTERACTIVE)], rejected_token="token-expired"
+    )
+
+    async def main():
+        return await asyncio.gather(
+            *(client.search("genre:pop") for client in clients), return_exceptions=True
+        )
+
+    expired, valid = asyncio.run(main())
+    assert isinstance(expired, SpotifyAPIError) and expired.status_code == 401
+    assert valid == {"tracks": {"items": []}}
+    assert len(requests) == 2
+
+
+def test_interactive_call_does_not_join_a_background_flight():
+    clients, requests = spotify_clients([("token-a", BACKGROUND), ("token-a", INTERACTIVE)])
+    background, interactive = clients
+    # The bucket is empty for a second, so only interactive callers get through soon
+    scheduler = SpotifyScheduler(rate=1.0, burst=1, min_rate=1.0)
+
+    async def main():
+        with patch.object(spotify_client_module, "spotify_scheduler", scheduler):
+            await scheduler.acquire()
+            background_call = asyncio.create_task(background.search("genre:pop"))
+            await asyncio.sleep(0)
+            await asyncio.wait_for(interactive.search("genre:pop"), 1.5)
+            assert not background_call.done()
+            background_call.cancel()
+
+    asyncio.run(main())
+    assert len(requests) == 1
+    assert requests[0].headers["Authorization"] == "Bearer token-a"
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.spotify import SpotifyToken
+from app.services import spotify_tokens as spotify_tokens_module
+from app.services.spotify_client import SpotifyAPIError
+from app.services.spotify_tokens import CachedToken, SpotifyTokenStore
+
+USER_ID = 1
+
+
+def store_row(db, refresh_token: str, expires_in: float = 3600) -> None:
+    db.merge(SpotifyToken(
+        user_id=USER_ID,
+        access_token=f"access-{refresh_token}",
+        refresh_token=refresh_token,
+        expires_at=datetime.utcnow() + timedelta(seconds=expires_in),
+    ))
+    db.commit()
+
+
+def stored_refresh_token(db):
+    db.expire_all()
+    row = db.get(SpotifyToken, USER_ID)
+    return row.refresh_token if row is not None else None
+
+
+def stale_token(refresh_token: str) -> CachedToken:
+    return CachedToken(f"access-{refresh_token}", refresh_token, datetime.utcnow())
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    """Refresh tokens sent to Spotify; only ``refresh-new`` is accepted."""
+    sent = []
+
+    async def refresh_user_token(refresh_token):
+        sent.append(refresh_token)
+        if refresh_token != "refresh-new":
+            raise SpotifyAPIError(400, "invalid_grant")
+        return {"access_token": "access-refreshed", "expires_in": 3600}
+
+    monkeypatch.setattr(spotify_tokens_module, "refresh_user_token", refresh_user_token)
+    return sent
+
+
+def refresh(store: SpotifyTokenStore, current: CachedToken) -> CachedToken:
+    async def main():
+        try:
+            return await store._refresh(USER_ID, current)
+        finally:
+            await store.close()
+
+    return asyncio.run(main())
+
+
+def test_rejected_refresh_uses_tokens_stored_meanwhile(db, refreshes):
+    store = SpotifyTokenStore(refresh_margin=300, min_ttl=30)
+    # Another worker refreshed and Spotify rotated the refresh token
+    store_row(db, "refresh-new")
+
+    token = refresh(store, stale_token("refresh-old"))
+
+    assert token.access_token == "access-refresh-new"
+    assert refreshes == ["refresh-old"]
+    assert stored_refresh_token(db) == "refresh-new"
+
+
+def test_rejected_refresh_retries_once_with_the_stored_token(db, refreshes):
+    store = SpotifyTokenStore(refresh_margin=300, min_ttl=30)
+    store_row(db, "refresh-new", expires_in=0)
+
+    token = refresh(store, stale_token("refresh-old"))
+
+    assert token.access_token == "access-refreshed"
+    assert refreshes == ["refresh-old", "refresh-new"]
+    assert stored_refresh_token(db) == "refresh-new"
+
+
+def test_revoked_refresh_token_deletes_the_row(db, refreshes):
+    store = SpotifyTokenStore(refresh_margin=300, min_ttl=30)
+    store_row(db, "refresh-old", expires_in=0)
+
+    with pytest.raises(HTTPException) as excinfo:
+        refresh(store, stale_token("refresh-old"))
+
+    assert excinfo.value.status_code == 401
+    assert stored_refresh_token(db) is None
+
+
+def test_delete_keeps_a_row_replaced_after_the_check(db):
+    store = SpotifyTokenStore(refresh_margin=300, min_ttl=30)
+    store_row(db, "refresh-new")
+
+    async def main():
+        store._write(USER_ID, None, "refresh-old")
+        await store.close()
+
+    asyncio.run(main())
+    assert stored_refresh_token(db) == "refresh-new"
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.services.track_cache import MemoryTrackPoolBackend, TrackPoolCache
+
+
+def make_cache() -> TrackPoolCache:
+    return TrackPoolCache(MemoryTrackPoolBackend(max_entries=8), ttl=60, pool_size=10)
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = make_cache()
+    calls = []
+
+    async def fetch(query, limit):
+        calls.append((query, limit))
+        await asyncio.sleep(0.02)
+        return ["spotify:track:1"]
+
+    async def main():
+        pools = await asyncio.gather(
+            cache.get_pool("genre:pop year:1980-1989", fetch),
+            cache.get_pool("Year:1980-1989  genre:pop", fetch),
+        )
+        cached = await cache.get_pool("genre:pop year:1980-1989", fetch)
+        return pools, cached
+
+    pools, cached = asyncio.run(main())
+    assert pools == [["spotify:track:1"]] * 2
+    assert cached == ["spotify:track:1"]
+    assert calls == [("genre:pop year:1980-1989", 10)]
+    assert cache.hits.value == 1
+
+
+def test_cancelled_first_request_does_not_fail_the_others():
+    cache = make_cache()
+
+    async def fetch(query, limit):
+        await asyncio.sleep(0.05)
+        return ["spotify:track:1"]
+
+    async def main():
+        first = asyncio.create_task(cache.get_pool("genre:pop", fetch))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get_pool("genre:pop", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ["spotify:track:1"]
+
+
+def test_fetch_errors_are_not_cached():
+    cache = make_cache()
+    results = [RuntimeError("spotify down"), ["spotify:track:1"]]
+
+    async def fetch(query, limit):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await cache.get_pool("genre:pop", fetch)
+        return await cache.get_pool("genre:pop", fetch)
+
+    assert asyncio.run(main()) == ["spotify:track:1"]
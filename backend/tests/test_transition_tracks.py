@@ -0,0 +1,82 @@
+import asyncio
+import random
+
+import pytest
+
+from app.api.endpoints.spotify import get_mood_transition_tracks, get_mood_transition_tracks_concurrent
+from app.core.config import settings
+from app.services.mood_cache import CachedMood
+
+ANGRY = CachedMood(id=1, name="Angry", color="#ff0000")
+HAPPY = CachedMood(id=2, name="Happy", color="#ffff00")
+SAD = CachedMood(id=3, name="Sad", color="#0000ff")
+
+
+class StubSpotify:
+    """Answers searches and recommendations after a query-dependent delay."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def _call(self, key: str) -> None:
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            # Calls finish out of submission order
+            await asyncio.sleep((sum(map(ord, key)) % 5) * 0.002)
+        finally:
+            self.in_flight -= 1
+
+    async def search(self, q, type, limit):
+        await self._call(q)
+        genre = q.split()[0]
+        # Every search also returns a track shared with the other searches
+        uris = ["spotify:track:shared"] + [f"spotify:track:{genre}-{i}" for i in range(limit - 1)]
+        return {"tracks": {"items": [{"uri": uri} for uri in uris]}}
+
+    async def recommendations(self, seed_tracks, target_energy, target_valence, limit):
+        await self._call("recommendations")
+        # Recommendations may repeat their seeds
+        uris = list(seed_tracks) + [f"spotify:track:rec-{i}" for i in range(limit)]
+        return {"tracks": [{"uri": uri} for uri in uris]}
+
+
+@pytest.fixture(autouse=True)
+def live_searches(monkeypatch):
+    # Pool sampling draws from the shared RNG in completion order
+    monkeypatch.setattr(settings, "TRACK_CACHE_ENABLED", False)
+
+
+def run(fetcher, seed, *args, **kwargs):
+    spotify = StubSpotify()
+    random.seed(seed)
+    return asyncio.run(fetcher(spotify, *args, **kwargs)), spotify
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("moods", [(ANGRY, HAPPY), (SAD, ANGRY), (HAPPY, HAPPY)])
+def test_concurrent_matches_sequential(seed, moods):
+    sequential, sequential_spotify = run(get_mood_transition_tracks, seed, *moods)
+    concurrent, concurrent_spotify = run(get_mood_transition_tracks_concurrent, seed, *moods)
+
+    assert concurrent == sequential
+    assert len(concurrent) == len(set(concurrent))
+    assert concurrent_spotify.calls == sequential_spotify.calls
+
+
+def test_concurrent_respects_max_concurrency():
+    tracks, spotify = run(get_mood_transition_tracks_concurrent, 0, ANGRY, HAPPY, max_concurrency=2)
+
+    assert tracks
+    assert spotify.peak == 2
+
+
+def test_concurrency_defaults_to_setting(monkeypatch):
+    monkeypatch.setattr(settings, "SPOTIFY_MAX_CONCURRENCY", 1)
+
+    _, spotify = run(get_mood_transition_tracks_concurrent, 0, ANGRY, HAPPY)
+
+    assert spotify.peak == 1
@@ -1,8 +1,23 @@
 import React, { useState, useEffect } from 'react';
+import { getAuthToken } from '../services/AuthService';
 
 // Base API URL with version
 const API_URL = 'http://localhost:8000/api/v1';
 
+// Spotify tokens are stored per user, so every call needs our own auth token
+const getHeaders = () => {
+  const token = getAuthToken();
+  const headers = {
+    'Content-Type': 'application/json',
+  };
+
+  if (token) {
+    headers['Authorization'] = `Bearer ${token}`;
+  }
+
+  return headers;
+};
+
 const SpotifyIntegration = ({ onPlaylistCreated, moodTransition }) => {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [isCreatingPlaylist, setIsCreatingPlaylist] = useState(false);
@@ -19,7 +34,9 @@ const SpotifyIntegration = ({ onPlaylistCreated, moodTransition }) => {
     const checkAuth = async () => {
       try {
         console.log('Checking Spotify authentication status...');
-        const response = await fetch(`${API_URL}/spotify/me`);
+        const response = await fetch(`${API_URL}/spotify/me`, {
+          headers: getHeaders(),
+        });
         console.log('Auth check response:', response.status);
         
         if (response.ok) {
@@ -50,10 +67,26 @@ const SpotifyIntegration = ({ onPlaylistCreated, moodTransition }) => {
   }, [moodTransition]);
   
   // Function to authenticate with Spotify
-  const authenticateWithSpotify = () => {
+  const authenticateWithSpotify = async () => {
     console.log('Initiating Spotify authentication...');
-    // Use window.open for better debugging
-    window.open(`${API_URL}/spotify/login`, '_self');
+    setError(null);
+
+    try {
+      // The consent URL carries a signed state tying the callback to this user
+      const response = await fetch(`${API_URL}/spotify/authorize-url`, {
+        headers: getHeaders(),
+      });
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! Status: ${response.status}`);
+      }
+
+      const data = await response.json();
+      window.location.href = data.url;
+    } catch (err) {
+      setError(`Error connecting to Spotify: ${err.message}`);
+      console.error(err);
+    }
   };
   
   // Function to create a playlist based on the mood transition
@@ -69,9 +102,7 @@ const SpotifyIntegration = ({ onPlaylistCreated, moodTransition }) => {
     try {
       const response = await fetch(`${API_URL}/spotify/create-playlist`, {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
+        headers: getHeaders(),
         body: JSON.stringify({
           initial_mood_id: moodTransition.initial_mood_id,
           target_mood_id: moodTransition.target_mood_id,